@@ -8,8 +8,10 @@
 # v3.0.3 修复部分bug
 # v3.0   解决run不完整的问题
 
+import copy
 import os
-from typing import Dict, List, Tuple, Optional, Any
+import re
+from typing import Dict, Iterable, List, Tuple, Optional, Any, Union
 import pandas as pd
 from docx import Document
 from docx.table import Table, _Row, _Cell
@@ -18,13 +20,15 @@ from docx.text.run import Run
 from docx.oxml.ns import qn as nsqn
 from docx.oxml import OxmlElement
 
+from .sources import TableSource, load_table_source
+from .locations import TextLocation, ImageLocation, TableLocation, XmlTextLocation, RangeLocation
+
 # 导入常量
 from .constants import (
     TagPrefix,
     SpecialValue,
     Conversion,
     DefaultBorder,
-    XMLNamespace,
     LogMessage
 )
 
@@ -44,6 +48,28 @@ def _contains_tag_markers(text: str) -> bool:
     return TagPrefix.TAG_START in text and TagPrefix.TAG_END in text
 
 
+_W_T = nsqn("w:t")
+_W_P = nsqn("w:p")
+_W_TC = nsqn("w:tc")
+_W_RPR = nsqn("w:rPr")
+
+
+def _fast_text(element: Any) -> str:
+    """快速拼接元素下所有 w:t 的文本
+    
+    python-docx 的 paragraph.text 每个段落和 run 都要执行 XPath，开销较大；
+    这里只用 lxml 的 itertext 拼接 w:t 文本，用于在计算完整文本前预筛选。
+    与 paragraph.text 的区别仅在于不包含制表符、换行等特殊 run 内容。
+    
+    Args:
+        element: w:p 等 XML 元素
+        
+    Returns:
+        拼接后的文本
+    """
+    return "".join(element.itertext(_W_T, with_tail=False))
+
+
 def _is_simple_tag(text: str) -> bool:
     """判断是否为简单标签（单个完整标签）
     
@@ -73,58 +99,118 @@ def _extract_tag_name(text: str) -> str:
     return ""
 
 
-def _process_simple_tag(tag_dict: Dict[str, List], paragraph: Paragraph) -> None:
+def _text_location(tag_name: str, paragraph: Paragraph, start: int, end: int) -> TextLocation:
+    """创建段落标签位置，图片标签使用 ImageLocation
+    
+    Args:
+        tag_name: 标签名称
+        paragraph: 包含标签的段落
+        start: 起始 run 下标
+        end: 结束 run 下标（不含）
+        
+    Returns:
+        标签位置
+    """
+    if TagPrefix.IMAGE in tag_name or TagPrefix.TABLE_IMAGE in tag_name:
+        return ImageLocation(paragraph._p, paragraph.part, start, end)
+    return TextLocation(paragraph._p, paragraph.part, start, end)
+
+
+class TagMatcher:
+    """定向搜索的多模式匹配器
+    
+    所有标签都以 "#[" 开始、"]#" 结束，因此无需逐个模式扫描：用一次正则
+    扫描切分出文本中的全部候选标签，再对目标标签集合做哈希查找，
+    相当于共享定界符的多模式自动机。只有包含目标标签的段落才会进一步
+    计算 run 区间。
+    
+    Attributes:
+        keys: 目标标签集合
+        
+    Example:
+        >>> matcher = TagMatcher(["#[title]#", "#[TABLE-data]#"])
+        >>> matcher.wants_text("标题：#[title]#")
+        True
+    """
+    
+    _TOKEN = re.compile(re.escape(TagPrefix.TAG_START) + ".*?" + re.escape(TagPrefix.TAG_END), re.S)
+    
+    def __init__(self, keys: Iterable[str]):
+        """初始化匹配器
+        
+        Args:
+            keys: 目标标签（替换字典的键）
+        """
+        self.keys = frozenset(keys)
+        # 标签核心部分（"#[...]#"），用于段落级预筛选
+        self._tokens = frozenset(filter(None, (_extract_tag_name(key) for key in self.keys)))
+        
+    def wants(self, tag_name: str) -> bool:
+        """标签是否为目标标签"""
+        return tag_name in self.keys
+        
+    def wants_text(self, text: str) -> bool:
+        """文本中是否可能包含目标标签（一次扫描）"""
+        return any(token in self._tokens for token in self._TOKEN.findall(text))
+        
+    def wants_prefix(self, prefix: str) -> bool:
+        """目标标签中是否有指定前缀类型（如 TagPrefix.TEXTBOX）"""
+        return any(prefix in key for key in self.keys)
+
+
+def _process_simple_tag(tag_dict: Dict[str, List], paragraph: Paragraph, text: str,
+                        matcher: Optional[TagMatcher] = None) -> None:
     """处理简单标签（单个完整标签）
     
     Args:
         tag_dict: 标签字典
         paragraph: 包含标签的段落
+        text: 段落文本
+        matcher: 定向搜索匹配器，为 None 时记录所有标签
     """
-    tag_name = _extract_tag_name(paragraph.text)
-    if tag_name:
-        run_list = list(paragraph.runs)
-        tag_dict.setdefault(tag_name, []).append([paragraph, run_list])
+    tag_name = _extract_tag_name(text)
+    if tag_name and (matcher is None or matcher.wants(tag_name)):
+        run_count = len(paragraph._p.r_lst)
+        tag_dict.setdefault(tag_name, []).append(_text_location(tag_name, paragraph, 0, run_count))
 
 
-def _process_complex_tag(tag_dict: Dict[str, List], paragraph: Paragraph) -> None:
+def _process_complex_tag(tag_dict: Dict[str, List], paragraph: Paragraph,
+                         matcher: Optional[TagMatcher] = None) -> None:
     """处理复杂标签（多个标签或跨 run）
     
     Args:
         tag_dict: 标签字典
         paragraph: 包含标签的段落
+        matcher: 定向搜索匹配器，为 None 时记录所有标签
     """
     tag_parts = []
-    run_list = []
+    start = 0
     
-    for run in paragraph.runs:
+    for idx, run in enumerate(paragraph.runs):
         text = run.text
         
         # 检查这个 run 是否包含完整的标签
         if TagPrefix.TAG_START in text and TagPrefix.TAG_END in text:
             # 单个 run 中的完整标签
             tag_name = _extract_tag_name(text)
-            if tag_name:
-                tag_dict.setdefault(tag_name, []).append([paragraph, [run]])
+            if tag_name and (matcher is None or matcher.wants(tag_name)):
+                tag_dict.setdefault(tag_name, []).append(_text_location(tag_name, paragraph, idx, idx + 1))
             # 重置状态，继续寻找下一个标签
             tag_parts = []
-            run_list = []
         elif TagPrefix.TAG_START in text:
             # 找到标签开头（跨 run 的情况）
             tag_parts = [text]
-            run_list = [run]
+            start = idx
         elif TagPrefix.TAG_END in text:
             # 找到标签结尾（跨 run 的情况）
             tag_parts.append(text)
-            run_list.append(run)
-            if tag_parts:
-                tag_name = "".join(tag_parts)  # 使用 join 一次性拼接
-                tag_dict.setdefault(tag_name, []).append([paragraph, run_list])
+            tag_name = "".join(tag_parts)  # 使用 join 一次性拼接
+            if matcher is None or matcher.wants(tag_name):
+                tag_dict.setdefault(tag_name, []).append(_text_location(tag_name, paragraph, start, idx + 1))
             tag_parts = []
-            run_list = []
         elif tag_parts:
             # 标签中间部分（跨 run 的情况）
             tag_parts.append(text)
-            run_list.append(run)
 
 
 # ============================================================================
@@ -132,8 +218,9 @@ def _process_complex_tag(tag_dict: Dict[str, List], paragraph: Paragraph) -> Non
 # ============================================================================
 
 # 通用搜索循环
-## 形成的是类似{tag1: [p, r1, r2, r3], tag2: [p, r1]}这样的字典
-def search_tag(tag_dict: Dict[str, List], paragraphs: List[Paragraph]) -> None:
+## 形成的是类似{tag1: [TextLocation, ...], tag2: [ImageLocation]}这样的字典
+def search_tag(tag_dict: Dict[str, List], paragraphs: List[Paragraph],
+               matcher: Optional[TagMatcher] = None) -> None:
     """搜索段落中的标签
     
     遍历段落列表，查找所有符合格式的标签，并将其添加到标签字典中。
@@ -142,19 +229,28 @@ def search_tag(tag_dict: Dict[str, List], paragraphs: List[Paragraph]) -> None:
     Args:
         tag_dict: 标签字典，用于存储找到的标签
         paragraphs: 要搜索的段落列表
+        matcher: 定向搜索匹配器，提供时只记录目标标签，
+            且不含目标标签的段落不会计算 run 区间
         
     Note:
         标签格式: #[标签名]#
-        结果字典格式: {tag_name: [[paragraph, [run1, run2, ...]]]}
+        结果字典格式: {tag_name: [TextLocation(w:p, part, start, end), ...]}
     """
     for paragraph in paragraphs:
-        if not _contains_tag_markers(paragraph.text):
+        fast_text = _fast_text(paragraph._p)
+        if not _contains_tag_markers(fast_text):
+            continue
+        if matcher is not None and not matcher.wants_text(fast_text):
+            continue
+            
+        text = paragraph.text
+        if not _contains_tag_markers(text):
             continue
             
-        if _is_simple_tag(paragraph.text):
-            _process_simple_tag(tag_dict, paragraph)
+        if _is_simple_tag(text):
+            _process_simple_tag(tag_dict, paragraph, text, matcher)
         else:
-            _process_complex_tag(tag_dict, paragraph)
+            _process_complex_tag(tag_dict, paragraph, matcher)
 
 # 建立各类tag字典
 ## 遍历模板，从模板中寻找完整的tag
@@ -170,9 +266,10 @@ def search_template_tag(document: Document) -> Dict[str, List]:
     Returns:
         标签字典，格式为:
         {
-            "#[tag1]#": [[paragraph, [run1, run2, ...]], ...],
-            "#[TABLE-name]#": [[table, row_idx, col_idx], ...],
-            "#[TX-name]#": [xml_element, ...],
+            "#[tag1]#": [TextLocation, ...],
+            "#[IMAGE-name]#": [ImageLocation, ...],
+            "#[TABLE-name]#": [TableLocation, ...],
+            "#[TX-name]#": [TextboxLocation, ...],
             ...
         }
         
@@ -183,104 +280,50 @@ def search_template_tag(document: Document) -> Dict[str, List]:
         >>> print(tags.keys())
         dict_keys(['#[title]#', '#[TABLE-data]#'])
     """
-    tag_dict = {}
-
-    ### 页眉页脚
-    sections_list = []
-    for section in document.sections:
-        sections_list.extend([section.header, section.first_page_header, section.footer, section.first_page_footer])
-    for section_part in sections_list:
-        # 搜索段落
-        search_tag(tag_dict, section_part.paragraphs)
-
-        # 搜索表格（新增：支持页眉页脚中的表格）
-        for table in section_part.tables:
-            rows = table.rows
-            for row_idx in range(len(rows)):
-                cells = rows[row_idx].cells
-                for col_idx in range(len(cells)):
-                    cell = cells[col_idx]
-                    if TagPrefix.TAG_START in cell.text and TagPrefix.TAG_END in cell.text:
-                        if TagPrefix.TABLE in cell.text and TagPrefix.TAG_END in cell.text:
-                            tag = TagPrefix.TABLE + "-" + cell.text.split(TagPrefix.TABLE + "-")[1].split(TagPrefix.TAG_END)[0] + TagPrefix.TAG_END
-                            tag_dict.setdefault(tag, []).append([table, row_idx, col_idx])
-                        else:
-                            # 单元格中的字符串tag
-                            search_tag(tag_dict, cell.paragraphs)
-
-    ### 段落
-    search_tag(tag_dict, document.paragraphs)
-
-    ### 表格
-    for table in document.tables:
-        rows = table.rows
-        for row_idx in range(len(rows)):
-            cells = rows[row_idx].cells
-            for col_idx in range(len(cells)):
-                cell = cells[col_idx]
-                if TagPrefix.TAG_START in cell.text and TagPrefix.TAG_END in cell.text:
-                    if TagPrefix.TABLE in cell.text and TagPrefix.TAG_END in cell.text:
-                        tag = TagPrefix.TABLE + "-" + cell.text.split(TagPrefix.TABLE + "-")[1].split(TagPrefix.TAG_END)[0] + TagPrefix.TAG_END
-                        tag_dict.setdefault(tag, []).append([table, row_idx, col_idx])
-                    else:
-                        # 单元格中的字符串tag
-                        search_tag(tag_dict, cell.paragraphs)
-
-    ### 文本框，仅支持整个文本框中的内容替换
-    children = document.element.body.iter()
-    for child in children:
-        if child.tag.endswith((XMLNamespace.TAG_ALTERNATE_CONTENT, XMLNamespace.TAG_TEXTBOX)):
-            for child_item in child.iter():
-                if child_item.tag.endswith((XMLNamespace.TAG_RUN, XMLNamespace.TAG_PARAGRAPH_PROPERTIES)):
-                    if child_item.text != None:
-                        if TagPrefix.TEXTBOX in child_item.text and TagPrefix.TAG_END in child_item.text:
-                            tag_dict.setdefault(child_item.text.strip(), []).append(child_item)
-    
-    return tag_dict
+    # 与 TagSearcher 共用同一套搜索逻辑（延迟导入以避免循环依赖）
+    from .core import TagSearcher
+    return TagSearcher(document).search_all()
 
 # 获得指定行号表格边框底线格式
+def _border_details(border: Any) -> Dict[str, str]:
+    """读取 w:bottom 边框元素的样式，元素不存在时返回默认样式"""
+    if border is None:
+        return DefaultBorder.get_style_dict()
+    return {
+        'size': border.get(nsqn('w:sz'), '0'),
+        'color': border.get(nsqn('w:color'), 'auto'),
+        'space': border.get(nsqn('w:space'), '0'),
+        'val': border.get(nsqn('w:val'), 'single'),
+    }
+
+
+def _table_bottom_border(table_obj: Table) -> Dict[str, str]:
+    """获取表格（tblBorders）的底线边框格式"""
+    table_borders = table_obj._tbl.tblPr.first_child_found_in("w:tblBorders")
+    if table_borders is None:
+        return DefaultBorder.get_style_dict()
+    return _border_details(table_borders.find(nsqn("w:bottom")))
+
+
+def _cells_bottom_borders(cells: List[_Cell]) -> List[Dict[str, str]]:
+    """获取单元格列表的底线边框格式"""
+    bottom_border_details = []
+    for cell in cells:
+        cell_borders = cell._tc.get_or_add_tcPr().first_child_found_in("w:tcBorders")
+        bottom_border = cell_borders.find(nsqn("w:bottom")) if cell_borders is not None else None
+        bottom_border_details.append(_border_details(bottom_border))
+    return bottom_border_details
+
+
 def get_table_bottom_border_details(
     table_obj: Table, 
     row_index: int, 
     cell_index: int
 ) -> Tuple[List[Dict[str, str]], Dict[str, str]]:    
-    # 获取表格的指定行号
-    last_row = table_obj.rows[row_index]
-
-    # 默认空样式
+    # 获取指定行中各单元格以及表格本身的底线边框格式
     ## val: single 实线；dashed 虚线；nil 隐藏
-    default_border_details = DefaultBorder.get_style_dict()
-
-    # 获取表格的边框格式
-    table_borders = table_obj._tbl.tblPr.first_child_found_in("w:tblBorders")
-    if table_borders is not None:
-        table_bottom_border = table_borders.find(nsqn("w:bottom"))
-        table_border_details = {
-            'size': table_bottom_border.get(nsqn('w:sz'), '0'),
-            'color': table_bottom_border.get(nsqn('w:color'), 'auto'),
-            'space': table_bottom_border.get(nsqn('w:space'), '0'),
-            'val': table_bottom_border.get(nsqn('w:val'), 'single'),
-        }
-    else:
-        table_border_details = default_border_details
-
-    # 获取指定行号中所有单元格的底线边框格式
-    bottom_border_details = []
-    for cell in last_row.cells[cell_index:]:
-        # 获取单元格的底线边框格式
-        cell_borders = cell._tc.get_or_add_tcPr().first_child_found_in("w:tcBorders")
-        bottom_border = cell_borders.find(nsqn("w:bottom")) if cell_borders != None else None
-        if bottom_border is not None:
-            border_details = {
-                'size': bottom_border.get(nsqn('w:sz'), '0'),
-                'color': bottom_border.get(nsqn('w:color'), 'auto'),
-                'space': bottom_border.get(nsqn('w:space'), '0'),
-                'val': bottom_border.get(nsqn('w:val'), 'single'),
-            }
-        else:
-            border_details = default_border_details
-        bottom_border_details.append(border_details)
-    return bottom_border_details, table_border_details
+    last_row = table_obj.rows[row_index]
+    return _cells_bottom_borders(last_row.cells[cell_index:]), _table_bottom_border(table_obj)
 
 # ============================================================================
 # 统一边框处理函数
@@ -374,43 +417,32 @@ def set_table_bottom_border(table: Table, styleList: Dict[str, str]) -> None:
     set_bottom_border(table, styleList, BorderTarget.TABLE)
 
 ## 字符串替换，适用于表格单元格中的字符串/页眉页脚字符串/段落字符串
-def replace_paragraph_string(run_list: List[Run], replace_string: str) -> None:
-    """替换段落中的标签文本，保留标签前后的内容和格式
+def _tag_bounds(run_list: List[Run]) -> Optional[Tuple[int, int, int, int]]:
+    """定位 run 列表中第一个标签的位置
     
     Args:
         run_list: 包含标签的 run 列表
-        replace_string: 替换的字符串
+        
+    Returns:
+        (起始 run 下标, 标签在起始 run 中的偏移, 结束 run 下标, 标签结束在结束
+        run 中的偏移)；找不到标签时为 None
     """
-    if not run_list:
-        return
-    
-    # 处理删除段落的特殊情况
-    if replace_string == SpecialValue.DELETE_PARAGRAPH:
-        paragraph = run_list[0]._element.getparent()
-        remove_ele(paragraph)
-        return
-    
     # 收集所有 run 的文本及其累计位置
-    run_positions = []  # [(run, start_pos, end_pos), ...]
+    run_positions = []  # [(start_pos, end_pos), ...]
+    texts = [run.text for run in run_list]
     current_pos = 0
-    for run in run_list:
-        text_len = len(run.text)
-        run_positions.append((run, current_pos, current_pos + text_len))
-        current_pos += text_len
+    for text in texts:
+        run_positions.append((current_pos, current_pos + len(text)))
+        current_pos += len(text)
     
-    full_text = "".join(run.text for run in run_list)
+    full_text = "".join(texts)
     
     # 查找标签的位置
     tag_start = full_text.find(TagPrefix.TAG_START)
     tag_end = full_text.find(TagPrefix.TAG_END, tag_start)
     
     if tag_start == -1 or tag_end == -1:
-        # 如果找不到标签，使用旧的行为（向后兼容）
-        run_list[0].text = replace_string
-        for idx, run in enumerate(run_list):
-            if idx != 0:
-                run.clear()
-        return
+        return None
     
     # 计算标签的完整长度
     tag_end += len(TagPrefix.TAG_END)
@@ -419,35 +451,126 @@ def replace_paragraph_string(run_list: List[Run], replace_string: str) -> None:
     tag_start_run_idx = None
     tag_end_run_idx = None
     
-    for idx, (run, start_pos, end_pos) in enumerate(run_positions):
+    for idx, (start_pos, end_pos) in enumerate(run_positions):
         if tag_start_run_idx is None and start_pos <= tag_start < end_pos:
             tag_start_run_idx = idx
         if tag_end_run_idx is None and start_pos < tag_end <= end_pos:
             tag_end_run_idx = idx
     
-    # 如果标签在单个 run 中
-    if tag_start_run_idx == tag_end_run_idx:
-        run, start_pos, end_pos = run_positions[tag_start_run_idx]
-        # 计算标签在这个 run 中的相对位置
-        tag_start_in_run = tag_start - start_pos
-        tag_end_in_run = tag_end - start_pos
-        # 替换这个 run 中的标签
-        run.text = run.text[:tag_start_in_run] + replace_string + run.text[tag_end_in_run:]
-    else:
-        # 标签跨越多个 run
-        # 处理第一个 run：保留标签前的内容 + 替换字符串
-        first_run, first_start, first_end = run_positions[tag_start_run_idx]
-        tag_start_in_run = tag_start - first_start
-        first_run.text = first_run.text[:tag_start_in_run] + replace_string
+    return (tag_start_run_idx, tag_start - run_positions[tag_start_run_idx][0],
+            tag_end_run_idx, tag_end - run_positions[tag_end_run_idx][0])
+
+
+def _cut_tag(run_list: List[Run], bounds: Tuple[int, int, int, int], replace_string: str) -> str:
+    """将标签替换为字符串
+    
+    Args:
+        run_list: 包含标签的 run 列表
+        bounds: _tag_bounds() 的结果
+        replace_string: 替换的字符串
         
-        # 清空中间的 run
-        for idx in range(tag_start_run_idx + 1, tag_end_run_idx):
-            run_positions[idx][0].text = ""
+    Returns:
+        标签位于单个 run 中时，该 run 中标签之后的文本；否则为空字符串
+    """
+    start_idx, start_offset, end_idx, end_offset = bounds
+    first_run = run_list[start_idx]
+    
+    # 如果标签在单个 run 中
+    if start_idx == end_idx:
+        text = first_run.text
+        first_run.text = text[:start_offset] + replace_string + text[end_offset:]
+        return text[end_offset:]
+    
+    # 标签跨越多个 run
+    # 处理第一个 run：保留标签前的内容 + 替换字符串
+    first_run.text = first_run.text[:start_offset] + replace_string
+    
+    # 清空中间的 run
+    for idx in range(start_idx + 1, end_idx):
+        run_list[idx].text = ""
+    
+    # 处理最后一个 run：保留标签后的内容
+    last_run = run_list[end_idx]
+    last_run.text = last_run.text[end_offset:]
+    return ""
+
+
+def replace_paragraph_string(run_list: List[Run], replace_string: str) -> None:
+    """替换段落中的标签文本，保留标签前后的内容和格式
+    
+    Args:
+        run_list: 包含标签的 run 列表
+        replace_string: 替换的字符串
+    """
+    if not run_list:
+        return
+    
+    # 处理删除段落的特殊情况
+    if replace_string == SpecialValue.DELETE_PARAGRAPH:
+        paragraph = run_list[0]._element.getparent()
+        remove_ele(paragraph)
+        return
+    
+    bounds = _tag_bounds(run_list)
+    if bounds is None:
+        # 如果找不到标签，使用旧的行为（向后兼容）
+        run_list[0].text = replace_string
+        for idx, run in enumerate(run_list):
+            if idx != 0:
+                run.clear()
+        return
+    
+    _cut_tag(run_list, bounds, replace_string)
+
+
+def replace_paragraph_rich(run_list: List[Run], spans: Iterable[Any]) -> int:
+    """将段落中的标签替换为富文本片段，保留标签前后的内容和格式
+    
+    每个片段复制标签起始 run（含 rPr）后插入在其之后，再设置片段的文本
+    和格式；标签之后的同一 run 中的文本移到片段之后的新 run 中。标签起始
+    run 只剩空文本时删除。
+    
+    Args:
+        run_list: 包含标签的 run 列表
+        spans: 富文本片段（见 richtext.Span）
         
-        # 处理最后一个 run：保留标签后的内容
-        last_run, last_start, last_end = run_positions[tag_end_run_idx]
-        tag_end_in_run = tag_end - last_start
-        last_run.text = last_run.text[tag_end_in_run:]
+    Returns:
+        段落中 run 数的变化（新插入的 run 数减去删除的 run 数，可为负数），
+        段落中位于其后的 run 下标需相应移动
+    """
+    if not run_list:
+        return 0
+    
+    bounds = _tag_bounds(run_list)
+    if bounds is None:
+        replace_paragraph_string(run_list, "".join(span.text for span in spans))
+        return 0
+    
+    anchor = run_list[bounds[0]]
+    template = copy.deepcopy(anchor._r)
+    tail = _cut_tag(run_list, bounds, "")
+    if tail:
+        # 标签后的文本留给片段之后的新 run
+        anchor.text = anchor.text[:len(anchor.text) - len(tail)]
+    
+    previous = anchor._r
+    added = 0
+    for span in spans:
+        run = Run(copy.deepcopy(template), anchor._parent)
+        span.apply(run)
+        previous.addnext(run._r)
+        previous = run._r
+        added += 1
+    if tail:
+        run = Run(copy.deepcopy(template), anchor._parent)
+        run.text = tail
+        previous.addnext(run._r)
+        added += 1
+    if not anchor.text and all(child.tag in (_W_T, _W_RPR) for child in anchor._r):
+        # 标签前没有文本，起始 run 已无内容
+        anchor._r.getparent().remove(anchor._r)
+        added -= 1
+    return added
 
 ## 图片插入，适用于表格中的图片和段落中的图片
 def insert_picture(run_list: List[Run], tag: str, picture_path: str) -> None:
@@ -475,6 +598,19 @@ def replace_text_box_string(child_list: List[Any], replace_string: str) -> None:
     for child in child_list:
         child.text = replace_string
 
+## 图表等非 Word 部件中的字符串替换，标签需完整位于元素文本中
+def replace_xml_text_string(element: Any, tag: str, replace_string: str) -> None:
+    """替换元素文本中的一个标签
+    
+    Args:
+        element: 文本中包含标签的 XML 元素
+        tag: 标签名称
+        replace_string: 替换的字符串，删除段落的特殊值按空字符串处理
+    """
+    if replace_string == SpecialValue.DELETE_PARAGRAPH:
+        replace_string = ""
+    element.text = element.text.replace(tag, replace_string, 1)
+
 ## 表格插入，通过插入一个以tab分割的txt文件插入表格
 ### 表格初始化
 def load_table_from_file(table_file: str) -> pd.DataFrame:
@@ -520,22 +656,46 @@ def table_style_list(table: Table, rowIdx: int, cellIdx: int) -> List[List[Any]]
         style_list.append([cell.vertical_alignment, p0.style, p0.alignment, r0.bold, r0.italic, r0.underline, font.name, font.size, font.color.rgb, font.highlight_color, lineSpacingRule, spaceAfter])
     return style_list
 
+def _row_cells(table: Table, row_id: int) -> List[_Cell]:
+    """获取一行中按网格列排列的单元格
+    
+    没有合并单元格的行直接由 w:tc 创建单元格；存在横向或纵向合并时
+    退回 table.cell()，与原有的按网格定位一致。
+    
+    Args:
+        table: 表格对象
+        row_id: 行索引
+        
+    Returns:
+        单元格列表，下标为网格列号
+    """
+    tr = table._tbl.tr_lst[row_id]
+    tc_lst = tr.tc_lst
+    if len(tc_lst) == len(table._tbl.tblGrid.gridCol_lst) and all(
+            tc.grid_span == 1 and tc.vMerge is None for tc in tc_lst):
+        return [_Cell(tc, table) for tc in tc_lst]
+    return [table.cell(row_id, co) for co in range(len(table._tbl.tblGrid.gridCol_lst))]
+
+
 ### 表格内容填充及调整格式
 def fill_table_text_and_style(
     table: Table, 
     row_id: int, 
-    fill_table_id: pd.DataFrame, 
+    fill_table_id: Union[pd.DataFrame, TableSource], 
     fill_cell_id: int, 
     fill_row_id: int, 
     fill_col_id: int, 
     style_list: List[List[Any]]
 ) -> None:
-    start = 0
+    rows = load_table_source(fill_table_id).iter_rows()
     run_row = row_id
     while row_id <= fill_row_id + run_row - 1:
+        values = next(rows)
+        # 每行只定位一次单元格，table.cell() 每次调用都会重建整张表的网格
+        cells = _row_cells(table, row_id)
         for co in range(fill_col_id):
-            tc = table.cell(row_id, co + fill_cell_id)
-            tc.text = str(fill_table_id.iloc[start, co]).replace("\\x0a", "\n")
+            tc = cells[co + fill_cell_id]
+            tc.text = values[co]
             tc.vertical_alignment = style_list[co][0]
             tc.paragraphs[0].style = style_list[co][1]
             tc.paragraphs[0].alignment = style_list[co][2]
@@ -552,7 +712,6 @@ def fill_table_text_and_style(
             r.font.color.rgb = style_list[co][8]
             r.font.highlight_color = style_list[co][9]
 
-        start += 1
         row_id += 1
 
 # ============================================================================
@@ -590,14 +749,16 @@ def _is_row_empty(row: _Row) -> bool:
     return True
 
 
-def _remove_empty_rows(table: Table) -> None:
-    """删除表格中的所有空行（优化版）
+def _remove_empty_rows(table: Table, start_row: int = 0) -> None:
+    """删除表格中的空行（优化版）
     
     Args:
         table: 表格对象
+        start_row: 从该行开始检查，之前的行保持不变
     """
-    # 先收集所有空行，避免在遍历时修改
-    empty_rows = [row for row in table.rows if _is_row_empty(row)]
+    # 先收集所有空行，避免在遍历时修改；有文本的行直接由 XML 文本判断
+    empty_rows = [row for row in table.rows[start_row:]
+                  if not _fast_text(row._tr).strip() and _is_row_empty(row)]
     
     # 删除收集到的空行
     for row in empty_rows:
@@ -628,41 +789,81 @@ def _apply_border_to_cells(
 
 
 ### 表格插入
-def fill_table(table: Table, row_id: int, cell_id: int, insertTable: str) -> None:
-    tableToFill = load_table_from_file(insertTable)
-    rowToFill = tableToFill.shape[0]
-    columnToFill = tableToFill.shape[1]
+def fill_table(table: Table, row_id: int, cell_id: int, insertTable: Any) -> None:
+    # insertTable 可为 tab 分隔文本/Parquet/Arrow IPC 文件路径、DataFrame 或 pyarrow 表
+    fill_table_group(table, [(row_id, cell_id, insertTable)])
+
+
+def fill_table_group(table: Table, fills: List[Tuple[int, int, Any]]) -> None:
+    """向同一表格一次性填充多个 TABLE 标签
+    
+    各标签的格式与边框样式均从填充前的表格读取，全部内容填充完成后
+    只删除一次空行（从最靠上的标签行到表尾）、只设置一次表格底线。
     
-    # 如果表格文件为空，直接返回，不做任何处理
-    if rowToFill == 0 or columnToFill == 0:
+    Args:
+        table: 表格对象
+        fills: [(标签行号, 标签列号, 表格数据), ...]，按文档顺序
+    """
+    jobs = []
+    for row_id, cell_id, insertTable in fills:
+        tableToFill = load_table_source(insertTable)
+        rowToFill, columnToFill = tableToFill.shape
+        # 如果表格文件为空，不做任何处理
+        if rowToFill == 0 or columnToFill == 0:
+            continue
+        jobs.append((row_id, cell_id, tableToFill, rowToFill, columnToFill))
+    if not jobs:
         return
 
-    # 格式刷
-    styleList = table_style_list(table, row_id, cell_id)
+    # 表格底线只读取一次
+    tableBottomStyle = _table_bottom_border(table)
+    lastRowCells = table.rows[-1].cells
 
-    # 获得标签行及最后一行的底边样式
-    tagBottomStyle, tagTableStyle = get_table_bottom_border_details(table, row_id, cell_id)
-    lastLineBottomStyle, lastLineTableStyle = get_table_bottom_border_details(table, -1, cell_id)
+    styles = []
+    for row_id, cell_id, _, _, _ in jobs:
+        # 格式刷
+        styleList = table_style_list(table, row_id, cell_id)
+        # 获得标签行及最后一行的底边样式
+        tagBottomStyle = _cells_bottom_borders(table.rows[row_id].cells[cell_id:])
+        lastLineBottomStyle = _cells_bottom_borders(lastRowCells[cell_id:])
+        styles.append((styleList, tagBottomStyle, lastLineBottomStyle))
 
-    # 将当前的最后一行的底边样式先处理为正常格式
-    current_last_line = table.rows[-1].cells[cell_id:]
-    _apply_border_to_cells(current_last_line, tagBottomStyle, tagTableStyle)
+    for (row_id, cell_id, tableToFill, rowToFill, columnToFill), (styleList, tagBottomStyle, _) in zip(jobs, styles):
+        # 将当前的最后一行的底边样式先处理为正常格式
+        current_last_line = table.rows[-1].cells[cell_id:]
+        _apply_border_to_cells(current_last_line, tagBottomStyle, tableBottomStyle)
 
-    # 确保表格有足够的行数
-    _ensure_table_rows(table, row_id, rowToFill)
+        # 确保表格有足够的行数
+        _ensure_table_rows(table, row_id, rowToFill)
 
-    # 填充内容
-    fill_table_text_and_style(table, row_id, tableToFill, cell_id, rowToFill, columnToFill, styleList)
-    
-    # 删除空行
-    _remove_empty_rows(table)
+        # 填充内容
+        fill_table_text_and_style(table, row_id, tableToFill, cell_id, rowToFill, columnToFill, styleList)
+
+    # 删除空行，只检查填充影响到的行
+    _remove_empty_rows(table, min(job[0] for job in jobs))
 
     # 处理表格的边框底线样式
-    set_table_bottom_border(table, lastLineTableStyle)
+    set_table_bottom_border(table, tableBottomStyle)
 
     # 处理此时最后一行的边框底线样式
-    new_last_line = table.rows[-1].cells[cell_id:]
-    _apply_border_to_cells(new_last_line, lastLineBottomStyle, lastLineTableStyle)
+    new_last_row = table.rows[-1].cells
+    for (_, cell_id, _, _, _), (_, _, lastLineBottomStyle) in zip(jobs, styles):
+        _apply_border_to_cells(new_last_row[cell_id:], lastLineBottomStyle, tableBottomStyle)
+
+
+def fill_table_locations(fills: Iterable[Tuple[TableLocation, Any]]) -> None:
+    """按表格分组填充 TABLE 标签
+    
+    Args:
+        fills: [(TableLocation, 表格数据), ...]，按文档顺序
+    """
+    groups: Dict[Any, List[Tuple[TableLocation, Any]]] = {}
+    for location, value in fills:
+        groups.setdefault(location.element, []).append((location, value))
+    for items in groups.values():
+        fill_table_group(items[0][0].table(),
+                         [(location.row, location.col, value) for location, value in items])
+
 
 ### 删除元素
 def remove_ele(ele: Any) -> None:
@@ -680,6 +881,86 @@ def remove_ele(ele: Any) -> None:
         parent = ele._element.getparent()
         parent.remove(ele._element)
 
+# 条件区间
+_FALSE_STRINGS = frozenset(["", "0", "false", "no", "off", "none"])
+
+
+def condition_holds(value: Any) -> bool:
+    """判断条件区间的值是否为真
+
+    布尔值直接使用；字符串（如 CSV 记录中的值）"", "0", "false", "no",
+    "off", "none"（不区分大小写）为假，其余为真。
+    """
+    if isinstance(value, str):
+        return value.strip().lower() not in _FALSE_STRINGS
+    return bool(value)
+
+
+def remove_range(location: RangeLocation, keep: bool) -> None:
+    """处理条件区间
+
+    起止标签所在的段落总是删除，因此起止标签应单独成段。
+
+    Args:
+        location: 条件区间位置
+        keep: 为 True 时保留区间内容，只删除起止段落；否则删除整个区间
+    """
+    parent = location.element.getparent()
+    if parent is None:
+        # 已随外层区间删除
+        return
+    elements = location.elements() if not keep else list(dict.fromkeys([location.element, location.end]))
+    for element in elements:
+        parent.remove(element)
+    # 单元格中至少需要保留一个段落
+    if parent.tag == _W_TC and parent.find(_W_P) is None:
+        parent.append(OxmlElement("w:p"))
+
+
+# 列表展开
+def clone_paragraph(element: Any, count: int) -> List[Any]:
+    """将段落深拷贝 count 份，一次性替换原段落
+
+    段落属性（样式、编号等）随段落一起复制。count 为 0 时删除段落。
+
+    Args:
+        element: w:p 元素
+        count: 副本数
+
+    Returns:
+        按文档顺序排列的副本；段落已不在文档树中时为空列表
+    """
+    parent = element.getparent()
+    if parent is None:
+        # 已随条件区间或其他列表删除
+        return []
+    clones = [copy.deepcopy(element) for _ in range(count)]
+    index = parent.index(element)
+    parent[index:index + 1] = clones
+    # 单元格中至少需要保留一个段落
+    if parent.tag == _W_TC and parent.find(_W_P) is None:
+        parent.append(OxmlElement("w:p"))
+    return clones
+
+
+def _is_attached(location: Any) -> bool:
+    """位置的元素是否仍在所属部件的文档树中"""
+    ancestors = list(location.element.iterancestors())
+    root = ancestors[-1] if ancestors else location.element
+    return root is location.part.element
+
+
+def drop_detached(tag_dict: Dict[str, List]) -> None:
+    """从标签字典中移除已随条件区间删除的位置，这些位置不再替换
+
+    Args:
+        tag_dict: 标签字典（就地修改）
+    """
+    for tag, locations in tag_dict.items():
+        attached = [location for location in locations if _is_attached(location)]
+        if len(attached) != len(locations):
+            tag_dict[tag] = attached
+
 # 函数合并
 def word_writer(
     input_docx: str, 
@@ -718,37 +999,15 @@ def word_writer(
         - 图片尺寸单位为厘米
         - 特殊值 "#DELETETHISPARAGRAPH#" 可用于删除段落
         - 特殊值 "#DELETETHISTABLE#" 可用于删除表格
+        - 条件区间 "#[IF-名称]#" … "#[/IF-名称]#" 的值为假时删除整个区间
         
     Since:
         v1.0.0
     """
+    # 与 ContentReplacer 共用同一套标签处理器（延迟导入以避免循环依赖）
+    from .core import ContentReplacer
     template = Document(input_docx)
-    template_tag_dict = search_template_tag(template)
-
-    for tag_key in replace_dict:
-        if not tag_key in template_tag_dict:
-            if logs:
-                print(LogMessage.MISSING_TAG + tag_key)
-        else:
-            if logs:
-                print(LogMessage.FILLING_TAG + tag_key)
-            if TagPrefix.TABLE in tag_key:
-                if replace_dict[tag_key] == SpecialValue.DELETE_TABLE:
-                    for tag_item in template_tag_dict[tag_key]:
-                        table_id = tag_item[0]
-                        remove_ele(table_id)
-                else:
-                    for tag_item in template_tag_dict[tag_key]:
-                        fill_table(tag_item[0], tag_item[1], tag_item[2], replace_dict[tag_key])
-            elif TagPrefix.TEXTBOX in tag_key:
-                for tag_item in template_tag_dict[tag_key]:
-                    replace_text_box_string(tag_item, replace_dict[tag_key])
-            elif TagPrefix.IMAGE in tag_key or TagPrefix.TABLE_IMAGE in tag_key:
-                for tag_item in template_tag_dict[tag_key]:
-                    insert_picture(tag_item[1], tag_key, replace_dict[tag_key])
-            else:
-                for tag_item in template_tag_dict[tag_key]:
-                    replace_paragraph_string(tag_item[1], replace_dict[tag_key])
+    ContentReplacer(template, search_template_tag(template)).replace_all(replace_dict, logs)
     template.save(output_docx)
 
 # 合并内容相同的行，这些行需要是排好序的
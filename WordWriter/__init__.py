@@ -2,7 +2,20 @@
 # v4.0.0 新的面向对象 API（推荐使用）
 # ============================================================================
 from .core import WordWriter as WordWriterClass
-from .core import TagSearcher, ContentReplacer
+from .core import TagSearcher, ContentReplacer, SharedTemplate
+from .locations import TagLocation, TextLocation, ImageLocation, TableLocation, TextboxLocation
+from .locations import XmlTextLocation, RangeLocation
+from .batch import run_batch, read_records, BatchResult, PrewarmedPool
+from .archive import ArchiveWriter, read_member
+from .cache import RenderCache, MemoryCache, DiskCache
+from .sources import TableSource, DataFrameSource, ArrowSource, SharedTables, load_table_source
+from .lazy import load_document
+from .deterministic import save_deterministic
+from .normalize import normalize_document, normalize_template
+from .richtext import RichText, parse_markup
+from .profiling import MemoryProfiler, MemoryReport
+from .handlers import TagHandler, HandlerRegistry, ReplaceContext, registry, register_handler
+from .plan import RenderPlan, PlanStep, PlanIssue, PlanValidationError, InputValidator
 
 # ============================================================================
 # 函数式 API（向后兼容）
@@ -30,6 +43,66 @@ __all__ = [
     'WordWriterClass',
     'TagSearcher',
     'ContentReplacer',
+    'SharedTemplate',
+    
+    # 标签位置
+    'TagLocation',
+    'TextLocation',
+    'ImageLocation',
+    'TableLocation',
+    'TextboxLocation',
+    'XmlTextLocation',
+    'RangeLocation',
+    
+    # 批量渲染
+    'run_batch',
+    'read_records',
+    'BatchResult',
+    'PrewarmedPool',
+    'ArchiveWriter',
+    'read_member',
+    
+    # 渲染缓存
+    'RenderCache',
+    'MemoryCache',
+    'DiskCache',
+    
+    # 表格数据源
+    'TableSource',
+    'DataFrameSource',
+    'ArrowSource',
+    'SharedTables',
+    'load_table_source',
+    
+    # 延迟解析
+    'load_document',
+    'save_deterministic',
+    
+    # run 规范化
+    'normalize_document',
+    'normalize_template',
+    
+    # 富文本
+    'RichText',
+    'parse_markup',
+    
+    # 内存分析
+    'MemoryProfiler',
+    'MemoryReport',
+    
+    # 标签处理器
+    'TagHandler',
+    'HandlerRegistry',
+    'ReplaceContext',
+    'registry',
+    'register_handler',
+    
+    # 渲染计划
+    'RenderPlan',
+    'PlanStep',
+    'PlanIssue',
+    'PlanValidationError',
+    'InputValidator',
     
     # 函数式 API（向后兼容）
     'word_writer',
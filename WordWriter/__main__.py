@@ -0,0 +1,8 @@
+# coding=utf-8
+"""支持 python -m WordWriter 调用命令行入口"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
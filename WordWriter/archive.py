@@ -0,0 +1,262 @@
+# coding=utf-8
+"""WordWriter 归档输出模块
+
+批量渲染大量文档时，逐个创建 .docx 文件会在网络文件系统上产生大量元数据
+操作。ArchiveWriter 将输出顺序写入单个 zip 或 tar 归档（或每 N 个文档
+一个分片），所有写入都经过缓冲、只追加不回写，并生成清单（manifest）
+记录每条记录所在的归档、成员名及数据的字节偏移，便于按偏移直接读取。
+
+zip 成员以不压缩方式（ZIP_STORED）保存：.docx 本身已是压缩包，再次压缩
+收益很小，且不压缩时清单中的偏移处就是完整的 .docx 字节。tar 归档不压缩。
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+import io
+import json
+import os
+import tarfile
+import time
+import zipfile
+from typing import IO, Any, Dict, List, Optional
+
+
+# 归档格式
+FORMAT_ZIP = "zip"
+FORMAT_TAR = "tar"
+
+# 默认写缓冲区大小
+BUFFER_SIZE = 1024 * 1024
+
+
+def archive_format(path: str) -> str:
+    """根据扩展名判断归档格式
+
+    Args:
+        path: 归档文件路径
+
+    Returns:
+        FORMAT_ZIP 或 FORMAT_TAR
+
+    Raises:
+        ValueError: 不支持的扩展名
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".zip":
+        return FORMAT_ZIP
+    if ext == ".tar":
+        return FORMAT_TAR
+    raise ValueError(f"不支持的归档格式: {path}（应为 .zip 或 .tar）")
+
+
+class _AppendOnly:
+    """只追加的文件包装：不支持 seek，zipfile 因此改用数据描述符顺序写入"""
+
+    def __init__(self, f: IO[bytes]):
+        self._f = f
+
+    def write(self, data: bytes) -> int:
+        return self._f.write(data)
+
+    def tell(self) -> int:
+        return self._f.tell()
+
+    def seek(self, *args: Any) -> int:
+        raise io.UnsupportedOperation("seek")
+
+    def flush(self) -> None:
+        self._f.flush()
+
+
+class _Shard:
+    """一个正在写入的归档文件（先写入 .part 临时文件，关闭时重命名）"""
+
+    def __init__(self, path: str, fmt: str, buffer_size: int):
+        self.path = path
+        self.fmt = fmt
+        self.count = 0
+        self._tmp_path = path + ".part"
+        self._file = open(self._tmp_path, "wb", buffering=buffer_size)
+        if fmt == FORMAT_ZIP:
+            self._archive = zipfile.ZipFile(_AppendOnly(self._file), "w", zipfile.ZIP_STORED,
+                                            allowZip64=True)
+        else:
+            self._archive = tarfile.open(fileobj=_AppendOnly(self._file), mode="w|",
+                                         format=tarfile.PAX_FORMAT)
+
+    def add(self, name: str, data: bytes) -> int:
+        """写入一个成员
+
+        Returns:
+            成员数据在归档文件中的字节偏移
+        """
+        self.count += 1
+        if self.fmt == FORMAT_ZIP:
+            info = zipfile.ZipInfo(name, time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            info.external_attr = 0o644 << 16
+            self._archive.writestr(info, data)
+            zip64 = len(data) * 1.05 > zipfile.ZIP64_LIMIT
+            return info.header_offset + len(info.FileHeader(zip64))
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self._archive.addfile(info, io.BytesIO(data))
+        # 成员数据按 512 字节块对齐，写入后 offset 指向数据块之后
+        blocks = -(-len(data) // tarfile.BLOCKSIZE)
+        return self._archive.offset - blocks * tarfile.BLOCKSIZE
+
+    def close(self, keep: bool = True) -> None:
+        """结束写入；keep 为 False 时丢弃临时文件"""
+        try:
+            self._archive.close()
+            self._file.close()
+            if keep:
+                os.replace(self._tmp_path, self.path)
+        finally:
+            self._file.close()
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+
+class ArchiveWriter:
+    """顺序写入的归档输出
+
+    shard_size 大于 0 时每写满 shard_size 个文档换一个分片，分片文件名在
+    扩展名前加五位序号（out.zip -> out-00000.zip、out-00001.zip ...）。
+    清单为 JSON Lines 文件（默认 out.manifest.jsonl），每行对应一个成员：
+    {"id", "archive", "member", "offset", "size"}，其中 archive 为分片文件名，
+    offset 为成员数据（完整的 .docx 字节）在分片文件中的偏移。
+
+    Attributes:
+        path: 归档路径（分片时作为文件名模板）
+        fmt: 归档格式（FORMAT_ZIP/FORMAT_TAR）
+        shard_size: 每个分片的文档数，0 表示不分片
+        manifest_path: 清单文件路径
+        manifest: 已写入成员的清单条目
+        paths: 已完成的归档文件路径
+
+    Example:
+        >>> with ArchiveWriter("out/reports.zip", shard_size=10000) as archive:
+        ...     for i, record in enumerate(records):
+        ...         archive.add(f"{i}.docx", writer.render(record), record_id=i)
+    """
+
+    def __init__(self, path: str, shard_size: int = 0, fmt: Optional[str] = None,
+                 manifest_path: Optional[str] = None, buffer_size: int = BUFFER_SIZE):
+        """初始化
+
+        Args:
+            path: 归档文件路径（.zip 或 .tar）
+            shard_size: 每个分片的文档数，0 表示全部写入一个归档
+            fmt: 归档格式，默认根据扩展名判断
+            manifest_path: 清单文件路径，默认与归档同名、扩展名为 .manifest.jsonl
+            buffer_size: 写缓冲区大小（字节）
+
+        Raises:
+            ValueError: 不支持的归档格式
+        """
+        self.path = path
+        self.fmt = fmt or archive_format(path)
+        if self.fmt not in (FORMAT_ZIP, FORMAT_TAR):
+            raise ValueError(f"不支持的归档格式: {self.fmt}")
+        self.shard_size = max(0, shard_size)
+        self.manifest_path = manifest_path or os.path.splitext(path)[0] + ".manifest.jsonl"
+        self.buffer_size = buffer_size
+        self.manifest: List[Dict[str, Any]] = []
+        self.paths: List[str] = []
+        self._shard: Optional[_Shard] = None
+        self._names: set = set()
+        out_dir = os.path.dirname(path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        self._manifest_file = open(self.manifest_path + ".part", "w", encoding="utf-8",
+                                   buffering=buffer_size)
+
+    def _shard_path(self, number: int) -> str:
+        if not self.shard_size:
+            return self.path
+        root, ext = os.path.splitext(self.path)
+        return f"{root}-{number:05d}{ext}"
+
+    def add(self, name: str, data: bytes, record_id: Any = None) -> Dict[str, Any]:
+        """写入一个文档
+
+        Args:
+            name: 成员名（归档内的相对路径）
+            data: 文档字节
+            record_id: 写入清单的记录标识，默认为写入序号
+
+        Returns:
+            清单条目
+
+        Raises:
+            ValueError: 成员名重复
+        """
+        name = name.replace(os.sep, "/")
+        if name in self._names:
+            raise ValueError(f"归档中已存在同名成员: {name}")
+        if self._shard is not None and self.shard_size and self._shard.count >= self.shard_size:
+            self._close_shard()
+        if self._shard is None:
+            self._shard = _Shard(self._shard_path(len(self.paths)), self.fmt, self.buffer_size)
+        offset = self._shard.add(name, data)
+        self._names.add(name)
+        entry = {
+            "id": len(self.manifest) if record_id is None else record_id,
+            "archive": os.path.basename(self._shard.path),
+            "member": name,
+            "offset": offset,
+            "size": len(data),
+        }
+        self.manifest.append(entry)
+        self._manifest_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry
+
+    def _close_shard(self, keep: bool = True) -> None:
+        if self._shard is not None:
+            shard, self._shard = self._shard, None
+            shard.close(keep)
+            if keep:
+                self.paths.append(shard.path)
+
+    def close(self, keep: bool = True) -> None:
+        """结束写入并完成清单
+
+        Args:
+            keep: 为 False 时丢弃未完成的分片和清单（用于异常退出）
+        """
+        try:
+            self._close_shard(keep)
+        finally:
+            self._manifest_file.close()
+            if keep:
+                os.replace(self.manifest_path + ".part", self.manifest_path)
+            elif os.path.exists(self.manifest_path + ".part"):
+                os.remove(self.manifest_path + ".part")
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close(keep=exc_type is None)
+
+    def __repr__(self) -> str:
+        return f"<ArchiveWriter(path='{self.path}', fmt='{self.fmt}', members={len(self.manifest)})>"
+
+
+def read_member(entry: Dict[str, Any], directory: str = ".") -> bytes:
+    """按清单条目直接读取文档字节（一次 seek 和一次读取）
+
+    Args:
+        entry: 清单条目
+        directory: 归档文件所在目录
+
+    Returns:
+        文档字节
+    """
+    with open(os.path.join(directory, entry["archive"]), "rb") as f:
+        f.seek(entry["offset"])
+        return f.read(entry["size"])
@@ -0,0 +1,727 @@
+# coding=utf-8
+"""WordWriter 批量渲染模块
+
+此模块在 WordWriter 类的基础上提供批量渲染能力：从 JSONL/CSV 文件读取
+记录，按输出文件名模板逐条调用 WordWriter.process 生成文档，支持多进程
+并行、断点续跑（跳过已存在的输出）以及失败汇总。输出也可以顺序写入
+zip/tar 归档（见 ArchiveWriter），避免大量小文件的创建开销。
+
+在 Linux 上还可以使用 fork 预热进程池（PrewarmedPool）：父进程只加载并
+索引一次模板，子进程通过写时复制共享已解析的文档树，从共享快照恢复后渲染。
+被多条记录引用的表格文件只解析一次，以内存映射文件共享给各工作进程。
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+import csv
+import gc
+import io
+import json
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .core import WordWriter
+from .archive import ArchiveWriter
+from .cache import RenderCache, cached_render
+from .constants import TagPrefix
+from .plan import InputValidator
+from .sources import SharedTables, install_shared_tables
+
+
+# ============================================================================
+# 记录读取
+# ============================================================================
+
+def read_records(records_path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """读取批量记录文件
+
+    Args:
+        records_path: 记录文件路径，支持 JSONL（每行一个 JSON 对象）和 CSV（首行为表头）
+        fmt: 文件格式，"jsonl" 或 "csv"；为 None 时根据扩展名判断
+
+    Yields:
+        每条记录的字典
+
+    Raises:
+        ValueError: 无法识别的文件格式或 JSONL 行不是对象
+    """
+    if fmt is None:
+        ext = os.path.splitext(records_path)[1].lower()
+        fmt = "csv" if ext in (".csv", ".tsv") else "jsonl" if ext in (".jsonl", ".json", ".ndjson") else None
+    if fmt == "csv":
+        delimiter = "\t" if records_path.lower().endswith(".tsv") else ","
+        with open(records_path, "r", encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f, delimiter=delimiter):
+                yield dict(row)
+    elif fmt == "jsonl":
+        with open(records_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError(f"第 {line_no} 行不是 JSON 对象: {records_path}")
+                yield record
+    else:
+        raise ValueError(f"无法识别的记录文件格式: {records_path}")
+
+
+def split_record(record: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """将记录拆分为替换字典和命名字段
+
+    以 "#[" 开头的键视为标签，其余键作为输出文件名模板中的字段。
+
+    Args:
+        record: 单条记录
+
+    Returns:
+        (replace_dict, fields)
+    """
+    replace_dict = {}
+    fields = {}
+    for key, value in record.items():
+        if key.startswith(TagPrefix.TAG_START):
+            replace_dict[key] = value
+        else:
+            fields[key] = value
+    return replace_dict, fields
+
+
+def format_output_path(pattern: str, index: int, fields: Dict[str, Any]) -> str:
+    """根据输出文件名模板生成输出路径
+
+    Args:
+        pattern: 文件名模板，如 "out/{index}.docx" 或 "out/{name}.docx"
+        index: 记录序号（从 0 开始）
+        fields: 记录中的非标签字段
+
+    Returns:
+        输出文件路径
+
+    Raises:
+        KeyError: 模板中引用了记录中不存在的字段
+    """
+    return pattern.format(index=index, **fields)
+
+
+# ============================================================================
+# 批量渲染
+# ============================================================================
+
+class BatchJob:
+    """单条渲染任务
+
+    Attributes:
+        index: 记录序号
+        output_path: 输出文件路径
+        replace_dict: 替换字典
+    """
+
+    __slots__ = ("index", "output_path", "replace_dict")
+
+    def __init__(self, index: int, output_path: str, replace_dict: Dict[str, Any]):
+        self.index = index
+        self.output_path = output_path
+        self.replace_dict = replace_dict
+
+
+class BatchResult:
+    """批量渲染结果
+
+    Attributes:
+        total: 记录总数
+        succeeded: 成功渲染的数量
+        skipped: 因输出已存在而跳过的数量
+        failures: 失败列表，每项为 {"index", "output", "error"}
+        elapsed: 总耗时（秒）
+        worker_memory: 内存测量结果 {pid: {"rss", "pss", "uss"}}（字节），仅在开启测量时填充
+        archives: 归档输出时写入的归档文件路径
+        manifest: 归档输出时的清单文件路径
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.succeeded = 0
+        self.skipped = 0
+        self.failures: List[Dict[str, Any]] = []
+        self.elapsed = 0.0
+        self.worker_memory: Dict[Any, Dict[str, int]] = {}
+        self.archives: List[str] = []
+        self.manifest: Optional[str] = None
+
+    @property
+    def failed(self) -> int:
+        """失败数量"""
+        return len(self.failures)
+
+    @property
+    def docs_per_sec(self) -> float:
+        """渲染吞吐量（文档/秒），不计跳过的记录"""
+        return self.succeeded / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def ok(self) -> bool:
+        """是否全部成功"""
+        return not self.failures
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可 JSON 序列化的字典"""
+        return {
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "elapsed": round(self.elapsed, 3),
+            "docs_per_sec": round(self.docs_per_sec, 3),
+            "failures": self.failures,
+            "worker_memory": {str(pid): mem for pid, mem in self.worker_memory.items()},
+            "archives": self.archives,
+            "manifest": self.manifest,
+        }
+
+    def __repr__(self) -> str:
+        return (f"<BatchResult(total={self.total}, succeeded={self.succeeded}, "
+                f"skipped={self.skipped}, failed={self.failed})>")
+
+
+def _write_atomic(output_path: str, write: Callable[[str], None]) -> None:
+    """先写入临时文件再原子重命名，保证中断后不会留下被误认为已完成的残缺输出
+
+    Args:
+        output_path: 最终输出路径
+        write: 写入函数，接收临时文件路径
+    """
+    out_dir = os.path.dirname(output_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    tmp_path = output_path + ".part"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _render_job(template_path: str, output_path: str, replace_dict: Dict[str, Any],
+                cache: Optional[RenderCache] = None, deterministic: bool = False,
+                normalize: bool = False) -> None:
+    """渲染单条记录（可在子进程中执行）"""
+    _write_atomic(output_path, lambda tmp_path: WordWriter.process(
+        template_path, tmp_path, replace_dict, logs=False, cache=cache,
+        deterministic=deterministic, normalize=normalize))
+
+
+def _render_bytes(template_path: str, replace_dict: Dict[str, Any],
+                  cache: Optional[RenderCache] = None, writer: Optional[WordWriter] = None,
+                  deterministic: bool = False, normalize: bool = False) -> bytes:
+    """渲染单条记录并返回 .docx 字节（可在子进程中执行）
+
+    Args:
+        template_path: 模板文件路径
+        replace_dict: 替换字典
+        cache: 可选的渲染缓存
+        writer: 已加载的 WordWriter，提供时通过 render() 从快照恢复后渲染，
+            不再重新加载模板（此时按 writer 自身的 deterministic 设置保存）
+        deterministic: 未提供 writer 时是否以确定性方式保存
+        normalize: 未提供 writer 时是否在搜索标签前规范化 run
+    """
+    def _render(stream: Any) -> None:
+        if writer is None:
+            fresh.replace(replace_dict, logs=False).save(stream)
+        else:
+            stream.write(writer.render(replace_dict))
+
+    fresh = WordWriter(template_path, deterministic=deterministic, normalize=normalize)
+    if cache is not None:
+        options = (writer or fresh).render_options
+        return cached_render(cache, template_path, replace_dict, _render, options)
+    stream = io.BytesIO()
+    _render(stream)
+    return stream.getvalue()
+
+
+def _store(archive: ArchiveWriter, job: 'BatchJob', data: bytes) -> Optional[str]:
+    """将渲染结果写入归档，成员名重复时返回错误描述"""
+    try:
+        archive.add(job.output_path, data, record_id=job.index)
+    except ValueError as e:
+        return _describe(e)
+    return None
+
+
+def build_jobs(records: Iterator[Dict[str, Any]], output_pattern: str,
+               result: BatchResult, resume: bool = False) -> List[BatchJob]:
+    """根据记录生成渲染任务列表
+
+    Args:
+        records: 记录迭代器
+        output_pattern: 输出文件名模板
+        result: 批量结果对象，用于累计总数、跳过数和命名失败
+        resume: 是否跳过已存在的输出文件
+
+    Returns:
+        待渲染任务列表
+    """
+    jobs = []
+    for index, record in enumerate(records):
+        result.total += 1
+        replace_dict, fields = split_record(record)
+        try:
+            output_path = format_output_path(output_pattern, index, fields)
+        except (KeyError, IndexError, ValueError) as e:
+            result.failures.append({"index": index, "output": None,
+                                    "error": f"输出文件名模板错误: {e!r}"})
+            continue
+        if resume and os.path.exists(output_path):
+            result.skipped += 1
+            continue
+        jobs.append(BatchJob(index, output_path, replace_dict))
+    return jobs
+
+
+def _share_tables(jobs: List[BatchJob]) -> Optional[SharedTables]:
+    """发布被多条记录引用的 TABLE 文件
+
+    未安装 pyarrow 或没有被重复引用的表格时返回 None，各文档照常读取文件。
+
+    Args:
+        jobs: 渲染任务列表
+
+    Returns:
+        SharedTables 对象或 None
+    """
+    counts: Dict[str, int] = {}
+    for job in jobs:
+        for tag, value in job.replace_dict.items():
+            if TagPrefix.TABLE in tag and isinstance(value, str) and os.path.isfile(value):
+                counts[value] = counts.get(value, 0) + 1
+    paths = [path for path, count in counts.items() if count > 1]
+    if not paths:
+        return None
+    try:
+        shared = SharedTables(paths)
+    except ImportError:
+        return None
+    if not shared.tables:
+        shared.close()
+        return None
+    return shared
+
+
+def _validate_jobs(template_path: str, jobs: List[BatchJob], tracker: '_Tracker',
+                   normalize: bool = False) -> List[BatchJob]:
+    """在分派前为每条任务生成渲染计划，未通过校验的任务直接登记为失败
+
+    模板只加载和索引一次（延迟解析），各任务共享同一个校验器，被多条记录
+    引用的图片和表格文件只校验一次。校验使用严格模式，图片文件不存在也视为
+    失败。
+
+    Args:
+        template_path: 模板文件路径
+        jobs: 渲染任务列表
+        tracker: 进度记录器
+        normalize: 是否规范化 run，与渲染时一致
+
+    Returns:
+        通过校验的任务
+    """
+    writer = WordWriter(template_path, lazy_parts=True, normalize=normalize).load()
+    validator = InputValidator()
+    valid = []
+    for job in jobs:
+        try:
+            plan = writer.plan(job.replace_dict, strict=True, validator=validator)
+        except Exception as e:
+            tracker.finish(job, _describe(e))
+            continue
+        if plan.ok:
+            valid.append(job)
+        else:
+            tracker.finish(job, "; ".join(str(issue) for issue in plan.errors))
+    return valid
+
+
+class _Tracker:
+    """记录每条任务的完成情况并回调进度"""
+
+    def __init__(self, result: BatchResult, pending: int,
+                 progress: Optional[Callable[[int, int, BatchResult], None]]):
+        self.result = result
+        self.pending = pending
+        self.progress = progress
+        self.done = 0
+        self.start = time.perf_counter()
+
+    def finish(self, job: BatchJob, error: Optional[str]) -> None:
+        """登记一条任务完成，error 为 None 表示成功"""
+        self.done += 1
+        if error is None:
+            self.result.succeeded += 1
+        else:
+            self.result.failures.append({"index": job.index, "output": job.output_path,
+                                         "error": error})
+        self.result.elapsed = time.perf_counter() - self.start
+        if self.progress is not None:
+            self.progress(self.done, self.pending, self.result)
+
+    def close(self) -> BatchResult:
+        """结束计时并返回结果"""
+        self.result.failures.sort(key=lambda item: item["index"])
+        self.result.elapsed = time.perf_counter() - self.start
+        return self.result
+
+
+def _describe(error: BaseException) -> str:
+    """格式化异常描述"""
+    return f"{type(error).__name__}: {error}"
+
+
+def run_batch(
+    template_path: str,
+    records: Iterator[Dict[str, Any]],
+    output_pattern: str,
+    jobs: int = 1,
+    resume: bool = False,
+    progress: Optional[Callable[[int, int, BatchResult], None]] = None,
+    prewarm: bool = False,
+    measure_memory: bool = False,
+    cache: Optional[RenderCache] = None,
+    share_tables: bool = True,
+    validate: bool = False,
+    archive: Optional[str] = None,
+    shard_size: int = 0,
+    deterministic: bool = False,
+    normalize: bool = False,
+) -> BatchResult:
+    """批量渲染记录
+
+    Args:
+        template_path: 模板文件路径
+        records: 记录迭代器，每条记录中以 "#[" 开头的键为标签
+        output_pattern: 输出文件名模板，可使用 {index} 及记录中的非标签字段
+        jobs: 并行进程数，1 表示在当前进程中串行渲染
+        resume: 为 True 时跳过已存在的输出文件
+        progress: 进度回调 progress(done, pending_total, result)，每完成一条调用一次
+        prewarm: 为 True 且平台支持 fork 时，使用 PrewarmedPool 在父进程中预加载模板
+        measure_memory: 为 True 时在结果中记录各工作进程的 RSS/PSS/USS（仅 prewarm 模式）
+        cache: 可选的渲染缓存；多进程时缓存对象需传给工作进程，应使用
+            DiskCache 以便在进程间共享（MemoryCache 含线程锁，无法传递）
+        share_tables: 为 True 且安装了 pyarrow 时，被多条记录引用的 TABLE 文件
+            只解析一次，以内存映射的 Arrow 文件在所有工作进程间共享（见 SharedTables）
+        validate: 为 True 时在渲染前校验所有记录（见 WordWriter.plan，严格模式），
+            未通过的记录不渲染，错误记入 failures
+        archive: 归档路径（.zip 或 .tar）；提供时不再逐个创建文件，所有输出由当前
+            进程顺序写入归档，output_pattern 生成的是归档内的成员名，并生成
+            记录序号到成员名及字节偏移的清单（见 ArchiveWriter）
+        shard_size: 与 archive 一起使用，每个归档分片的文档数，0 表示不分片
+        deterministic: 为 True 时以确定性方式保存，相同记录得到完全相同的字节
+            （见 save_deterministic），便于按内容哈希去重
+        normalize: 为 True 时加载模板后先规范化 run（见 normalize_document）
+
+    Returns:
+        BatchResult 对象
+
+    Raises:
+        FileNotFoundError: 模板文件不存在
+        ValueError: 归档输出与 resume 同时使用，或多进程渲染时缓存无法传给工作进程
+
+    Example:
+        >>> from WordWriter.batch import read_records, run_batch
+        >>> result = run_batch("template.docx", read_records("records.jsonl"),
+        ...                    "out/{index}.docx", jobs=4, resume=True)
+        >>> print(result.docs_per_sec)
+    """
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"模板文件不存在: {template_path}")
+    if archive and resume:
+        raise ValueError("归档输出不支持 resume")
+    if cache is not None and jobs > 1 and not (prewarm and fork_available()):
+        # ProcessPoolExecutor 以 pickle 传递参数，fork 预热进程池直接继承缓存对象
+        try:
+            pickle.dumps(cache)
+        except Exception as e:
+            raise ValueError(f"多进程渲染时缓存需传给工作进程，{type(cache).__name__} 无法序列化"
+                             f"（{e}），请使用 DiskCache") from None
+
+    result = BatchResult()
+    pending = build_jobs(records, output_pattern, result, resume)
+    tracker = _Tracker(result, len(pending), progress)
+    if validate:
+        pending = _validate_jobs(template_path, pending, tracker, normalize)
+
+    shared = _share_tables(pending) if share_tables else None
+    sink = ArchiveWriter(archive, shard_size) if archive else None
+    try:
+        if shared is not None:
+            # 在 fork 之前启用，预热进程池与串行渲染直接继承
+            shared.install()
+        if prewarm and fork_available():
+            with PrewarmedPool([template_path], jobs=jobs, measure_memory=measure_memory,
+                               cache=cache, deterministic=deterministic, normalize=normalize) as pool:
+                pool.render(template_path, pending, tracker, archive=sink)
+        elif jobs <= 1:
+            # 归档输出时复用同一个已加载的模板，每条记录从快照恢复
+            writer = (WordWriter(template_path, deterministic=deterministic, normalize=normalize)
+                      if sink is not None else None)
+            for job in pending:
+                try:
+                    if sink is None:
+                        _render_job(template_path, job.output_path, job.replace_dict, cache,
+                                    deterministic, normalize)
+                        error = None
+                    else:
+                        data = _render_bytes(template_path, job.replace_dict, cache, writer)
+                        error = _store(sink, job, data)
+                except Exception as e:
+                    tracker.finish(job, _describe(e))
+                else:
+                    tracker.finish(job, error)
+        else:
+            tables = shared.tables if shared is not None else {}
+            with ProcessPoolExecutor(max_workers=jobs, initializer=install_shared_tables,
+                                     initargs=(tables,)) as executor:
+                if sink is None:
+                    futures = {
+                        executor.submit(_render_job, template_path, job.output_path, job.replace_dict,
+                                        cache, deterministic, normalize): job
+                        for job in pending
+                    }
+                else:
+                    futures = {
+                        executor.submit(_render_bytes, template_path, job.replace_dict, cache,
+                                        None, deterministic, normalize): job
+                        for job in pending
+                    }
+                for future in as_completed(futures):
+                    job = futures[future]
+                    error = future.exception()
+                    if error is not None:
+                        tracker.finish(job, _describe(error))
+                    elif sink is not None:
+                        # 工作进程只返回字节，归档由当前进程按完成顺序写入
+                        tracker.finish(job, _store(sink, job, future.result()))
+                    else:
+                        tracker.finish(job, None)
+    except BaseException:
+        if sink is not None:
+            sink.close(keep=False)
+            sink = None
+        raise
+    finally:
+        if shared is not None:
+            shared.close()
+        if sink is not None:
+            sink.close()
+            result.archives = list(sink.paths)
+            result.manifest = sink.manifest_path
+
+    return tracker.close()
+
+
+# ============================================================================
+# fork 预热进程池
+# ============================================================================
+
+# 父进程在 fork 之前填充，子进程通过写时复制继承 {template_path: WordWriter}
+_PREWARMED: Dict[str, WordWriter] = {}
+_MEASURE_MEMORY = False
+_CACHE: Optional[RenderCache] = None
+
+
+def fork_available() -> bool:
+    """当前平台是否支持 fork 启动方式"""
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def read_process_memory() -> Dict[str, int]:
+    """读取当前进程的内存占用（仅 Linux）
+
+    USS 为进程独占的页（Private_Clean + Private_Dirty），即写时复制共享之外
+    真正属于该进程的内存；PSS 按共享进程数分摊共享页。
+
+    Returns:
+        {"rss", "pss", "uss"}（字节），无法读取时返回空字典
+    """
+    fields = {"Rss": 0, "Pss": 0, "Private_Clean": 0, "Private_Dirty": 0}
+    for path in ("/proc/self/smaps_rollup", "/proc/self/smaps"):
+        try:
+            with open(path, "r") as f:
+                for line in f:
+                    key, _, rest = line.partition(":")
+                    if key in fields:
+                        fields[key] += int(rest.split()[0]) * 1024
+        except (OSError, ValueError):
+            continue
+        return {
+            "rss": fields["Rss"],
+            "pss": fields["Pss"],
+            "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+        }
+    return {}
+
+
+def _prewarmed_job(args: Tuple[str, int, Optional[str], Dict[str, Any]]
+                   ) -> Tuple[int, Optional[str], int, Dict[str, int], Optional[bytes]]:
+    """子进程任务：从继承的原型快照恢复后渲染
+
+    output_path 为 None 时不写文件，而是返回渲染结果（归档输出）。
+
+    Returns:
+        (index, error, pid, memory, data)
+    """
+    template_path, index, output_path, replace_dict = args
+    error = None
+    data = None
+    def _render(stream: Any) -> None:
+        stream.write(_PREWARMED[template_path].render(replace_dict))
+
+    def _write(tmp_path: str) -> None:
+        if _CACHE is None:
+            data = _PREWARMED[template_path].render(replace_dict)
+        else:
+            data = cached_render(_CACHE, template_path, replace_dict, _render,
+                                 _PREWARMED[template_path].render_options)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+    try:
+        if output_path is None:
+            data = _render_bytes(template_path, replace_dict, _CACHE, _PREWARMED[template_path])
+        else:
+            _write_atomic(output_path, _write)
+    except Exception as e:
+        error = _describe(e)
+    memory = read_process_memory() if _MEASURE_MEMORY else {}
+    return index, error, os.getpid(), memory, data
+
+
+class PrewarmedPool:
+    """fork 预热进程池
+
+    在父进程中对每个模板执行一次 Document(...) 解析和 TagSearcher.search_all()
+    索引并建立快照，然后以 fork 方式启动工作进程。子进程继承已解析的文档树和
+    快照（写时复制），每条记录通过 WordWriter.render() 从共享快照恢复后渲染，
+    不再重复解析模板或搜索标签。
+
+    仅在支持 fork 的平台（Linux/macOS）上可用。
+
+    Attributes:
+        templates: 已预加载的模板 {template_path: WordWriter}
+        jobs: 工作进程数
+        measure_memory: 是否测量各工作进程的 RSS/PSS/USS
+        cache: 可选的渲染缓存，子进程继承使用
+        deterministic: 是否以确定性方式保存
+        normalize: 预加载模板时是否规范化 run
+
+    Example:
+        >>> with PrewarmedPool(["a.docx", "b.docx"], jobs=32, measure_memory=True) as pool:
+        ...     result = pool.run("a.docx", read_records("records.jsonl"), "out/{index}.docx")
+        >>> print(result.worker_memory)
+    """
+
+    def __init__(self, template_paths: List[str], jobs: int = 1, measure_memory: bool = False,
+                 cache: Optional[RenderCache] = None, deterministic: bool = False,
+                 normalize: bool = False):
+        """初始化并预加载模板
+
+        Args:
+            template_paths: 模板文件路径列表
+            jobs: 工作进程数
+            measure_memory: 是否测量各工作进程内存
+            cache: 可选的渲染缓存
+            deterministic: 是否以确定性方式保存
+            normalize: 是否在搜索标签前规范化 run
+
+        Raises:
+            RuntimeError: 平台不支持 fork
+            FileNotFoundError: 模板文件不存在
+        """
+        if not fork_available():
+            raise RuntimeError("当前平台不支持 fork 启动方式，无法使用 PrewarmedPool")
+        self.jobs = max(1, jobs)
+        self.measure_memory = measure_memory
+        self.cache = cache
+        self.deterministic = deterministic
+        self.normalize = normalize
+        self.templates: Dict[str, WordWriter] = {}
+        for path in template_paths:
+            writer = WordWriter(path, deterministic=deterministic, normalize=normalize).load()
+            writer._ensure_snapshot()
+            self.templates[path] = writer
+        self._pool = None
+
+    def __enter__(self) -> 'PrewarmedPool':
+        global _MEASURE_MEMORY, _CACHE
+        _PREWARMED.clear()
+        _PREWARMED.update(self.templates)
+        _MEASURE_MEMORY = self.measure_memory
+        _CACHE = self.cache
+        # 冻结已有对象，避免子进程的垃圾回收触碰共享页而触发复制
+        if hasattr(gc, "freeze"):
+            gc.collect()
+            gc.freeze()
+        self._pool = multiprocessing.get_context("fork").Pool(self.jobs)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self._pool is not None:
+            self._pool.terminate() if exc_type is not None else self._pool.close()
+            self._pool.join()
+            self._pool = None
+        global _CACHE
+        if hasattr(gc, "unfreeze"):
+            gc.unfreeze()
+        _PREWARMED.clear()
+        _CACHE = None
+
+    def render(self, template_path: str, jobs: List[BatchJob], tracker: _Tracker,
+               archive: Optional[ArchiveWriter] = None) -> None:
+        """在工作进程中渲染任务列表
+
+        Args:
+            template_path: 已预加载的模板路径
+            jobs: 渲染任务列表
+            tracker: 完成情况记录器，开启测量时向其结果写入 worker_memory
+            archive: 归档输出；提供时工作进程返回字节，由当前进程顺序写入归档
+
+        Raises:
+            RuntimeError: 进程池未启动
+            KeyError: 模板未预加载
+        """
+        if self._pool is None:
+            raise RuntimeError("进程池未启动，请在 with 语句中使用 PrewarmedPool")
+        if template_path not in self.templates:
+            raise KeyError(f"模板未预加载: {template_path}")
+
+        by_index = {job.index: job for job in jobs}
+        tasks = [(template_path, job.index, None if archive is not None else job.output_path,
+                  job.replace_dict) for job in jobs]
+        for index, error, pid, memory, data in self._pool.imap_unordered(_prewarmed_job, tasks):
+            if memory:
+                tracker.result.worker_memory[pid] = memory
+            if error is None and archive is not None:
+                error = _store(archive, by_index[index], data)
+            tracker.finish(by_index[index], error)
+        if self.measure_memory:
+            tracker.result.worker_memory["parent"] = read_process_memory()
+
+    def run(self, template_path: str, records: Iterator[Dict[str, Any]], output_pattern: str,
+            resume: bool = False,
+            progress: Optional[Callable[[int, int, BatchResult], None]] = None) -> BatchResult:
+        """使用预热进程池批量渲染记录（参数同 run_batch）
+
+        Returns:
+            BatchResult 对象
+        """
+        result = BatchResult()
+        pending = build_jobs(records, output_pattern, result, resume)
+        tracker = _Tracker(result, len(pending), progress)
+        self.render(template_path, pending, tracker)
+        return tracker.close()
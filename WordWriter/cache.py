@@ -0,0 +1,326 @@
+# coding=utf-8
+"""WordWriter 渲染结果缓存模块
+
+以内容寻址的方式缓存渲染输出：缓存键由模板文件内容、规范化后的替换字典、
+替换字典中（含 LIST 列表项中）引用的图片/表格文件内容、影响输出的渲染选项以及缓存格式和
+依赖库版本共同计算（SHA-256），缓存值为输出 .docx 的字节。相同输入再次渲染时直接返回缓存的字节，无需重新渲染。
+
+提供两种后端：
+- MemoryCache: 进程内 LRU 缓存
+- DiskCache: 本地目录缓存，带总容量上限，可在多进程间共享
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import docx
+from lxml import etree
+
+from .constants import TagPrefix
+from .handlers import list_items
+from .sources import load_table_source
+
+
+# ============================================================================
+# 缓存键计算
+# ============================================================================
+
+# 缓存格式版本，渲染输出的字节发生变化时递增，升级后不再返回旧的缓存
+CACHE_FORMAT = 2
+
+# 计入缓存键的版本信息：缓存格式及影响输出字节的依赖库版本
+CACHE_SALT = f"{CACHE_FORMAT}:python-docx {docx.__version__}:lxml {etree.__version__}"
+
+# 文件内容哈希缓存 {path: (mtime_ns, size, digest)}，文件未变化时不重复读取
+_file_digests: Dict[str, Tuple[int, int, str]] = {}
+_file_digests_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """计算文件内容的 SHA-256
+
+    结果按 (mtime, size) 缓存，文件未修改时直接返回上次的结果。
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        十六进制摘要
+    """
+    stat = os.stat(path)
+    with _file_digests_lock:
+        cached = _file_digests.get(path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    with _file_digests_lock:
+        _file_digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def _references_file(tag: str) -> bool:
+    """判断标签的值是否为文件路径（图片或表格）"""
+    return TagPrefix.TABLE in tag or TagPrefix.IMAGE in tag or TagPrefix.TABLE_IMAGE in tag
+
+
+def render_key(template_path: str, replace_dict: Dict[str, Any],
+               options: Optional[Dict[str, Any]] = None) -> str:
+    """计算渲染缓存键
+
+    Args:
+        template_path: 模板文件路径
+        replace_dict: 替换字典
+        options: 影响输出的渲染选项（见 WordWriter.render_options）
+
+    Returns:
+        十六进制缓存键
+    """
+    files = {}
+    replace = {}
+    for tag, value in replace_dict.items():
+        if TagPrefix.TABLE in tag and not isinstance(value, str):
+            # 内存中的表格（DataFrame、Arrow 表）按数据内容计算摘要
+            files[tag] = load_table_source(value).digest()
+            replace[tag] = type(value).__name__
+            continue
+        if _references_file(tag) and isinstance(value, str) and os.path.isfile(value):
+            files[tag] = file_digest(value)
+        elif tag.startswith(TagPrefix.LIST) and isinstance(value, (list, tuple)):
+            # 列表项中的标签同样可以引用文件（如 {"#[IMAGE-pic]#": "a.png"}）
+            for index, item in enumerate(list_items(value)):
+                if not isinstance(item, dict):
+                    continue
+                for inner, inner_value in item.items():
+                    if (_references_file(inner) and isinstance(inner_value, str)
+                            and os.path.isfile(inner_value)):
+                        files[f"{tag}[{index}]{inner}"] = file_digest(inner_value)
+        replace[tag] = value
+
+    canonical = json.dumps(
+        {"salt": CACHE_SALT, "template": file_digest(template_path), "replace": replace,
+         "files": files, "options": options or {}},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=repr,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# ============================================================================
+# 缓存后端
+# ============================================================================
+
+class RenderCache:
+    """渲染缓存后端基类
+
+    子类实现 _get/_put 即可，命中/未命中计数由基类维护。
+
+    Attributes:
+        hits: 命中次数
+        misses: 未命中次数
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取缓存，未命中时返回 None"""
+        data = self._get(key)
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """写入缓存"""
+        self._put(key, data)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def _put(self, key: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    @property
+    def hit_rate(self) -> float:
+        """命中率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}(hits={self.hits}, misses={self.misses})>"
+
+
+class MemoryCache(RenderCache):
+    """进程内 LRU 缓存
+
+    Attributes:
+        max_bytes: 缓存总字节上限
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """初始化
+
+        Args:
+            max_bytes: 缓存总字节上限，默认 256 MiB
+        """
+        super().__init__()
+        self.max_bytes = max_bytes
+        self._size = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def _put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache(RenderCache):
+    """本地目录缓存
+
+    每个条目保存为 directory/<key[:2]>/<key>.docx，写入时先写临时文件再原子
+    重命名，因此可被多个进程同时使用。超过容量上限时按最近访问时间淘汰。
+
+    Attributes:
+        directory: 缓存目录
+        max_bytes: 缓存总字节上限
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1024 * 1024 * 1024):
+        """初始化
+
+        Args:
+            directory: 缓存目录，不存在时自动创建
+            max_bytes: 缓存总字节上限，默认 1 GiB
+        """
+        super().__init__()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".docx")
+
+    def _get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def _put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        # 仅在估算总量超限时才扫描目录
+        if self._size is None or self._size + len(data) > self.max_bytes:
+            self._evict()
+        else:
+            self._size += len(data)
+
+    def _evict(self) -> None:
+        """扫描目录，超过容量上限时删除最久未访问的条目"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".docx"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        self._size = total
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._size = total
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # 传递到子进程时只需目录与容量，计数从零开始
+        return {"directory": self.directory, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["directory"], state["max_bytes"])
+
+
+# ============================================================================
+# 缓存渲染
+# ============================================================================
+
+def cached_render(cache: RenderCache, template_path: str, replace_dict: Dict[str, Any],
+                  render: Callable[[io.BytesIO], None],
+                  options: Optional[Dict[str, Any]] = None) -> bytes:
+    """通过缓存获取渲染结果
+
+    Args:
+        cache: 缓存后端
+        template_path: 模板文件路径
+        replace_dict: 替换字典
+        render: 未命中时调用的渲染函数，将 .docx 写入给定的 BytesIO
+        options: 影响输出的渲染选项，计入缓存键
+
+    Returns:
+        输出 .docx 的字节
+    """
+    key = render_key(template_path, replace_dict, options)
+    data = cache.get(key)
+    if data is None:
+        stream = io.BytesIO()
+        render(stream)
+        data = stream.getvalue()
+        cache.put(key, data)
+    return data
@@ -0,0 +1,147 @@
+# coding=utf-8
+"""WordWriter 命令行入口
+
+用法:
+    wordwriter TEMPLATE RECORDS -o "out/{index}.docx" [-j N] [--resume]
+
+RECORDS 为 JSONL 或 CSV 文件，每条记录中以 "#[" 开头的键为标签，
+其余键可在输出文件名模板中引用。全部成功时退出码为 0，存在失败时为 1。
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional
+
+from .batch import BatchResult, read_records, run_batch
+from .cache import DiskCache
+from .constants import LogMessage
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog="wordwriter",
+        description="使用 WordWriter 模板批量生成 Word 文档",
+    )
+    parser.add_argument("template", help="模板 .docx 文件路径")
+    parser.add_argument("records", help="记录文件路径（.jsonl 或 .csv）")
+    parser.add_argument("-o", "--output", required=True,
+                        help='输出文件名模板，可使用 {index} 及记录字段，如 "out/{name}.docx"')
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="并行进程数（默认 1）")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None,
+                        help="记录文件格式（默认根据扩展名判断）")
+    parser.add_argument("--resume", action="store_true",
+                        help="跳过已存在的输出文件，用于断点续跑")
+    parser.add_argument("--prewarm", action="store_true",
+                        help="（Linux）父进程预加载模板后 fork 工作进程，共享已解析的文档树")
+    parser.add_argument("--measure-memory", action="store_true",
+                        help="配合 --prewarm 输出各工作进程的 RSS/PSS/USS")
+    parser.add_argument("--no-share-tables", action="store_true",
+                        help="不在工作进程间共享被多条记录引用的表格文件")
+    parser.add_argument("--validate", action="store_true",
+                        help="渲染前校验所有记录（图片、表格文件及表格列数），未通过的记录不渲染")
+    parser.add_argument("--archive", default=None,
+                        help="将输出顺序写入该 .zip/.tar 归档（-o 为归档内的成员名），并生成清单")
+    parser.add_argument("--shard-size", type=int, default=0,
+                        help="配合 --archive，每个归档分片的文档数（默认 0，不分片）")
+    parser.add_argument("--normalize", action="store_true",
+                        help="加载模板后合并格式相同的相邻 run、删除拼写检查标记和 rsid 属性，再搜索标签")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="以确定性方式保存（固定时间戳及部件顺序），相同记录输出完全相同的字节")
+    parser.add_argument("--cache-dir", default=None,
+                        help="渲染结果缓存目录，相同输入直接复用缓存的输出")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="缓存目录容量上限（MiB，默认 1024）")
+    parser.add_argument("--report", default=None,
+                        help="将运行结果及失败明细写入该 JSON 文件")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="不输出进度信息")
+    return parser
+
+
+def _print_progress(done: int, total: int, result: BatchResult) -> None:
+    """在标准错误输出上打印进度"""
+    sys.stderr.write(f"\r[{done}/{total}] {result.docs_per_sec:.1f} docs/sec, "
+                     f"failed {result.failed}")
+    sys.stderr.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行主函数
+
+    Args:
+        argv: 命令行参数列表，默认为 sys.argv[1:]
+
+    Returns:
+        退出码，0 表示全部成功
+    """
+    args = _build_parser().parse_args(argv)
+
+    if not os.path.exists(args.template):
+        sys.stderr.write(f"模板文件不存在: {args.template}\n")
+        return 2
+    if not os.path.exists(args.records):
+        sys.stderr.write(f"记录文件不存在: {args.records}\n")
+        return 2
+    if args.archive and args.resume:
+        sys.stderr.write("--archive 不能与 --resume 同时使用\n")
+        return 2
+
+    try:
+        # read_records 是生成器，先读完，使记录文件的错误与渲染错误分开报告
+        records = list(read_records(args.records, args.format))
+    except ValueError as e:
+        sys.stderr.write(f"记录文件读取失败: {e}\n")
+        return 2
+
+    try:
+        result = run_batch(
+            args.template,
+            records,
+            args.output,
+            jobs=max(1, args.jobs),
+            resume=args.resume,
+            progress=None if args.quiet else _print_progress,
+            prewarm=args.prewarm,
+            measure_memory=args.measure_memory,
+            cache=DiskCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache_dir else None,
+            share_tables=not args.no_share_tables,
+            validate=args.validate,
+            archive=args.archive,
+            shard_size=args.shard_size,
+            deterministic=args.deterministic,
+            normalize=args.normalize,
+        )
+    except ValueError as e:
+        sys.stderr.write(f"\n批量渲染失败: {e}\n")
+        return 2
+
+    if not args.quiet:
+        sys.stderr.write("\n")
+    sys.stderr.write(
+        f"total {result.total}, succeeded {result.succeeded}, skipped {result.skipped}, "
+        f"failed {result.failed}, {result.elapsed:.2f}s, {result.docs_per_sec:.1f} docs/sec\n"
+    )
+    for pid, memory in sorted(result.worker_memory.items(), key=lambda item: str(item[0])):
+        sys.stderr.write(f"worker {pid}: rss {memory['rss'] / 1048576:.1f} MiB, "
+                         f"pss {memory['pss'] / 1048576:.1f} MiB, uss {memory['uss'] / 1048576:.1f} MiB\n")
+    if result.archives:
+        sys.stderr.write(f"archives {len(result.archives)}, manifest {result.manifest}\n")
+    for failure in result.failures:
+        sys.stderr.write(f"{LogMessage.ERROR_TAG}#{failure['index']} {failure['output']}: {failure['error']}\n")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(result.to_dict(), f, ensure_ascii=False, indent=2)
+
+    return 0 if result.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,6 +23,13 @@ class TagPrefix:
     IMAGE = "#[IMAGE"
     TABLE_IMAGE = "#[TBIMG"
     TEXTBOX = "#[TX"
+    
+    # 条件区间：#[IF-名称]# … #[/IF-名称]#
+    IF = "#[IF"
+    END_IF = "#[/IF"
+    
+    # 列表：#[LIST-名称]#，每个列表项复制一份所在段落
+    LIST = "#[LIST"
 
 
 class SpecialValue:
@@ -84,6 +91,9 @@ class XMLNamespace:
     TAG_ALTERNATE_CONTENT = "AlternateContent"
     TAG_TEXTBOX = "textbox"
 
+    # 标记兼容性（mc:AlternateContent）命名空间
+    MARKUP_COMPATIBILITY = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+
 
 class LogMessage:
     """日志消息常量
@@ -7,20 +7,72 @@ Author: pzweuj
 Since: v4.0.0
 """
 
-from typing import Dict, List, Optional, Any
+import copy
+import io
+import threading
+from typing import IO, Dict, Iterable, List, Optional, Any, Tuple, Union
 from docx import Document
-from docx.table import Table
+from docx.opc.part import Part, XmlPart
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsmap, qn
+from docx.table import Table, _Cell
+from docx.text.paragraph import Paragraph
+from lxml import etree
 
 # 导入现有的函数式 API（作为底层实现）
 from .WordWriter import (
+    TagMatcher,
+    _fast_text,
     search_tag,
-    replace_paragraph_string,
-    replace_text_box_string,
-    insert_picture,
-    fill_table,
-    remove_ele,
+    drop_detached,
 )
-from .constants import TagPrefix, SpecialValue, LogMessage
+from .constants import TagPrefix, LogMessage
+from .cache import RenderCache, cached_render
+from .deterministic import save_deterministic
+from .normalize import normalize_document
+from .lazy import is_unparsed, load_document, may_contain_tags
+from .profiling import MemoryProfiler, MemoryReport
+from .plan import InputValidator, RenderPlan, build_plan
+from .handlers import HandlerRegistry, ReplaceContext, registry
+from .locations import (
+    _PartParent,
+    parts_by_name,
+    TagLocation,
+    TableLocation,
+    TextboxLocation,
+    XmlTextLocation,
+    closing_tag,
+    is_condition_tag,
+    pair_ranges,
+    fallback_of,
+    fallback_runs,
+    textbox_runs,
+)
+
+# 表格遍历使用的元素标签
+_W_TBL = qn("w:tbl")
+_W_TR = qn("w:tr")
+_W_TC = qn("w:tc")
+_W_P = qn("w:p")
+_W_NAMESPACE = "{%s}" % nsmap["w"]
+
+def _load_xml_part(part: Part) -> XmlPart:
+    """将以原始字节加载的 XML 部件就地转换为 XmlPart
+    
+    python-docx 只为已知内容类型（正文、页眉页脚、样式等）解析 XML，
+    脚注、尾注、图表等部件以字节形式保存。这里解析字节并就地替换部件
+    的类，包中所有指向该部件的关系保持不变，保存时由 XmlPart 序列化。
+    
+    Args:
+        part: 包部件
+        
+    Returns:
+        同一个部件对象（已是 XmlPart）
+    """
+    if not isinstance(part, XmlPart):
+        part._element = parse_xml(part.blob)
+        part.__class__ = XmlPart
+    return part
 
 
 # ============================================================================
@@ -30,7 +82,8 @@ from .constants import TagPrefix, SpecialValue, LogMessage
 class TagSearcher:
     """标签搜索器
     
-    负责在 Word 文档中搜索所有标签。
+    负责在 Word 文档中搜索标签。search_all() 建立所有标签的完整索引；
+    search(keys) 为定向搜索，只为给定的标签建立索引。
     
     Attributes:
         document: Word 文档对象
@@ -43,115 +96,281 @@ class TagSearcher:
         >>> print(tags.keys())
     """
     
-    def __init__(self, document: Document):
+    def __init__(self, document: Document, handlers: Optional[HandlerRegistry] = None):
         """初始化标签搜索器
         
         Args:
             document: Word 文档对象
+            handlers: 标签处理器注册表，默认使用全局注册表
         """
         self.document = document
+        self.handlers = handlers or registry
+        self._matcher: Optional[TagMatcher] = None
         
-    def search_all(self) -> Dict[str, List]:
+    def search_all(self) -> Dict[str, List[TagLocation]]:
         """搜索文档中的所有标签
         
         Returns:
-            标签字典，格式为 {tag_name: [tag_info, ...]}
+            标签字典，格式为 {tag_name: [TagLocation, ...]}
         """
+        self._matcher = None
+        return self._search()
+        
+    def search(self, keys: Iterable[str]) -> Dict[str, List[TagLocation]]:
+        """定向搜索：只为给定的标签建立索引
+        
+        文档仍只遍历一次，但每段文本通过 TagMatcher 一次扫描判断是否含有
+        目标标签，只有命中的位置才会计算 run 区间；目标中没有文本框标签时
+        跳过文本框扫描。
+        
+        Args:
+            keys: 需要索引的标签，通常为替换字典的键
+            
+        Returns:
+            标签字典，只包含文档中存在的目标标签
+        """
+        keys = list(keys)
+        # 条件区间需要同时索引结束标签
+        keys.extend(closing_tag(key) for key in keys if is_condition_tag(key))
+        self._matcher = TagMatcher(keys)
+        try:
+            return self._search()
+        finally:
+            self._matcher = None
+            
+    def _search(self) -> Dict[str, List[TagLocation]]:
+        """按当前匹配器搜索各部分"""
         tag_dict = {}
         
         self._search_headers_footers(tag_dict)
         self._search_paragraphs(tag_dict)
         self._search_tables(tag_dict)
-        self._search_textboxes(tag_dict)
+        if self._matcher is None or self._matcher.wants_prefix(TagPrefix.TEXTBOX):
+            self._search_textboxes(tag_dict)
+        self._search_other_parts(tag_dict)
+        pair_ranges(tag_dict)
+        # 建立索引时即解析每个标签的处理器，渲染时只需查缓存
+        for tag in tag_dict:
+            self.handlers.resolve(tag)
         
         return tag_dict
         
-    def _search_headers_footers(self, tag_dict: Dict[str, List]) -> None:
+    def _search_headers_footers(self, tag_dict: Dict[str, List[TagLocation]]) -> None:
         """搜索页眉页脚中的标签
 
         Args:
             tag_dict: 标签字典
         """
-        sections_list = []
-        for section in self.document.sections:
-            sections_list.extend([
-                section.header,
-                section.first_page_header,
-                section.footer,
-                section.first_page_footer
-            ])
-
-        for section_part in sections_list:
+        for section_part in self._header_footers():
+            # 延迟解析且未被访问的部件中没有标签
+            if is_unparsed(section_part.part):
+                continue
             # 搜索段落
-            search_tag(tag_dict, section_part.paragraphs)
+            search_tag(tag_dict, section_part.paragraphs, self._matcher)
 
             # 搜索表格（新增：支持页眉页脚中的表格）
             for table in section_part.tables:
-                rows = table.rows
-                for row_idx in range(len(rows)):
-                    cells = rows[row_idx].cells
-                    for col_idx in range(len(cells)):
-                        cell = cells[col_idx]
-
-                        if TagPrefix.TAG_START in cell.text and TagPrefix.TAG_END in cell.text:
-                            if TagPrefix.TABLE in cell.text:
-                                # 表格标签
-                                tag = (TagPrefix.TABLE + "-" +
-                                       cell.text.split(TagPrefix.TABLE + "-")[1].split(TagPrefix.TAG_END)[0] +
-                                       TagPrefix.TAG_END)
-                                tag_dict.setdefault(tag, []).append([table, row_idx, col_idx])
-                            else:
-                                # 单元格中的字符串标签
-                                search_tag(tag_dict, cell.paragraphs)
+                self._search_table(tag_dict, table)
             
-    def _search_paragraphs(self, tag_dict: Dict[str, List]) -> None:
+    def _header_footers(self) -> List[Any]:
+        """获取需要搜索的页眉页脚，每个底层部件只返回一次
+        
+        链接到前一节（is_linked_to_previous）的页眉页脚与前一节共用同一部件，
+        多个节也可能引用同一部件，因此按部件去重。链接到前一节的页眉页脚
+        不会通过 python-docx 访问，避免为没有定义的首节自动创建空白部件。
+        
+        Returns:
+            页眉页脚对象列表
+        """
+        seen = set()
+        header_footers = []
+        for section in self.document.sections:
+            for header_footer in (section.header, section.first_page_header,
+                                  section.footer, section.first_page_footer):
+                if header_footer.is_linked_to_previous:
+                    continue
+                part = header_footer.part
+                if part in seen:
+                    continue
+                seen.add(part)
+                header_footers.append(header_footer)
+        return header_footers
+        
+    def _search_paragraphs(self, tag_dict: Dict[str, List[TagLocation]]) -> None:
         """搜索段落中的标签
         
         Args:
             tag_dict: 标签字典
         """
-        search_tag(tag_dict, self.document.paragraphs)
+        search_tag(tag_dict, self.document.paragraphs, self._matcher)
         
-    def _search_tables(self, tag_dict: Dict[str, List]) -> None:
+    def _search_tables(self, tag_dict: Dict[str, List[TagLocation]]) -> None:
         """搜索表格中的标签
         
         Args:
             tag_dict: 标签字典
         """
         for table in self.document.tables:
-            rows = table.rows
-            for row_idx in range(len(rows)):
-                cells = rows[row_idx].cells
-                for col_idx in range(len(cells)):
-                    cell = cells[col_idx]
-                    
-                    if TagPrefix.TAG_START in cell.text and TagPrefix.TAG_END in cell.text:
-                        if TagPrefix.TABLE in cell.text:
-                            # 表格标签
-                            tag = (TagPrefix.TABLE + "-" + 
-                                   cell.text.split(TagPrefix.TABLE + "-")[1].split(TagPrefix.TAG_END)[0] + 
-                                   TagPrefix.TAG_END)
-                            tag_dict.setdefault(tag, []).append([table, row_idx, col_idx])
-                        else:
-                            # 单元格中的字符串标签
-                            search_tag(tag_dict, cell.paragraphs)
+            self._search_table(tag_dict, table)
+            
+    def _search_table(self, tag_dict: Dict[str, List[TagLocation]], table: Table) -> None:
+        """搜索表格（含任意层嵌套表格）各单元格中的标签
+        
+        直接遍历 w:tr/w:tc 元素，用快速文本预筛选后只为含标签的单元格创建
+        python-docx 代理对象；单元格中的嵌套表格压入栈中继续处理，每个
+        w:tbl 只访问一次。合并单元格的后续部分（vMerge="continue"）与
+        row.cells 一致归属于首个单元格，不再重复搜索。
+        
+        Args:
+            tag_dict: 标签字典
+            table: 表格对象
+        """
+        part = table.part
+        stack = [table._tbl]
+        while stack:
+            tbl = stack.pop()
+            nested = []
+            for row_idx, tr in enumerate(tbl.iterchildren(_W_TR)):
+                for tc in tr.iterchildren(_W_TC):
+                    # 快速文本包含嵌套表格的内容，未命中时整个单元格（含嵌套表格）都可跳过
+                    fast_text = _fast_text(tc)
+                    if TagPrefix.TAG_START not in fast_text or TagPrefix.TAG_END not in fast_text:
+                        continue
+                    if tc.vMerge == "continue":
+                        continue
+                    nested.extend(tc.iterchildren(_W_TBL))
+                    self._search_cell(tag_dict, tbl, part, tr, row_idx, tc)
+            # 逆序入栈，使嵌套表格按文档顺序处理
+            stack.extend(reversed(nested))
+            
+    def _search_cell(self, tag_dict: Dict[str, List[TagLocation]], tbl: Any, part: Any,
+                     tr: Any, row_idx: int, tc: Any) -> None:
+        """搜索单个单元格中的标签（不含嵌套表格）
+        
+        Args:
+            tag_dict: 标签字典
+            tbl: 单元格所在的 w:tbl 元素
+            part: 表格所属部件
+            tr: 单元格所在的 w:tr 元素
+            row_idx: 行号
+            tc: w:tc 元素
+        """
+        cell = _Cell(tc, Table(tbl, _PartParent(part)))
+        text = cell.text
+        
+        if TagPrefix.TAG_START in text and TagPrefix.TAG_END in text:
+            if TagPrefix.TABLE in text:
+                # 表格标签，列号与 row.cells 一致按网格列计算（横向合并占多列）
+                tag = (TagPrefix.TABLE + "-" + 
+                       text.split(TagPrefix.TABLE + "-")[1].split(TagPrefix.TAG_END)[0] + 
+                       TagPrefix.TAG_END)
+                if self._matcher is None or self._matcher.wants(tag):
+                    col_idx = 0
+                    for sibling in tr.iterchildren(_W_TC):
+                        if sibling is tc:
+                            break
+                        col_idx += sibling.grid_span
+                    tag_dict.setdefault(tag, []).append(TableLocation(tbl, part, row_idx, col_idx))
+            elif self._matcher is None or self._matcher.wants_text(text):
+                # 单元格中的字符串标签
+                search_tag(tag_dict, cell.paragraphs, self._matcher)
                             
-    def _search_textboxes(self, tag_dict: Dict[str, List]) -> None:
+    def _search_other_parts(self, tag_dict: Dict[str, List[TagLocation]]) -> None:
+        """搜索包中其余 XML 部件（脚注、尾注、批注、图表等）中的标签
+        
+        正文和页眉页脚由前面的步骤处理。其余部件先按原始字节预筛选，
+        命中的部件只遍历一次：根元素在 w 命名空间的 WordprocessingML 部件
+        按段落搜索，支持跨 run 的标签；其他部件（如图表）记录文本中含有
+        完整标签的元素。这些部件中只记录处理器 story_only 为 False 的标签
+        （文本、条件区间）。
+        
+        Args:
+            tag_dict: 标签字典
+        """
+        covered = {self.document.part}
+        covered.update(header_footer.part for header_footer in self._header_footers())
+        
+        for part in self.document.part.package.iter_parts():
+            if part in covered or not part.content_type.endswith("xml"):
+                continue
+            if not isinstance(part, XmlPart):
+                # 原始字节部件（含延迟解析的部件）先按字节预筛选
+                if not may_contain_tags(part.blob):
+                    continue
+                part = _load_xml_part(part)
+                
+            root = part.element
+            if root.tag.startswith(_W_NAMESPACE):
+                found: Dict[str, List[TagLocation]] = {}
+                parent = _PartParent(part)
+                search_tag(found, (Paragraph(p, parent) for p in root.iter(_W_P)), self._matcher)
+                for tag, locations in found.items():
+                    if not self.handlers.resolve(tag).story_only:
+                        tag_dict.setdefault(tag, []).extend(locations)
+            else:
+                for element in root.iter(etree.Element):
+                    text = element.text
+                    if not text or TagPrefix.TAG_START not in text:
+                        continue
+                    for tag in TagMatcher._TOKEN.findall(text):
+                        if self.handlers.resolve(tag).story_only:
+                            continue
+                        if self._matcher is None or self._matcher.wants(tag):
+                            tag_dict.setdefault(tag, []).append(XmlTextLocation(element, part))
+                            
+    def _search_textboxes(self, tag_dict: Dict[str, List[TagLocation]]) -> None:
         """搜索文本框中的标签
         
+        每个部件（正文及各页眉页脚）只用一次 XPath 取出 w:txbxContent 中的
+        run，mc:Fallback 中的副本不单独记录，而是按同一标签的出现顺序与
+        mc:Choice 中的 run 配对，保存在位置的 fallback 下标中，替换时一并更新。
+        
         Args:
             tag_dict: 标签字典
         """
-        from .constants import XMLNamespace
-        
-        children = self.document.element.body.iter()
-        for child in children:
-            if child.tag.endswith((XMLNamespace.TAG_ALTERNATE_CONTENT, XMLNamespace.TAG_TEXTBOX)):
-                for child_item in child.iter():
-                    if child_item.tag.endswith((XMLNamespace.TAG_RUN, XMLNamespace.TAG_PARAGRAPH_PROPERTIES)):
-                        if child_item.text is not None:
-                            if TagPrefix.TEXTBOX in child_item.text and TagPrefix.TAG_END in child_item.text:
-                                tag_dict.setdefault(child_item.text.strip(), []).append(child_item)
+        parts = [self.document.part] + [hf.part for hf in self._header_footers()]
+        for part in parts:
+            if is_unparsed(part):
+                continue
+            # {mc:Fallback 元素: {tag: [尚未配对的下标, ...]}}
+            pending: Dict[Any, Dict[str, List[int]]] = {}
+            for run in textbox_runs(part.element):
+                if TagPrefix.TEXTBOX not in _fast_text(run):
+                    continue
+                text = run.text
+                if TagPrefix.TAG_END not in text:
+                    continue
+                tag = text.strip()
+                if self._matcher is not None and not self._matcher.wants(tag):
+                    continue
+                tag_dict.setdefault(tag, []).append(
+                    TextboxLocation(run, part, self._fallback_index(run, tag, pending)))
+                
+    @staticmethod
+    def _fallback_index(run: Any, tag: str, pending: Dict[Any, Dict[str, List[int]]]) -> int:
+        """查找 run 在 mc:Fallback 副本中对应 run 的下标
+        
+        同一文本框中相同标签按出现顺序一一配对。
+        
+        Args:
+            run: mc:Choice 中的 w:r 元素
+            tag: run 中的标签
+            pending: 按 Fallback 元素缓存的各标签尚未配对的下标
+            
+        Returns:
+            Fallback 中的下标，没有对应副本时为 -1
+        """
+        fallback = fallback_of(run)
+        if fallback is None:
+            return -1
+        if fallback not in pending:
+            indexes: Dict[str, List[int]] = {}
+            for idx, fallback_run in enumerate(fallback_runs(fallback)):
+                if TagPrefix.TEXTBOX in _fast_text(fallback_run):
+                    indexes.setdefault(fallback_run.text.strip(), []).append(idx)
+            pending[fallback] = indexes
+        indexes = pending[fallback].get(tag)
+        return indexes.pop(0) if indexes else -1
 
 
 # ============================================================================
@@ -172,99 +391,165 @@ class ContentReplacer:
         >>> replacer.replace_all({"#[title]#": "新标题"})
     """
     
-    def __init__(self, document: Document, tag_dict: Dict[str, List]):
+    def __init__(self, document: Document, tag_dict: Dict[str, List[TagLocation]],
+                 profiler: Optional[MemoryProfiler] = None,
+                 handlers: Optional[HandlerRegistry] = None):
         """初始化内容替换器
         
         Args:
             document: Word 文档对象
             tag_dict: 标签字典
+            profiler: 内存分析器，启用时每个标签的替换记录为一个阶段
+            handlers: 标签处理器注册表，默认使用全局注册表
         """
         self.document = document
         self.tag_dict = tag_dict
+        self.profiler = profiler or MemoryProfiler(enabled=False)
+        self.handlers = handlers or registry
         
-    def replace_all(self, replace_dict: Dict[str, str], logs: bool = True) -> None:
+    def replace_all(self, replace_dict: Dict[str, Any], logs: bool = True) -> None:
         """替换所有标签
         
+        按处理器的 order 分轮处理（条件区间和列表先于其他标签），每个标签的全部
+        位置一次交给处理器的 replace_batch()。某一轮删除了文档内容时，
+        从索引中移除失效的位置，后续标签不再处理这些位置。最后调用各处理器
+        的 flush() 完成延迟的工作（如表格填充）。
+        
         Args:
             replace_dict: 替换字典 {tag: value}
             logs: 是否打印日志
         """
-        for tag_key, value in replace_dict.items():
-            if tag_key not in self.tag_dict:
+        context = ReplaceContext(self.document, self.tag_dict, self.profiler, logs, self.handlers,
+                                 replace_dict)
+        jobs = [(tag, value, self.handlers.resolve(tag)) for tag, value in replace_dict.items()]
+        for order in sorted({handler.order for _, _, handler in jobs}):
+            for tag_key, value, handler in jobs:
+                if handler.order != order:
+                    continue
+                if tag_key not in self.tag_dict:
+                    if logs:
+                        print(LogMessage.MISSING_TAG + tag_key)
+                    continue
+                    
                 if logs:
-                    print(LogMessage.MISSING_TAG + tag_key)
-                continue
-                
-            if logs:
-                print(LogMessage.FILLING_TAG + tag_key)
-                
-            self._replace_tag(tag_key, value)
-            
-    def _replace_tag(self, tag: str, value: str) -> None:
-        """替换单个标签
+                    print(LogMessage.FILLING_TAG + tag_key)
+                    
+                if handler.deferred(value):
+                    # 延迟的工作在 flush() 中记录内存阶段
+                    handler.replace_batch(tag_key, self.tag_dict[tag_key], value, context)
+                    continue
+                with self.profiler.phase(tag_key):
+                    handler.replace_batch(tag_key, self.tag_dict[tag_key], value, context)
+            if context.detached:
+                drop_detached(self.tag_dict)
+                context.detached = False
+        for handler in dict.fromkeys(handler for _, _, handler in jobs):
+            handler.flush(context)
+
+
+# ============================================================================
+# WordWriter 主类
+# ============================================================================
+
+def _clone_document(document: Document) -> Document:
+    """深拷贝整个文档包并返回新的 Document 对象
+    
+    lxml 元素在深拷贝时会脱离原树独立复制，因此不能直接拷贝 Document
+    （其缓存的 _body 持有 body 子元素），而是拷贝整个 package 后由文档
+    部件重新创建 Document。
+    
+    Args:
+        document: Word 文档对象
         
-        Args:
-            tag: 标签名称
-            value: 替换值
-        """
-        if TagPrefix.TABLE in tag:
-            self._replace_table(tag, value)
-        elif TagPrefix.TEXTBOX in tag:
-            self._replace_textbox(tag, value)
-        elif TagPrefix.IMAGE in tag or TagPrefix.TABLE_IMAGE in tag:
-            self._replace_image(tag, value)
-        else:
-            self._replace_text(tag, value)
-            
-    def _replace_text(self, tag: str, value: str) -> None:
-        """替换文本标签
+    Returns:
+        新的 Document 对象
+    """
+    package = copy.deepcopy(document.part.package)
+    part = package.main_document_part
+    # 缓存的 InlineShapes 同样持有 body 子元素，丢弃后按需重建
+    part.__dict__.pop("inline_shapes", None)
+    return part.document
+
+
+def _index_state(tag_dict: Dict[str, List[TagLocation]]) -> Dict[str, List[Tuple[type, Dict[str, Any]]]]:
+    """将标签索引转换为与文档树无关的序列化状态（元素以部件名和下标路径表示）"""
+    return {
+        tag: [(type(location), location.__getstate__()) for location in locations]
+        for tag, locations in tag_dict.items()
+    }
+
+
+def _bind_index(index: Dict[str, List[Tuple[type, Dict[str, Any]]]],
+                parts: Dict[str, Any]) -> Dict[str, List[TagLocation]]:
+    """由序列化状态重建标签索引并绑定到给定部件
+    
+    Args:
+        index: _index_state() 的结果
+        parts: {部件名: 部件}
         
-        Args:
-            tag: 标签名称
-            value: 替换值
-        """
-        for tag_item in self.tag_dict[tag]:
-            replace_paragraph_string(tag_item[1], value)
-            
-    def _replace_image(self, tag: str, value: str) -> None:
-        """替换图片标签
+    Returns:
+        标签字典
+    """
+    tag_dict: Dict[str, List[TagLocation]] = {}
+    for tag, states in index.items():
+        locations = []
+        for cls, state in states:
+            location = cls.__new__(cls)
+            location.__setstate__(state)
+            locations.append(location.bind(parts))
+        tag_dict[tag] = locations
+    return tag_dict
+
+
+class _TemplateSnapshot:
+    """模板快照
+    
+    保存加载后尚未修改的可变 XML（主文档部件及所有含标签部件的根元素）、
+    各部件的关系 ID，以及标签索引的序列化状态（元素以部件名和下标路径表示）。
+    恢复时对快照根元素做一次深拷贝（lxml 在 C 层完成），再将标签位置重新
+    绑定到新的 XML 树，无需重新解析模板，也无需重新搜索标签。
+    """
+    
+    def __init__(self, document: Document, tag_dict: Dict[str, List[TagLocation]]):
+        """建立快照
         
         Args:
-            tag: 标签名称
-            value: 图片路径
+            document: 未修改的 Word 文档对象
+            tag_dict: 该文档的标签字典
         """
-        for tag_item in self.tag_dict[tag]:
-            insert_picture(tag_item[1], tag, value)
+        self._package = document.part.package
+        self._document_part = document.part
+        self._image_count = len(self._package.image_parts)
+        
+        parts = {id(document.part): document.part}
+        for locations in tag_dict.values():
+            for location in locations:
+                parts[id(location.part)] = location.part
+        self._parts: List[Tuple[XmlPart, Any, set]] = [
+            (part, copy.deepcopy(part.element), set(part.rels.keys())) for part in parts.values()
+        ]
+        
+        self._index = _index_state(tag_dict)
             
-    def _replace_table(self, tag: str, value: str) -> None:
-        """替换表格标签
-        
-        Args:
-            tag: 标签名称
-            value: 表格文件路径或特殊值
-        """
-        if value == SpecialValue.DELETE_TABLE:
-            for tag_item in self.tag_dict[tag]:
-                remove_ele(tag_item[0])
-        else:
-            for tag_item in self.tag_dict[tag]:
-                fill_table(tag_item[0], tag_item[1], tag_item[2], value)
-                
-    def _replace_textbox(self, tag: str, value: str) -> None:
-        """替换文本框标签
+    def restore(self) -> Tuple[Document, Dict[str, List[TagLocation]]]:
+        """从快照恢复文档和标签索引
         
-        Args:
-            tag: 标签名称
-            value: 替换值
+        Returns:
+            (document, tag_dict)
         """
-        for tag_item in self.tag_dict[tag]:
-            replace_text_box_string(tag_item, value)
+        for part, pristine, rel_ids in self._parts:
+            part._element = copy.deepcopy(pristine)
+            # 丢弃渲染期间新增的关系（如插入图片），新增的图片部件随之不再被引用
+            for rel_id in [rel_id for rel_id in part.rels if rel_id not in rel_ids]:
+                del part.rels[rel_id]
+                part.rels.related_parts.pop(rel_id, None)
+        del self._package.image_parts._image_parts[self._image_count:]
+        self._document_part.__dict__.pop("inline_shapes", None)
+        
+        parts = {str(part.partname): part for part, _, _ in self._parts}
+        return self._document_part.document, _bind_index(self._index, parts)
 
 
-# ============================================================================
-# WordWriter 主类
-# ============================================================================
-
 class WordWriter:
     """WordWriter 主类
     
@@ -292,22 +577,42 @@ class WordWriter:
         ...                     {"#[title]#": "报告"})
     """
     
-    def __init__(self, template_path: str):
+    def __init__(self, template_path: str, lazy_parts: bool = False, profile_memory: bool = False,
+                 deterministic: bool = False, normalize: bool = False):
         """初始化 WordWriter
         
         Args:
             template_path: 模板文件路径
+            lazy_parts: 为 True 时按原始字节预筛选，不含标签的部件（样式、编号、
+                页眉页脚等）不解析，保存时原样写出（见 load_document）
+            profile_memory: 为 True 时用 tracemalloc 记录加载、搜索、每个标签的
+                替换及保存各阶段的内存分配，结果见 memory_report
+            deterministic: 为 True 时以确定性方式保存，相同输入得到完全相同的
+                字节（见 save_deterministic）
+            normalize: 为 True 时加载后先规范化 run（合并格式相同的相邻 run，
+                删除拼写检查标记和 rsid 属性，见 normalize_document），再搜索标签
         """
         self.template_path = template_path
+        self.lazy_parts = lazy_parts
+        self.deterministic = deterministic
+        self.normalize = normalize
+        self._profiler = MemoryProfiler(enabled=profile_memory)
         self.document: Optional[Document] = None
-        self.tag_dict: Dict[str, List] = {}
+        self.tag_dict: Dict[str, List[TagLocation]] = {}
         self._loaded = False
         self._searcher: Optional[TagSearcher] = None
         self._replacer: Optional[ContentReplacer] = None
+        self._snapshot: Optional[_TemplateSnapshot] = None
+        self._dirty = False
+        # 定向搜索时已索引的标签；为 None 表示 tag_dict 是完整索引
+        self._indexed_keys: Optional[set] = None
         
-    def load(self) -> 'WordWriter':
+    def load(self, keys: Optional[Iterable[str]] = None) -> 'WordWriter':
         """加载模板文档
         
+        Args:
+            keys: 只为这些标签建立索引（定向搜索）；默认建立完整索引
+        
         Returns:
             self，支持链式调用
             
@@ -318,41 +623,214 @@ class WordWriter:
         if not os.path.exists(self.template_path):
             raise FileNotFoundError(f"模板文件不存在: {self.template_path}")
             
-        self.document = Document(self.template_path)
+        with self._profiler.session():
+            with self._profiler.phase("load"):
+                document = load_document(self.template_path) if self.lazy_parts else Document(self.template_path)
+            if self.normalize:
+                with self._profiler.phase("normalize"):
+                    normalize_document(document)
+            self._attach(document, keys)
+        return self
+        
+    def _attach(self, document: Document, keys: Optional[Iterable[str]] = None,
+                tag_dict: Optional[Dict[str, List[TagLocation]]] = None) -> None:
+        """绑定文档对象并建立标签索引
+        
+        Args:
+            document: Word 文档对象
+            keys: 只为这些标签建立索引；为 None 时建立完整索引
+            tag_dict: 已绑定到 document 的完整标签索引，提供时不再搜索
+        """
+        self.document = document
         self._searcher = TagSearcher(self.document)
-        self.tag_dict = self._searcher.search_all()
-        self._replacer = ContentReplacer(self.document, self.tag_dict)
+        if tag_dict is not None:
+            self.tag_dict = tag_dict
+            self._indexed_keys = None
+        elif keys is None:
+            with self._profiler.phase("search"):
+                self.tag_dict = self._searcher.search_all()
+            self._indexed_keys = None
+        else:
+            self._indexed_keys = set(keys)
+            with self._profiler.phase("search"):
+                self.tag_dict = self._searcher.search(self._indexed_keys)
+        self._replacer = ContentReplacer(self.document, self.tag_dict, self._profiler)
         self._loaded = True
+        self._snapshot = None
+        self._dirty = False
+        
+    def _index_all(self) -> None:
+        """将定向索引扩展为当前文档的完整索引"""
+        if self._indexed_keys is None:
+            return
+        with self._profiler.phase("search"):
+            self.tag_dict = self._searcher.search_all()
+        self._replacer = ContentReplacer(self.document, self.tag_dict, self._profiler)
+        self._indexed_keys = None
+        
+    def _index_keys(self, keys: Iterable[str]) -> None:
+        """定向索引中补充尚未搜索过的标签"""
+        if self._indexed_keys is None:
+            return
+        missing = [key for key in keys if key not in self._indexed_keys]
+        if missing:
+            with self._profiler.phase("search"):
+                self.tag_dict.update(self._searcher.search(missing))
+            self._indexed_keys.update(missing)
+        
+    def clone(self) -> 'WordWriter':
+        """从已加载的模板复制出一个独立的 WordWriter
+        
+        复制的是内存中已解析的文档树，不会重新读取和解析模板文件，
+        适合作为原型反复渲染（例如 fork 出的子进程从共享原型复制）。
         
-        return self
+        Returns:
+            新的 WordWriter 实例，对其修改不会影响原实例
+        """
+        if not self._loaded or self.document is None:
+            self.load()
+            
+        other = self.__class__(self.template_path, self.lazy_parts, self._profiler.enabled,
+                               self.deterministic, self.normalize)
+        other._attach(_clone_document(self.document))
+        return other
         
-    def replace(self, replace_dict: Dict[str, str], logs: bool = True) -> 'WordWriter':
-        """替换标签
+    def plan(self, replace_dict: Dict[str, Any], strict: bool = False,
+             validator: Optional[InputValidator] = None) -> RenderPlan:
+        """生成并校验渲染计划，不修改文档
+        
+        解析每个标签的处理方式，并发校验图片文件和表格数据，并检查表格数据
+        的列数能否放入模板表格。发现的问题汇总在 plan.issues 中，不抛出异常；
+        将计划传给 replace()/render() 时，存在致命问题则在修改文档前抛出
+        PlanValidationError。
         
         Args:
             replace_dict: 替换字典 {tag: value}
+            strict: 为 True 时图片文件不存在也视为错误（默认按文本替换）
+            validator: 外部输入校验器，多次生成计划时共享以复用文件校验结果
+            
+        Returns:
+            渲染计划
+            
+        Example:
+            >>> plan = writer.plan(record)
+            >>> if not plan.ok:
+            ...     print(plan.errors)
+            >>> writer.replace(plan).save("output.docx")
+        """
+        if not self._loaded:
+            self.load(keys=replace_dict.keys())
+        else:
+            self._index_keys(replace_dict.keys())
+        return build_plan(self.template_path, self.tag_dict, replace_dict, strict, validator)
+        
+    def replace(self, replace_dict: Union[Dict[str, Any], RenderPlan], logs: bool = True) -> 'WordWriter':
+        """替换标签
+        
+        Args:
+            replace_dict: 替换字典 {tag: value}，或 plan() 生成的渲染计划
             logs: 是否打印日志
             
         Returns:
             self，支持链式调用
             
+        Note:
+            尚未调用 load() 时，只为 replace_dict 中的标签建立索引（定向搜索），
+            适合在大文档中只替换少量标签的场景。
+            
         Raises:
             RuntimeError: 文档未加载
+            PlanValidationError: 渲染计划存在致命问题（文档未被修改）
         """
-        if not self._loaded:
+        if isinstance(replace_dict, RenderPlan):
+            replace_dict = replace_dict.check().replace_dict
+        with self._profiler.session():
+            if not self._loaded:
+                self.load(keys=replace_dict.keys())
+            else:
+                self._index_keys(replace_dict.keys())
+                
+            if self._replacer is None:
+                raise RuntimeError("Replacer not initialized")
+                
+            self._dirty = True
+            self._replacer.replace_all(replace_dict, logs)
+        return self
+        
+    def _ensure_snapshot(self) -> None:
+        """确保已为未修改的模板建立快照（文档已被修改时先重新加载）"""
+        if not self._loaded or (self._snapshot is None and self._dirty):
             self.load()
+        self._index_all()
+        if self._snapshot is None:
+            with self._profiler.phase("snapshot"):
+                self._snapshot = _TemplateSnapshot(self.document, self.tag_dict)
             
-        if self._replacer is None:
-            raise RuntimeError("Replacer not initialized")
+    def reset(self) -> 'WordWriter':
+        """将文档恢复到刚加载时的状态
+        
+        已通过 render() 建立快照时，从快照恢复 XML 和标签索引，不重新解析模板；
+        否则重新加载模板文件。
+        
+        Returns:
+            self，支持链式调用
+        """
+        if not self._loaded:
+            return self.load()
+        if not self._dirty:
+            return self
+        if self._snapshot is None:
+            return self.load()
             
-        self._replacer.replace_all(replace_dict, logs)
+        with self._profiler.phase("reset"):
+            self.document, self.tag_dict = self._snapshot.restore()
+        self._searcher = TagSearcher(self.document)
+        self._replacer = ContentReplacer(self.document, self.tag_dict, self._profiler)
+        self._dirty = False
         return self
         
-    def save(self, output_path: str) -> None:
+    def render(self, replace_dict: Union[Dict[str, Any], RenderPlan], logs: bool = False) -> bytes:
+        """渲染一条记录并返回 .docx 字节
+        
+        首次调用时为未修改的模板建立快照，之后每次渲染前从快照恢复，
+        因此同一个已加载的 WordWriter 可以连续渲染任意多条记录。
+        
+        Args:
+            replace_dict: 替换字典 {tag: value}，或 plan() 生成的渲染计划
+            logs: 是否打印日志
+            
+        Returns:
+            输出 .docx 文件的字节
+            
+        Example:
+            >>> writer = WordWriter("template.docx")
+            >>> for record in records:
+            ...     data = writer.render(record)
+            
+        Note:
+            开启 profile_memory 时，每次 render() 开始前清空 memory_report，
+            调用结束后报告只包含本条记录的各阶段。
+            
+        Raises:
+            PlanValidationError: 渲染计划存在致命问题（模板未被修改）
+        """
+        if isinstance(replace_dict, RenderPlan):
+            replace_dict = replace_dict.check().replace_dict
+        self._profiler.report.clear()
+        with self._profiler.session():
+            self._ensure_snapshot()
+            self.reset()
+            self.replace(replace_dict, logs)
+            stream = io.BytesIO()
+            self.save(stream)
+        return stream.getvalue()
+        
+    def save(self, output_path: Union[str, IO[bytes]], deterministic: Optional[bool] = None) -> None:
         """保存文档
         
         Args:
-            output_path: 输出文件路径
+            output_path: 输出文件路径或可写的二进制流
+            deterministic: 是否以确定性方式保存，默认使用构造时的设置
             
         Raises:
             RuntimeError: 文档未加载
@@ -360,11 +838,36 @@ class WordWriter:
         if not self._loaded or self.document is None:
             raise RuntimeError("文档未加载，请先调用 load() 方法")
             
-        self.document.save(output_path)
+        if deterministic is None:
+            deterministic = self.deterministic
+        with self._profiler.phase("save"):
+            if deterministic:
+                save_deterministic(self.document, output_path)
+            else:
+                self.document.save(output_path)
+            
+    @property
+    def render_options(self) -> Dict[str, Any]:
+        """影响输出字节的选项，计入渲染缓存键（见 cached_render）"""
+        return {"lazy_parts": self.lazy_parts, "normalize": self.normalize,
+                "deterministic": self.deterministic}
+        
+    @property
+    def memory_report(self) -> Optional[MemoryReport]:
+        """内存分析报告，未开启 profile_memory 时为 None
+        
+        Example:
+            >>> writer = WordWriter("template.docx", profile_memory=True)
+            >>> writer.replace(record).save("out.docx")
+            >>> print(writer.memory_report.format())
+        """
+        return self._profiler.report if self._profiler.enabled else None
         
     def get_tags(self) -> List[str]:
         """获取所有找到的标签列表
         
+        始终基于完整索引；若此前只做了定向搜索，会先对当前文档做完整搜索。
+        
         Returns:
             标签名称列表
             
@@ -373,12 +876,15 @@ class WordWriter:
         """
         if not self._loaded:
             self.load()
+        self._index_all()
             
         return list(self.tag_dict.keys())
         
     @classmethod
     def process(cls, template_path: str, output_path: str, 
-                replace_dict: Dict[str, str], logs: bool = True) -> None:
+                replace_dict: Dict[str, str], logs: bool = True,
+                cache: Optional[RenderCache] = None, deterministic: bool = False,
+                normalize: bool = False) -> None:
         """一步完成模板处理（类方法）
         
         这是一个便捷方法，等同于旧的函数式 API。
@@ -388,12 +894,27 @@ class WordWriter:
             output_path: 输出文件路径
             replace_dict: 替换字典
             logs: 是否打印日志
+            cache: 可选的渲染缓存（MemoryCache/DiskCache），相同的模板、替换字典
+                及引用文件内容命中缓存时直接写出缓存的字节
+            deterministic: 是否以确定性方式保存
+            normalize: 是否在搜索标签前规范化 run
             
         Example:
             >>> WordWriter.process("template.docx", "output.docx",
             ...                     {"#[title]#": "报告"})
         """
-        cls(template_path).replace(replace_dict, logs).save(output_path)
+        writer = cls(template_path, deterministic=deterministic, normalize=normalize)
+        if cache is None:
+            writer.replace(replace_dict, logs).save(output_path)
+            return
+            
+        data = cached_render(
+            cache, template_path, replace_dict,
+            lambda stream: writer.replace(replace_dict, logs).save(stream),
+            writer.render_options,
+        )
+        with open(output_path, "wb") as f:
+            f.write(data)
         
     def __enter__(self) -> 'WordWriter':
         """上下文管理器入口"""
@@ -410,3 +931,87 @@ class WordWriter:
         status = "loaded" if self._loaded else "not loaded"
         tags_count = len(self.tag_dict) if self._loaded else 0
         return f"<WordWriter(template='{self.template_path}', status='{status}', tags={tags_count})>"
+
+
+# ============================================================================
+# 多线程共享模板
+# ============================================================================
+
+class SharedTemplate:
+    """可在多个线程间共享的已加载模板
+    
+    模板只加载和索引一次，之后保持只读。每次渲染在锁内深拷贝一份文档包
+    （lxml 在 C 层复制元素树），把序列化的标签索引重新绑定到副本上，
+    锁外的替换和保存只访问该线程私有的副本，因此 render() 可以被线程池
+    并发调用。默认延迟解析不含标签的部件（见 load_document），这些部件
+    只以字节形式复制，副本的开销主要是含标签部件的元素树。
+    
+    WordWriter、TagSearcher、ContentReplacer 本身不是线程安全的，
+    不应在线程间共享同一个实例。
+    
+    Attributes:
+        template_path: 模板文件路径
+        
+    Example:
+        >>> template = SharedTemplate("template.docx")
+        >>> with ThreadPoolExecutor(8) as executor:
+        ...     outputs = list(executor.map(template.render, records))
+    """
+    
+    def __init__(self, template_path: str, lazy_parts: bool = True, deterministic: bool = False,
+                 normalize: bool = False):
+        """加载并索引模板
+        
+        Args:
+            template_path: 模板文件路径
+            lazy_parts: 是否延迟解析不含标签的部件
+            deterministic: 渲染结果是否以确定性方式保存
+            normalize: 是否在搜索标签前规范化 run
+            
+        Raises:
+            FileNotFoundError: 模板文件不存在
+        """
+        self.template_path = template_path
+        self.lazy_parts = lazy_parts
+        self.deterministic = deterministic
+        self.normalize = normalize
+        writer = WordWriter(template_path, lazy_parts, normalize=normalize).load()
+        self._document = writer.document
+        self._index = _index_state(writer.tag_dict)
+        self._lock = threading.Lock()
+        
+    @property
+    def tags(self) -> List[str]:
+        """模板中的标签列表"""
+        return list(self._index)
+        
+    def writer(self) -> WordWriter:
+        """创建一个私有的 WordWriter（基于模板副本，已建立完整索引）
+        
+        Returns:
+            只应在当前线程中使用的 WordWriter 实例
+        """
+        # 深拷贝只读取原型；加锁避免多个线程同时在原型树上创建 lxml 代理对象
+        with self._lock:
+            document = _clone_document(self._document)
+        writer = WordWriter(self.template_path, self.lazy_parts, deterministic=self.deterministic,
+                            normalize=self.normalize)
+        writer._attach(document, tag_dict=_bind_index(self._index, parts_by_name(document)))
+        return writer
+        
+    def render(self, replace_dict: Dict[str, Any], logs: bool = False) -> bytes:
+        """渲染一条记录并返回 .docx 字节（线程安全）
+        
+        Args:
+            replace_dict: 替换字典 {tag: value}
+            logs: 是否打印日志
+            
+        Returns:
+            输出 .docx 文件的字节
+        """
+        stream = io.BytesIO()
+        self.writer().replace(replace_dict, logs).save(stream)
+        return stream.getvalue()
+        
+    def __repr__(self) -> str:
+        return f"<SharedTemplate(template='{self.template_path}', tags={len(self._index)})>"
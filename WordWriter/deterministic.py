@@ -0,0 +1,85 @@
+# coding=utf-8
+"""WordWriter 确定性输出模块
+
+python-docx 保存文档时以当前时间作为 zip 成员的时间戳，同一模板、同一
+替换字典两次保存得到的字节并不相同，无法按内容哈希去重或校验缓存。
+
+save_deterministic() 以相同的内容写出 .docx，但固定所有可能随时间和
+处理路径变化的部分：
+
+- zip 成员使用固定的时间戳（1980-01-01 00:00:00）、固定的属性和创建系统
+- 部件按部件名排序写出，关系（.rels）按 rId 排序
+- 插入图片的部件名和关系 ID 由 python-docx 按最小可用编号分配，与插入
+  顺序一一对应；从快照恢复（render()）时会丢弃上一条记录新增的关系和
+  图片部件，因此同一输入无论首次渲染还是重复渲染都得到相同的编号
+
+相同的输入（模板、替换字典及引用的文件）在相同版本的 python-docx/zlib
+下得到完全相同的字节。
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+import re
+import zipfile
+from typing import IO, Any, List, Union
+
+from docx.opc.oxml import CT_Relationships
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from docx.opc.pkgwriter import _ContentTypesItem
+
+
+# zip 格式可表示的最早时间
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+_RID_NUMBER = re.compile(r"(\d+)$")
+
+
+def _rid_key(rId: str) -> Any:
+    """关系 ID 的排序键（rId2 排在 rId10 之前）"""
+    match = _RID_NUMBER.search(rId)
+    return (0, int(match.group(1)), rId) if match else (1, 0, rId)
+
+
+def rels_xml(rels: Any) -> bytes:
+    """按 rId 排序序列化关系集合
+
+    Args:
+        rels: python-docx 的关系集合（part.rels 或 package.rels）
+
+    Returns:
+        .rels 文件的 XML
+    """
+    rels_elm = CT_Relationships.new()
+    for rel in sorted(rels.values(), key=lambda rel: _rid_key(rel.rId)):
+        rels_elm.add_rel(rel.rId, rel.reltype, rel.target_ref, rel.is_external)
+    return rels_elm.xml
+
+
+def _write(zf: zipfile.ZipFile, name: str, data: bytes) -> None:
+    info = zipfile.ZipInfo(name, FIXED_DATE_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.create_system = 0
+    info.external_attr = 0
+    zf.writestr(info, data)
+
+
+def save_deterministic(document: Any, target: Union[str, IO[bytes]]) -> None:
+    """以确定性方式保存文档
+
+    Args:
+        document: Word 文档对象
+        target: 输出文件路径或可写的二进制流
+    """
+    package = document.part.package
+    parts: List[Any] = sorted(package.parts, key=lambda part: str(part.partname))
+    for part in parts:
+        part.before_marshal()
+
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zf:
+        _write(zf, CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob)
+        _write(zf, PACKAGE_URI.rels_uri.membername, rels_xml(package.rels))
+        for part in parts:
+            _write(zf, part.partname.membername, part.blob)
+            if len(part.rels):
+                _write(zf, part.partname.rels_uri.membername, rels_xml(part.rels))
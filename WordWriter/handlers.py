@@ -0,0 +1,367 @@
+# coding=utf-8
+"""WordWriter 标签处理器模块
+
+每种标签由一个处理器负责替换，处理器按标签前缀登记在注册表中。标签名
+到处理器的解析结果按标签名缓存，TagSearcher 建立索引时即为每个标签
+完成解析，渲染时只做一次字典查找。函数式 API 与 ContentReplacer 使用
+同一个注册表，新增标签类型只需登记处理器。
+
+处理器是无状态的单例，可在线程间共享；一次替换过程中需要延迟处理的
+数据（例如同一表格的多个 TABLE 标签）保存在 ReplaceContext 中，由
+flush() 统一处理。
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .constants import TagPrefix, SpecialValue, LogMessage
+from .locations import (
+    TagLocation, TextLocation, TableLocation, XmlTextLocation, RangeLocation, closing_tag,
+)
+from .profiling import MemoryProfiler
+from .richtext import RichText
+from .WordWriter import (
+    replace_paragraph_string,
+    replace_paragraph_rich,
+    replace_text_box_string,
+    replace_xml_text_string,
+    insert_picture,
+    fill_table_locations,
+    remove_ele,
+    remove_range,
+    condition_holds,
+    clone_paragraph,
+    search_tag,
+)
+
+
+class ReplaceContext:
+    """一次替换过程（ContentReplacer.replace_all）的上下文
+
+    Attributes:
+        document: Word 文档对象
+        tag_dict: 标签字典
+        profiler: 内存分析器
+        logs: 是否打印日志
+        handlers: 本次替换使用的处理器注册表
+        values: 本次替换的替换字典（列表项未提供的标签取其中的值）
+        detached: 本轮处理是否删除了文档内容（之后会从索引中移除失效的位置）
+    """
+
+    def __init__(self, document: Any, tag_dict: Dict[str, List[TagLocation]],
+                 profiler: Optional[MemoryProfiler] = None, logs: bool = True,
+                 handlers: Optional['HandlerRegistry'] = None,
+                 values: Optional[Dict[str, Any]] = None):
+        self.document = document
+        self.tag_dict = tag_dict
+        self.profiler = profiler or MemoryProfiler(enabled=False)
+        self.logs = logs
+        self.handlers = handlers or registry
+        self.values = values or {}
+        self.detached = False
+        self._pending: Dict[int, List[Any]] = {}
+        self._paragraphs: Optional[Dict[Any, List[TextLocation]]] = None
+
+    def pending(self, handler: 'TagHandler') -> List[Any]:
+        """处理器在本次替换中延迟处理的数据列表（供 flush() 使用）"""
+        return self._pending.setdefault(id(handler), [])
+
+    def shift_runs(self, location: TextLocation, count: int) -> None:
+        """在标签位置处插入（或删除）了 run 后，移动同一段落中其后标签的 run 下标
+
+        Args:
+            location: 插入 run 的标签位置
+            count: run 数的变化，删除 run 时为负数
+        """
+        if self._paragraphs is None:
+            self._paragraphs = {}
+            for locations in self.tag_dict.values():
+                for other in locations:
+                    if isinstance(other, TextLocation):
+                        self._paragraphs.setdefault(other.element, []).append(other)
+        for other in self._paragraphs.get(location.element, ()):
+            if other.start >= location.end:
+                other.start += count
+                other.end += count
+
+
+class TagHandler:
+    """标签处理器基类
+
+    子类至少实现 replace()；需要一次处理全部位置（例如批量生成二维码
+    图片后再插入）时覆盖 replace_batch()。
+
+    Attributes:
+        name: 处理器名称（渲染计划中使用）
+        order: 处理顺序，数值小的先处理（条件区间和列表为 -1，其余为 0）
+        story_only: 是否只在正文及页眉页脚中处理；为 False 时脚注、图表
+            等部件中的同名标签也交给该处理器
+    """
+
+    name = "custom"
+    order = 0
+    story_only = True
+
+    def replace(self, tag: str, location: TagLocation, value: Any, context: ReplaceContext) -> None:
+        """替换标签的一个位置
+
+        Args:
+            tag: 标签名称
+            location: 标签位置
+            value: 替换值
+            context: 替换上下文
+        """
+        raise NotImplementedError
+
+    def replace_batch(self, tag: str, locations: List[TagLocation], value: Any,
+                      context: ReplaceContext) -> None:
+        """替换标签的全部位置，默认逐个调用 replace()"""
+        for location in locations:
+            self.replace(tag, location, value, context)
+
+    def deferred(self, value: Any) -> bool:
+        """替换是否延迟到 flush() 执行（此时内存分析阶段在 flush() 中记录）"""
+        return False
+
+    def flush(self, context: ReplaceContext) -> None:
+        """全部标签处理完成后调用，处理延迟的数据"""
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}(name={self.name!r})>"
+
+
+class TextHandler(TagHandler):
+    """文本标签：替换段落中的标签文本，其他部件中替换元素文本
+
+    RichText 值在段落中展开为多个带格式的 run，在其他部件中按纯文本替换。
+    只处理段落（TextLocation）和其他部件（XmlTextLocation）中的位置。
+    """
+
+    name = "text"
+    story_only = False
+
+    def replace(self, tag: str, location: TagLocation, value: Any, context: ReplaceContext) -> None:
+        if isinstance(location, XmlTextLocation):
+            replace_xml_text_string(location.element, tag, str(value) if isinstance(value, RichText) else value)
+        elif not isinstance(location, TextLocation):
+            raise TypeError(f"文本处理器不支持 {type(location).__name__} 位置: {tag}")
+        elif isinstance(value, RichText):
+            added = replace_paragraph_rich(location.runs(), value.spans)
+            if added:
+                context.shift_runs(location, added)
+        else:
+            replace_paragraph_string(location.runs(), value)
+
+
+class TextboxHandler(TagHandler):
+    """文本框标签（TX），同时更新 mc:Fallback 副本"""
+
+    name = "textbox"
+
+    def replace(self, tag: str, location: TagLocation, value: Any, context: ReplaceContext) -> None:
+        for element in location.elements():
+            replace_text_box_string(element, value)
+
+
+class ImageHandler(TagHandler):
+    """图片标签（IMAGE/TBIMG）"""
+
+    name = "image"
+
+    def replace(self, tag: str, location: TagLocation, value: Any, context: ReplaceContext) -> None:
+        insert_picture(location.runs(), tag, value)
+
+
+def is_delete_table(value: Any) -> bool:
+    """是否为删除表格的特殊值"""
+    # 表格值也可以是 DataFrame/Arrow 表，不能直接与字符串比较
+    return isinstance(value, str) and value == SpecialValue.DELETE_TABLE
+
+
+class TableHandler(TagHandler):
+    """表格标签（TABLE）
+
+    删除表格立即执行；填充延迟到 flush()，同一表格的多个标签一起填充，
+    每个表格只删除一次空行、设置一次边框。
+    """
+
+    name = "table"
+
+    def replace_batch(self, tag: str, locations: List[TagLocation], value: Any,
+                      context: ReplaceContext) -> None:
+        if is_delete_table(value):
+            for location in locations:
+                remove_ele(location.table())
+        else:
+            context.pending(self).extend((tag, location, value) for location in locations)
+
+    def deferred(self, value: Any) -> bool:
+        return not is_delete_table(value)
+
+    def flush(self, context: ReplaceContext) -> None:
+        groups: Dict[Any, List[Tuple[str, TableLocation, Any]]] = {}
+        for fill in context.pending(self):
+            groups.setdefault(fill[1].element, []).append(fill)
+        del context.pending(self)[:]
+        for items in groups.values():
+            # 内存分析阶段以表格中的标签命名
+            with context.profiler.phase(", ".join(dict.fromkeys(tag for tag, _, _ in items))):
+                fill_table_locations([(location, value) for _, location, value in items])
+
+
+class ConditionHandler(TagHandler):
+    """条件区间标签（IF），在其他标签之前处理"""
+
+    name = "condition"
+    order = -1
+    story_only = False
+
+    def replace(self, tag: str, location: TagLocation, value: Any, context: ReplaceContext) -> None:
+        if isinstance(location, RangeLocation):
+            keep = condition_holds(value)
+            remove_range(location, keep)
+            context.detached = context.detached or not keep
+        elif context.logs:
+            print(LogMessage.ERROR_TAG + tag + " 缺少结束标签 " + closing_tag(tag))
+
+
+def list_items(value: Any) -> List[Any]:
+    """列表标签的列表项；字符串（如 CSV 记录中的值）按行拆分
+
+    Raises:
+        TypeError: 值不是列表、元组或字符串
+    """
+    if isinstance(value, str):
+        return value.splitlines()
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    raise TypeError(f"列表标签的值应为列表，实际为 {type(value).__name__}")
+
+
+class ListHandler(TagHandler):
+    """列表标签（LIST），每个列表项复制一份标签所在的段落
+
+    所有副本一次性替换原段落，段落样式和编号随之复制；空列表删除段落。
+    列表项为字符串时替换副本中的 LIST 标签；为字典时，字典中的标签在副本
+    中按各自的处理器替换（文本、图片及自定义处理器），LIST 标签本身取
+    字典中的同名值，缺省为空。表格、文本框、条件区间及嵌套列表标签按文本
+    替换。段落中列表项未提供的文本、图片及自定义处理器标签取替换字典中的
+    值（每个副本相同），替换字典中也没有时保持原样。
+    """
+
+    name = "list"
+    order = -1
+
+    @staticmethod
+    def _fills(tag: str, context: ReplaceContext) -> bool:
+        """替换字典中标签的值能否填入副本（条件区间、列表、表格和文本框标签的值不能）"""
+        handler = context.handlers.resolve(tag)
+        return handler.order >= 0 and not isinstance(handler, (TableHandler, TextboxHandler))
+
+    def replace(self, tag: str, location: TagLocation, value: Any, context: ReplaceContext) -> None:
+        items = list_items(value)
+        # 段落内的其他标签，run 下标在各副本中相同
+        inner: Dict[str, List[TagLocation]] = {}
+        search_tag(inner, [location.paragraph()])
+        inner[tag] = [location]
+        clones = clone_paragraph(location.element, len(items))
+        context.detached = True
+        for clone, item in zip(clones, items):
+            if isinstance(item, dict):
+                fields = {tag: "", **item}
+            else:
+                fields = {tag: item if isinstance(item, RichText) else str(item)}
+            for key in inner:
+                if key not in fields and key in context.values and self._fills(key, context):
+                    fields[key] = context.values[key]
+            # 从段落末尾向前替换，富文本插入的 run 不影响尚未替换的标签的下标
+            steps = []
+            for key, field in fields.items():
+                handler = context.handlers.resolve(key)
+                if not self._fills(key, context):
+                    handler = context.handlers.default
+                    field = field if isinstance(field, RichText) else str(field)
+                steps.extend((found, key, field, handler) for found in inner.get(key, ())
+                             if isinstance(found, TextLocation))
+            for found, key, field, handler in sorted(steps, key=lambda step: -step[0].start):
+                handler.replace(key, type(found)(clone, found.part, found.start, found.end),
+                                field, context)
+
+
+class HandlerRegistry:
+    """标签处理器注册表
+
+    按标签前缀查找处理器：前缀出现在标签中的任意位置即匹配（文本框标签
+    以整个 run 的文本为名，前面可能有其他文字），多个前缀匹配时取最长的
+    前缀，没有匹配时使用默认处理器（文本）。解析结果按标签名缓存，登记新处理器时清空缓存。
+
+    Example:
+        >>> class QRCodeHandler(TagHandler):
+        ...     name = "qrcode"
+        ...     def replace(self, tag, location, value, context):
+        ...         insert_picture(location.runs(), tag, make_qrcode_png(value))
+        >>> registry.register("#[QR", QRCodeHandler())
+    """
+
+    def __init__(self, default: Optional[TagHandler] = None):
+        self.default = default or TextHandler()
+        self._handlers: Dict[str, TagHandler] = {}
+        self._resolved: Dict[str, TagHandler] = {}
+        self._lock = threading.Lock()
+
+    def register(self, prefix: str, handler: TagHandler) -> None:
+        """登记处理器
+
+        Args:
+            prefix: 标签前缀，如 "#[QR"；已登记的前缀会被覆盖
+            handler: 处理器实例
+        """
+        if not prefix.startswith(TagPrefix.TAG_START):
+            raise ValueError(f"标签前缀必须以 {TagPrefix.TAG_START} 开头: {prefix}")
+        with self._lock:
+            self._handlers[prefix] = handler
+            self._resolved = {}
+
+    def unregister(self, prefix: str) -> None:
+        """移除前缀对应的处理器"""
+        with self._lock:
+            self._handlers.pop(prefix, None)
+            self._resolved = {}
+
+    def resolve(self, tag: str) -> TagHandler:
+        """获取标签的处理器
+
+        Args:
+            tag: 标签名称
+
+        Returns:
+            处理器
+        """
+        handler = self._resolved.get(tag)
+        if handler is None:
+            matches = [prefix for prefix in self._handlers if prefix in tag]
+            handler = self._handlers[max(matches, key=len)] if matches else self.default
+            self._resolved[tag] = handler
+        return handler
+
+    def prefixes(self) -> List[str]:
+        """已登记的前缀"""
+        return list(self._handlers)
+
+
+# 默认注册表，函数式 API 和 ContentReplacer 默认使用
+registry = HandlerRegistry()
+registry.register(TagPrefix.TABLE, TableHandler())
+registry.register(TagPrefix.TEXTBOX, TextboxHandler())
+registry.register(TagPrefix.IMAGE, ImageHandler())
+registry.register(TagPrefix.TABLE_IMAGE, ImageHandler())
+registry.register(TagPrefix.IF + "-", ConditionHandler())
+registry.register(TagPrefix.LIST + "-", ListHandler())
+
+
+def register_handler(prefix: str, handler: TagHandler) -> None:
+    """在默认注册表中登记处理器（见 HandlerRegistry.register）"""
+    registry.register(prefix, handler)
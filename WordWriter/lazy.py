@@ -0,0 +1,119 @@
+# coding=utf-8
+"""WordWriter 延迟解析模块
+
+python-docx 打开文档时会解析所有已知类型的 XML 部件（正文、样式、编号、
+设置、全部页眉页脚等）。对于样式、编号等部件很大而其中没有标签的模板，
+这些解析大多是浪费。
+
+load_document() 在构建部件前先对每个 XML 部件的原始字节做一次预筛选：
+可能含有标签的部件照常解析；其余部件以 LazyXmlPart 保存原始字节，
+保存文档时原样写出。LazyXmlPart 在首次被访问 element 等 XmlPart 属性时
+（例如设置段落样式时读取样式部件）才解析，并就地转换为原本的部件类。
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+from typing import IO, Any, Type, Union
+
+from docx.document import Document
+from docx.opc.package import PartFactory, Unmarshaller
+from docx.opc.part import Part, XmlPart
+from docx.opc.pkgreader import PackageReader
+from docx.opc.constants import CONTENT_TYPE as CT
+from docx.oxml import parse_xml
+from docx.package import Package
+
+from .constants import TagPrefix
+
+
+# 标签必然包含的字符。标签可能在 "#" 与 "[" 之间被拆分到不同的 run，
+# 因此只要求各字符分别出现
+_TAG_BYTES = tuple(sorted({char.encode() for char in TagPrefix.TAG_START + TagPrefix.TAG_END}))
+
+
+def may_contain_tags(blob: bytes) -> bool:
+    """按原始字节判断部件是否可能含有标签
+
+    Args:
+        blob: 部件的 XML 字节
+
+    Returns:
+        可能含有标签时返回 True；返回 False 时部件中一定没有标签
+    """
+    return all(char in blob for char in _TAG_BYTES)
+
+
+class LazyXmlPart(Part):
+    """尚未解析的 XML 部件
+
+    只保存原始字节和原本的部件类，blob 直接返回原始字节。访问 Part 上
+    不存在的属性（element、styles 等）时解析字节并将自身转换为原本的
+    部件类，包中所有指向该部件的关系保持不变。
+    """
+
+    def __init__(self, partname: Any, content_type: str, blob: bytes, package: Any,
+                 part_class: Type[XmlPart]):
+        super().__init__(partname, content_type, blob, package)
+        self._part_class = part_class
+
+    def parse(self) -> XmlPart:
+        """解析部件并转换为原本的部件类
+
+        Returns:
+            同一个部件对象
+        """
+        part_class = self.__dict__.pop("_part_class")
+        # 由原本的部件类加载，保留其构造函数设置的属性（如 SettingsPart._settings）；
+        # 已加载的关系（rels）仍保存在当前对象中
+        loaded = part_class.load(self.partname, self.content_type, self._blob, self.package)
+        self.__class__ = part_class
+        self.__dict__.update(loaded.__dict__)
+        return self
+
+    def __getattr__(self, name: str) -> Any:
+        # 只在常规属性查找失败时调用；拷贝、序列化过程中对象尚未初始化时不解析
+        if name.startswith("__") or "_part_class" not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.parse(), name)
+
+
+def is_unparsed(part: Any) -> bool:
+    """部件是否仍以原始字节保存（延迟解析且尚未被访问）"""
+    return isinstance(part, LazyXmlPart)
+
+
+def _part_factory(partname: Any, content_type: str, reltype: str, blob: bytes, package: Any) -> Part:
+    """部件工厂：与 python-docx 的 PartFactory 选择相同的部件类，
+    其中不含标签的 XML 部件延迟解析"""
+    part_class = None
+    if PartFactory.part_class_selector is not None:
+        part_class = PartFactory.part_class_selector(content_type, reltype)
+    if part_class is None:
+        part_class = PartFactory._part_cls_for(content_type)
+    if issubclass(part_class, XmlPart) and not may_contain_tags(blob):
+        return LazyXmlPart(partname, content_type, blob, package, part_class)
+    return part_class.load(partname, content_type, blob, package)
+
+
+def load_document(docx: Union[str, IO[bytes]]) -> Document:
+    """打开文档，不含标签的 XML 部件延迟解析
+
+    与 docx.Document() 的区别仅在于部件的解析时机；未被访问的部件保存时
+    原样写出原始字节。
+
+    Args:
+        docx: .docx 文件路径或二进制流
+
+    Returns:
+        Word 文档对象
+
+    Raises:
+        ValueError: 不是 Word 文档
+    """
+    package = Package()
+    Unmarshaller.unmarshal(PackageReader.from_file(docx), package, _part_factory)
+    document_part = package.main_document_part
+    if document_part.content_type != CT.WML_DOCUMENT_MAIN:
+        raise ValueError(f"file '{docx}' is not a Word file, content type is '{document_part.content_type}'")
+    return document_part.document
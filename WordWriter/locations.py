@@ -0,0 +1,383 @@
+# coding=utf-8
+"""WordWriter 标签位置模块
+
+此模块定义标签命中位置的紧凑记录。每条记录只保存 XML 元素、所属部件
+以及少量整数（run 下标区间、行列号），python-docx 代理对象（Paragraph、
+Run、Table）在替换时按需创建，不再随标签索引常驻内存。
+
+位置记录可以 pickle：序列化时元素被转换为 (部件名, 子元素下标路径) 地址，
+反序列化后调用 bind() 重新绑定到文档，便于缓存标签索引或传递给工作进程。
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from docx.opc.part import XmlPart
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from docx.text.run import Run
+
+from .constants import TagPrefix, XMLNamespace
+
+
+# 文本框检索使用的元素标签
+_CHOICE = f"{{{XMLNamespace.MARKUP_COMPATIBILITY}}}Choice"
+_FALLBACK = f"{{{XMLNamespace.MARKUP_COMPATIBILITY}}}Fallback"
+_TXBX_CONTENT = qn("w:txbxContent")
+_RUN = qn("w:r")
+
+
+class _PartParent:
+    """仅提供 part 属性的父对象，供 python-docx 代理对象解析所属部件"""
+
+    __slots__ = ("part",)
+
+    def __init__(self, part: Any):
+        self.part = part
+
+
+def element_path(element: Any) -> Tuple[int, ...]:
+    """计算元素从所在树根元素出发的子元素下标路径
+
+    Args:
+        element: lxml 元素
+
+    Returns:
+        下标路径元组
+    """
+    path = []
+    parent = element.getparent()
+    while parent is not None:
+        path.append(parent.index(element))
+        element = parent
+        parent = element.getparent()
+    path.reverse()
+    return tuple(path)
+
+
+def resolve_path(root: Any, path: Tuple[int, ...]) -> Any:
+    """按下标路径从根元素定位元素"""
+    element = root
+    for idx in path:
+        element = element[idx]
+    return element
+
+
+class TagLocation:
+    """标签位置基类
+
+    Attributes:
+        element: 标签所在的 XML 元素
+        part: 元素所属的文档部件（DocumentPart、HeaderPart 等）
+    """
+
+    __slots__ = ("element", "part", "_address")
+
+    def __init__(self, element: Any, part: Any):
+        self.element = element
+        self.part = part
+        self._address = None
+
+    @classmethod
+    def _state_slots(cls) -> List[str]:
+        """除 element/part/_address 外需要序列化的属性"""
+        names = []
+        for klass in reversed(cls.__mro__):
+            for name in getattr(klass, "__slots__", ()):
+                if name not in ("element", "part", "_address"):
+                    names.append(name)
+        return names
+
+    def address(self) -> Tuple[str, Tuple[int, ...]]:
+        """元素地址 (部件名, 子元素下标路径)"""
+        if self.element is None:
+            return self._address
+        return str(self.part.partname), element_path(self.element)
+
+    def bind(self, parts: Dict[str, Any]) -> 'TagLocation':
+        """将反序列化得到的位置重新绑定到文档
+
+        Args:
+            parts: {部件名: 部件}，可由 parts_by_name(document) 获得
+
+        Returns:
+            self
+        """
+        if self.element is None:
+            partname, path = self._address
+            self.part = parts[partname]
+            self.element = resolve_path(self.part.element, path)
+            self._address = None
+        return self
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = {name: getattr(self, name) for name in self._state_slots()}
+        state["address"] = self.address()
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state = dict(state)
+        self.element = None
+        self.part = None
+        self._address = state.pop("address")
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._state_slots())
+        return f"<{self.__class__.__name__}({fields})>"
+
+
+class TextLocation(TagLocation):
+    """段落文本中的标签位置
+
+    标签占据段落中 w:r 元素下标区间 [start, end)。
+
+    Attributes:
+        element: w:p 元素
+        start: 起始 run 下标
+        end: 结束 run 下标（不含）
+    """
+
+    __slots__ = ("start", "end")
+
+    def __init__(self, element: Any, part: Any, start: int, end: int):
+        super().__init__(element, part)
+        self.start = start
+        self.end = end
+
+    def paragraph(self) -> Paragraph:
+        """创建段落代理对象"""
+        return Paragraph(self.element, _PartParent(self.part))
+
+    def runs(self) -> List[Run]:
+        """创建标签所占 run 的代理对象列表"""
+        paragraph = self.paragraph()
+        return [Run(r, paragraph) for r in self.element.r_lst[self.start:self.end]]
+
+    def __getitem__(self, index: int) -> Any:
+        # 兼容旧的 [paragraph, run_list] 列表形式
+        return (self.paragraph, self.runs)[index]()
+
+
+class ImageLocation(TextLocation):
+    """图片标签位置（IMAGE/TBIMG），结构与 TextLocation 相同"""
+
+    __slots__ = ()
+
+
+class TableLocation(TagLocation):
+    """表格填充标签位置
+
+    Attributes:
+        element: w:tbl 元素
+        row: 标签所在行号
+        col: 标签所在列号
+    """
+
+    __slots__ = ("row", "col")
+
+    def __init__(self, element: Any, part: Any, row: int, col: int):
+        super().__init__(element, part)
+        self.row = row
+        self.col = col
+
+    def table(self) -> Table:
+        """创建表格代理对象"""
+        return Table(self.element, _PartParent(self.part))
+
+    def __getitem__(self, index: int) -> Any:
+        # 兼容旧的 [table, row_idx, col_idx] 列表形式
+        return (self.table(), self.row, self.col)[index]
+
+
+def textbox_runs(root: Any) -> List[Any]:
+    """获取部件中所有文本框内的 w:r 元素
+
+    使用 mc:AlternateContent 的文本框在 mc:Choice（DrawingML）和
+    mc:Fallback（VML）中各保存一份内容，这里只返回 Choice 一侧，
+    Fallback 副本由 TextboxLocation.elements() 按下标找回。
+
+    Args:
+        root: 部件根元素
+
+    Returns:
+        w:r 元素列表（文档顺序，每个元素只出现一次）
+    """
+    runs = []
+    for content in root.iter(_TXBX_CONTENT):
+        # 嵌套文本框已包含在外层文本框的遍历中，Fallback 副本单独处理
+        if next(content.iterancestors(_TXBX_CONTENT, _FALLBACK), None) is not None:
+            continue
+        runs.extend(content.iter(_RUN))
+    return runs
+
+
+def fallback_of(run: Any) -> Optional[Any]:
+    """获取 run 所在 mc:Choice 对应的 mc:Fallback 元素
+
+    Args:
+        run: mc:Choice 文本框中的 w:r 元素
+
+    Returns:
+        mc:Fallback 元素，run 不在 AlternateContent 中时返回 None
+    """
+    choice = next(run.iterancestors(_CHOICE), None)
+    if choice is None:
+        return None
+    for sibling in choice.itersiblings():
+        if sibling.tag == _FALLBACK:
+            return sibling
+    return None
+
+
+def fallback_runs(fallback: Any) -> List[Any]:
+    """获取 mc:Fallback 中文本框内的 w:r 元素列表"""
+    # 嵌套文本框的 run 会被外层重复遍历，按出现顺序去重
+    return list(dict.fromkeys(run for content in fallback.iter(_TXBX_CONTENT)
+                              for run in content.iter(_RUN)))
+
+
+class TextboxLocation(TagLocation):
+    """文本框标签位置
+
+    Attributes:
+        element: 文本框中包含标签的 w:r 元素（mc:Choice 一侧）
+        fallback: mc:Fallback 副本中对应 run 的下标（见 fallback_runs()），
+            没有副本时为 -1
+    """
+
+    __slots__ = ("fallback",)
+
+    def __init__(self, element: Any, part: Any, fallback: int = -1):
+        super().__init__(element, part)
+        self.fallback = fallback
+
+    def elements(self) -> List[Any]:
+        """标签所在的全部 w:r 元素，包括 Fallback 副本"""
+        if self.fallback < 0:
+            return [self.element]
+        return [self.element, fallback_runs(fallback_of(self.element))[self.fallback]]
+
+    def __iter__(self):
+        # 兼容旧的直接保存 XML 元素的形式
+        return iter(self.element)
+
+
+class XmlTextLocation(TagLocation):
+    """非 WordprocessingML 部件（如图表）中的标签位置
+
+    标签完整位于某个元素的文本中，例如图表标题的 a:t、缓存数据的 c:v。
+
+    Attributes:
+        element: 文本（element.text）中包含标签的元素
+    """
+
+    __slots__ = ()
+
+
+class RangeLocation(TagLocation):
+    """条件区间位置（#[IF-名称]# … #[/IF-名称]#）
+
+    起止标签所在的段落是同一父元素（正文、单元格、页眉页脚等）的子元素，
+    区间为两个段落及其间的全部兄弟元素（段落、表格、含图片的段落等）。
+
+    Attributes:
+        element: 起始标签所在的 w:p 元素
+        end: 结束标签所在的 w:p 元素
+    """
+
+    __slots__ = ("end",)
+
+    def __init__(self, element: Any, part: Any, end: Any):
+        super().__init__(element, part)
+        self.end = end
+
+    def elements(self) -> List[Any]:
+        """区间内的全部元素（文档顺序，含起止段落）"""
+        elements = [self.element]
+        if self.end is not self.element:
+            for sibling in self.element.itersiblings():
+                elements.append(sibling)
+                if sibling is self.end:
+                    break
+        return elements
+
+    def bind(self, parts: Dict[str, Any]) -> 'RangeLocation':
+        super().bind(parts)
+        if isinstance(self.end, tuple):
+            self.end = resolve_path(self.part.element, self.end)
+        return self
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        if self.element is not None:
+            state["end"] = element_path(self.end)
+        return state
+
+
+def is_condition_tag(tag: str) -> bool:
+    """是否为条件区间的起始标签"""
+    return tag.startswith(TagPrefix.IF + "-")
+
+
+def closing_tag(tag: str) -> str:
+    """条件区间起始标签对应的结束标签（#[IF-名称]# -> #[/IF-名称]#）"""
+    return TagPrefix.END_IF + tag[len(TagPrefix.IF):]
+
+
+def pair_ranges(tag_dict: Dict[str, List[TagLocation]]) -> None:
+    """将条件区间的起止标签配对为 RangeLocation（就地修改标签字典）
+
+    同一父元素下的起止标签按文档顺序像括号一样配对，同名区间可以嵌套。
+    配对成功的结束标签从字典中移除；无法配对的起止标签保留原来的位置。
+
+    Args:
+        tag_dict: 标签字典
+    """
+    for tag in [tag for tag in tag_dict if is_condition_tag(tag)]:
+        end_tag = closing_tag(tag)
+        # {父元素: [(下标, 0 起始/1 结束, 位置), ...]}
+        events: Dict[Any, List[Tuple[int, int, TagLocation]]] = {}
+        for kind, locations in ((0, tag_dict[tag]), (1, tag_dict.get(end_tag, []))):
+            for location in locations:
+                if type(location) is not TextLocation:
+                    continue
+                parent = location.element.getparent()
+                events.setdefault(parent, []).append((parent.index(location.element), kind, location))
+
+        ranges: List[TagLocation] = []
+        paired = set()
+        for items in events.values():
+            stack = []
+            for _, kind, location in sorted(items, key=lambda item: item[:2]):
+                if kind == 0:
+                    stack.append(location)
+                elif stack:
+                    start = stack.pop()
+                    ranges.append(RangeLocation(start.element, start.part, location.element))
+                    paired.update((id(start), id(location)))
+
+        tag_dict[tag] = ranges + [location for location in tag_dict[tag] if id(location) not in paired]
+        unpaired = [location for location in tag_dict.get(end_tag, []) if id(location) not in paired]
+        if unpaired:
+            tag_dict[end_tag] = unpaired
+        else:
+            tag_dict.pop(end_tag, None)
+
+
+def parts_by_name(document: Any) -> Dict[str, Any]:
+    """获取文档包中所有 XML 部件 {部件名: 部件}
+
+    Args:
+        document: Word 文档对象
+
+    Returns:
+        部件字典
+    """
+    # 按类型判断：对延迟解析的部件调用 hasattr(part, "element") 会触发解析
+    return {str(part.partname): part for part in document.part.package.iter_parts()
+            if isinstance(part, XmlPart)}
@@ -0,0 +1,177 @@
+# coding=utf-8
+"""WordWriter run 规范化模块
+
+Word 会把格式相同的文本拆成很多 run（拼写检查标记、每次编辑的 rsid 等），
+标签因此常被拆到多个 run 中，搜索时要走跨 run 的慢路径，替换时也要在多个
+run 间调整偏移。
+
+normalize_document() 在加载模板后、搜索标签前对正文、页眉页脚等部件做一次
+规范化：
+
+- 删除 w:proofErr（拼写/语法检查标记）和 w:lastRenderedPageBreak（上次
+  排版的分页位置，Word 打开时重新计算）
+- 删除所有 rsid 属性（w:rsidR、w:rsidRPr、w:rsidRDefault 等修订会话标识）
+- 合并段落中相邻且 rPr 相同、只含文本的 run；合并不跨越标签边界，每个
+  run 中至多有一个标签开始和一个标签结束（标签搜索只记录 run 中的第一个
+  完整标签）
+
+规范化不改变文档的显示效果。文本框中的 run 不合并（TX 标签要求独占一个
+run）；含制表符、换行、图片、域代码等内容的 run 也不合并。
+
+规范化后的模板可以用 normalize_template() 另存，之后直接加载，无需每次
+重新规范化。
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+from typing import Any
+
+from docx import Document
+from docx.opc.part import XmlPart
+from docx.oxml.ns import nsmap, qn
+from lxml import etree
+
+from .constants import TagPrefix
+
+
+_W_P = qn("w:p")
+_W_R = qn("w:r")
+_W_T = qn("w:t")
+_W_RPR = qn("w:rPr")
+_W_TXBX = qn("w:txbxContent")
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+_RSID_PREFIX = "{%s}rsid" % nsmap["w"]
+
+# 可以直接删除的元素
+_REMOVABLE = (qn("w:proofErr"), qn("w:lastRenderedPageBreak"))
+
+# 需要规范化的部件（按根元素判断）
+_STORY_ROOTS = frozenset(qn(tag) for tag in ("w:document", "w:hdr", "w:ftr", "w:footnotes", "w:endnotes"))
+
+
+def _text_only(run: Any) -> bool:
+    """run 是否只含 rPr 和 w:t"""
+    return all(child.tag == _W_T or child.tag == _W_RPR for child in run)
+
+
+def _rpr_key(run: Any) -> bytes:
+    """run 格式的比较键（rPr 的序列化结果）"""
+    rpr = run.find(_W_RPR)
+    return etree.tostring(rpr) if rpr is not None else b""
+
+
+def _run_text(run: Any) -> str:
+    """run 中 w:t 的文本"""
+    return "".join(t.text or "" for t in run.iter(_W_T))
+
+
+def _mergeable(text: str) -> bool:
+    """合并后的文本是否仍能被标签搜索正确处理
+
+    每个 run 至多包含一个标签开始和一个标签结束，且结束不在开始之前，
+    否则一个 run 中会出现多个标签或上一个标签的结尾与下一个标签的开头。
+    """
+    start = text.count(TagPrefix.TAG_START)
+    end = text.count(TagPrefix.TAG_END)
+    if start > 1 or end > 1:
+        return False
+    return not (start and end and text.find(TagPrefix.TAG_END) < text.find(TagPrefix.TAG_START))
+
+
+def _merge_runs(paragraph: Any) -> int:
+    """合并段落中相邻且格式相同的纯文本 run
+
+    Returns:
+        合并掉的 run 数
+    """
+    merged = 0
+    previous = None
+    previous_key = None
+    previous_text = ""
+    for child in list(paragraph):
+        if child.tag != _W_R or not _text_only(child):
+            previous = None
+            continue
+        key = _rpr_key(child)
+        text = _run_text(child)
+        if previous is not None and key == previous_key and _mergeable(previous_text + text):
+            previous_text += text
+            texts = previous.findall(_W_T) + child.findall(_W_T)
+            if texts:
+                if texts[0].getparent() is not previous:
+                    # 前一个 run 没有 w:t，直接移过来
+                    previous.append(texts[0])
+                for t in texts[1:]:
+                    t.getparent().remove(t)
+                texts[0].text = previous_text
+                if previous_text != previous_text.strip():
+                    texts[0].set(_XML_SPACE, "preserve")
+            paragraph.remove(child)
+            merged += 1
+        else:
+            previous = child
+            previous_key = key
+            previous_text = text
+    return merged
+
+
+def normalize_element(root: Any) -> int:
+    """规范化一个部件的 XML 树
+
+    Args:
+        root: 部件的根元素
+
+    Returns:
+        合并掉的 run 数
+    """
+    for element in list(root.iter(*_REMOVABLE)):
+        element.getparent().remove(element)
+
+    for element in root.iter(tag=etree.Element):
+        for name in [name for name in element.attrib if name.startswith(_RSID_PREFIX)]:
+            del element.attrib[name]
+
+    textbox_paragraphs = set()
+    for textbox in root.iter(_W_TXBX):
+        textbox_paragraphs.update(textbox.iter(_W_P))
+
+    merged = 0
+    for paragraph in root.iter(_W_P):
+        if paragraph not in textbox_paragraphs:
+            merged += _merge_runs(paragraph)
+    return merged
+
+
+def normalize_document(document: Any) -> int:
+    """规范化文档中已解析的正文、页眉页脚、脚注和尾注部件
+
+    延迟解析（lazy_parts）时未解析的部件中没有标签，不做处理。
+
+    Args:
+        document: Word 文档对象
+
+    Returns:
+        合并掉的 run 数
+    """
+    merged = 0
+    for part in document.part.package.iter_parts():
+        if isinstance(part, XmlPart) and part.element.tag in _STORY_ROOTS:
+            merged += normalize_element(part.element)
+    return merged
+
+
+def normalize_template(template_path: str, output_path: str) -> int:
+    """规范化模板并另存
+
+    Args:
+        template_path: 模板文件路径
+        output_path: 规范化后的模板保存路径
+
+    Returns:
+        合并掉的 run 数
+    """
+    document = Document(template_path)
+    merged = normalize_document(document)
+    document.save(output_path)
+    return merged
@@ -0,0 +1,343 @@
+# coding=utf-8
+"""WordWriter 渲染计划模块
+
+在修改文档之前，把替换字典解析为渲染计划：确定每个标签的处理方式和
+命中位置数，并发校验所有外部输入（图片文件是否可读、能否识别；表格
+数据能否读取、列数是否超出模板表格），问题一次性汇总。校验通过的计划
+可以交给 WordWriter.replace()/render() 执行，也可重复执行；校验时读取的
+表格数据执行时直接使用，不再重复解析（表格文件命中校验器缓存时除外，
+缓存只保存行列数，执行时重新读取）。
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from docx.image.image import Image
+from docx.table import Table
+
+from .constants import SpecialValue
+from .handlers import HandlerRegistry, is_delete_table, list_items, registry
+from .locations import RangeLocation, TableLocation, closing_tag
+from .sources import TableSource, load_table_source
+
+
+# 内置处理器的名称（见 handlers 模块）
+HANDLER_TEXT = "text"
+HANDLER_TEXTBOX = "textbox"
+HANDLER_IMAGE = "image"
+HANDLER_TABLE = "table"
+HANDLER_DELETE_TABLE = "delete_table"
+HANDLER_CONDITION = "condition"
+HANDLER_LIST = "list"
+
+# 并发校验的最大线程数
+MAX_WORKERS = 8
+
+
+def _describe(error: BaseException) -> str:
+    """格式化异常描述"""
+    return f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+
+
+def handler_for(tag: str, value: Any, handlers: Optional[HandlerRegistry] = None) -> str:
+    """确定标签的处理方式（处理器名称，删除表格单独区分）"""
+    name = (handlers or registry).resolve(tag).name
+    if name == HANDLER_TABLE and is_delete_table(value):
+        return HANDLER_DELETE_TABLE
+    return name
+
+
+class PlanStep:
+    """渲染计划中的一个标签
+
+    Attributes:
+        tag: 标签名称
+        handler: 处理方式（HANDLER_*）
+        value: 替换值；表格为校验时读取的 TableSource
+        count: 模板中的命中位置数
+    """
+
+    __slots__ = ("tag", "handler", "value", "count")
+
+    def __init__(self, tag: str, handler: str, value: Any, count: int):
+        self.tag = tag
+        self.handler = handler
+        self.value = value
+        self.count = count
+
+    def __repr__(self) -> str:
+        return f"<PlanStep(tag={self.tag!r}, handler={self.handler!r}, count={self.count})>"
+
+
+class PlanIssue:
+    """校验发现的问题
+
+    Attributes:
+        tag: 标签名称
+        message: 问题描述
+        fatal: 是否阻止执行
+    """
+
+    __slots__ = ("tag", "message", "fatal")
+
+    def __init__(self, tag: str, message: str, fatal: bool = True):
+        self.tag = tag
+        self.message = message
+        self.fatal = fatal
+
+    def __str__(self) -> str:
+        return f"{self.tag}: {self.message}"
+
+    def __repr__(self) -> str:
+        return f"<PlanIssue(tag={self.tag!r}, message={self.message!r}, fatal={self.fatal})>"
+
+
+class PlanValidationError(ValueError):
+    """渲染计划未通过校验
+
+    Attributes:
+        issues: 阻止执行的问题列表
+    """
+
+    def __init__(self, issues: List[PlanIssue]):
+        self.issues = issues
+        super().__init__("; ".join(str(issue) for issue in issues))
+
+
+class RenderPlan:
+    """渲染计划
+
+    Attributes:
+        template_path: 模板文件路径
+        steps: 模板中存在的标签的处理步骤
+        missing: 模板中不存在的标签
+        issues: 校验发现的问题（含非致命问题）
+    """
+
+    def __init__(self, template_path: str, steps: List[PlanStep], missing: List[str],
+                 issues: List[PlanIssue], replace_dict: Dict[str, Any]):
+        self.template_path = template_path
+        self.steps = steps
+        self.missing = missing
+        self.issues = issues
+        self._replace_dict = replace_dict
+
+    @property
+    def errors(self) -> List[PlanIssue]:
+        """阻止执行的问题"""
+        return [issue for issue in self.issues if issue.fatal]
+
+    @property
+    def ok(self) -> bool:
+        """是否可以执行"""
+        return not self.errors
+
+    @property
+    def replace_dict(self) -> Dict[str, Any]:
+        """执行用的替换字典（表格值已替换为读取好的数据源）"""
+        return dict(self._replace_dict)
+
+    def check(self) -> 'RenderPlan':
+        """确认计划可以执行
+
+        Returns:
+            self
+
+        Raises:
+            PlanValidationError: 存在阻止执行的问题
+        """
+        if not self.ok:
+            raise PlanValidationError(self.errors)
+        return self
+
+    def __repr__(self) -> str:
+        return (f"<RenderPlan(template='{self.template_path}', steps={len(self.steps)}, "
+                f"missing={len(self.missing)}, errors={len(self.errors)})>")
+
+
+class InputValidator:
+    """外部输入校验器
+
+    文件类输入（图片、表格文件）的校验结果按路径缓存，批量渲染时同一文件
+    只校验一次。表格文件的缓存只保存行列数，不保留数据。可在多个计划间
+    共享，线程安全。
+
+    Attributes:
+        max_workers: 并发校验的最大线程数
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self.max_workers = max_workers
+        self._cache: Dict[Tuple[str, str], Tuple[Any, Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, kind: str, path: str, check: Any) -> Tuple[Any, Optional[str]]:
+        key = (kind, os.path.abspath(path))
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        result = check(path)
+        with self._lock:
+            self._cache[key] = result
+        return result
+
+    @staticmethod
+    def _check_image(path: str) -> Tuple[Any, Optional[str]]:
+        """读取图片头，返回 ((宽, 高) 像素, 错误描述)"""
+        try:
+            image = Image.from_file(path)
+        except Exception as e:
+            return None, f"无法识别的图片文件 {path}: {_describe(e)}"
+        return (image.px_width, image.px_height), None
+
+    def image(self, path: str) -> Tuple[Any, Optional[str]]:
+        """校验图片文件
+
+        Returns:
+            ((宽, 高) 像素, 错误描述)，没有错误时错误描述为 None
+        """
+        return self._cached("image", path, self._check_image)
+
+    @staticmethod
+    def _load_table(value: Any) -> Tuple[Any, Optional[str]]:
+        try:
+            source = load_table_source(value)
+            source.shape
+        except Exception as e:
+            return None, f"表格数据读取失败: {_describe(e)}"
+        return source, None
+
+    def table(self, value: Any) -> Tuple[Optional[TableSource], Tuple[int, int], Optional[str]]:
+        """读取并校验表格数据
+
+        Returns:
+            (数据源, (行数, 列数), 错误描述)；文件路径命中缓存时数据源为 None
+        """
+        if not isinstance(value, (str, os.PathLike)):
+            source, error = self._load_table(value)
+            return source, (source.shape if source is not None else (0, 0)), error
+        path = os.fspath(value)
+        key = ("table", os.path.abspath(path))
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return None, cached[0], cached[1]
+        source, error = self._load_table(path)
+        shape = source.shape if source is not None else (0, 0)
+        with self._lock:
+            self._cache[key] = (shape, error)
+        return source, shape, error
+
+    def run(self, tasks: List[Any]) -> List[Any]:
+        """并发执行校验任务（无参数的可调用对象），按顺序返回结果"""
+        if len(tasks) <= 1 or self.max_workers <= 1:
+            return [task() for task in tasks]
+        with ThreadPoolExecutor(min(self.max_workers, len(tasks))) as executor:
+            return list(executor.map(lambda task: task(), tasks))
+
+
+def _image_issue(tag: str, value: Any, validator: InputValidator, strict: bool) -> Optional[PlanIssue]:
+    """校验图片标签的值"""
+    if not isinstance(value, str):
+        return PlanIssue(tag, f"图片值应为文件路径，实际为 {type(value).__name__}")
+    if value == SpecialValue.DELETE_PARAGRAPH:
+        return None
+    if not os.path.isfile(value):
+        # 原有行为：路径不存在时按文本替换，严格模式下视为错误
+        if strict:
+            return PlanIssue(tag, f"图片文件不存在: {value}")
+        return PlanIssue(tag, f"图片文件不存在，将按文本替换: {value}", fatal=False)
+    if "(" in tag and ")" in tag:
+        try:
+            float(tag.split("(")[1].split(",")[0])
+            float(tag.split(")")[0].split(",")[1])
+        except (ValueError, IndexError):
+            return PlanIssue(tag, "图片尺寸格式错误，应为 (宽,高)")
+    _, error = validator.image(value)
+    return PlanIssue(tag, error) if error else None
+
+
+def _table_location_issue(tag: str, location: Any, shape: Tuple[int, int]) -> Optional[PlanIssue]:
+    """检查模板表格能否容纳填充的数据（只读取 XML）"""
+    if not isinstance(location, TableLocation):
+        return PlanIssue(tag, "TABLE 标签不在表格中")
+    rows, cols = shape
+    if rows == 0 or cols == 0:
+        return None
+    grid_cols = len(location.element.tblGrid.gridCol_lst)
+    if location.col + cols > grid_cols:
+        return PlanIssue(tag, f"表格数据有 {cols} 列，模板表格从第 {location.col + 1} 列起只有 "
+                              f"{grid_cols - location.col} 列")
+    # 标签行中标签及其右侧的单元格作为格式来源，首段落必须有 run
+    for cell in Table(location.element, None).rows[location.row].cells[location.col:]:
+        if not cell.paragraphs[0].runs:
+            return PlanIssue(tag, f"标签行（第 {location.row + 1} 行）中有空单元格，无法复制格式")
+    return None
+
+
+def build_plan(template_path: str, tag_dict: Dict[str, List[Any]], replace_dict: Dict[str, Any],
+               strict: bool = False, validator: Optional[InputValidator] = None) -> RenderPlan:
+    """生成并校验渲染计划，不修改文档
+
+    Args:
+        template_path: 模板文件路径
+        tag_dict: 模板的标签索引
+        replace_dict: 替换字典
+        strict: 为 True 时图片文件不存在也视为错误（默认按文本替换，仅作提示）
+        validator: 外部输入校验器，批量校验时共享以复用缓存
+
+    Returns:
+        渲染计划
+    """
+    validator = validator or InputValidator()
+    steps: List[PlanStep] = []
+    missing: List[str] = []
+    for tag, value in replace_dict.items():
+        if tag not in tag_dict:
+            missing.append(tag)
+            continue
+        steps.append(PlanStep(tag, handler_for(tag, value), value, len(tag_dict[tag])))
+
+    # 外部输入可能涉及磁盘读取和表格解析，并发执行
+    checked = [step for step in steps if step.handler in (HANDLER_IMAGE, HANDLER_TABLE)]
+    tasks = []
+    for step in checked:
+        if step.handler == HANDLER_IMAGE:
+            tasks.append(lambda step=step: _image_issue(step.tag, step.value, validator, strict))
+        else:
+            tasks.append(lambda step=step: validator.table(step.value))
+
+    issues: List[PlanIssue] = []
+    for step in steps:
+        if step.handler == HANDLER_CONDITION and not all(
+                isinstance(location, RangeLocation) for location in tag_dict[step.tag]):
+            issues.append(PlanIssue(step.tag, f"缺少结束标签 {closing_tag(step.tag)}，不会处理", fatal=False))
+        if step.handler == HANDLER_LIST:
+            try:
+                list_items(step.value)
+            except TypeError as e:
+                issues.append(PlanIssue(step.tag, str(e)))
+    resolved = dict(replace_dict)
+    for step, result in zip(checked, validator.run(tasks)):
+        if step.handler == HANDLER_IMAGE:
+            if result is not None:
+                issues.append(result)
+            continue
+        source, shape, error = result
+        if error:
+            issues.append(PlanIssue(step.tag, error))
+            continue
+        if source is not None:
+            step.value = resolved[step.tag] = source
+        for location in tag_dict[step.tag]:
+            issue = _table_location_issue(step.tag, location, shape)
+            if issue is not None:
+                issues.append(issue)
+                break
+
+    return RenderPlan(template_path, steps, missing, issues, resolved)
@@ -0,0 +1,157 @@
+# coding=utf-8
+"""WordWriter 内存分析模块
+
+基于 tracemalloc 按阶段记录 Python 内存分配：每个阶段（加载、搜索、
+每个标签的替换、保存等）记录净分配量（阶段结束时仍被引用的内存）和
+阶段内的峰值（相对阶段开始时的增量）。用于判断模板在哪个阶段占用
+内存最多，从而设定工作进程的内存上限。
+
+tracemalloc 只统计 Python 分配器分配的内存，lxml/libxml2 在 C 层分配
+的节点不计入，因此文档树的大小需要结合进程 RSS 判断。开启追踪后运行
+速度会明显下降，只应在分析时使用。
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+
+class PhaseMemory:
+    """单个阶段的内存统计
+
+    Attributes:
+        name: 阶段名称（"load"、"search"、标签名、"save" 等）
+        net: 净分配字节数，可能为负（阶段内释放了之前分配的内存）
+        peak: 阶段内峰值相对阶段开始时的增量（字节）
+        seconds: 阶段耗时（秒，含追踪开销）
+    """
+
+    __slots__ = ("name", "net", "peak", "seconds")
+
+    def __init__(self, name: str, net: int, peak: int, seconds: float):
+        self.name = name
+        self.net = net
+        self.peak = peak
+        self.seconds = seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可 JSON 序列化的字典"""
+        return {"name": self.name, "net": self.net, "peak": self.peak,
+                "seconds": round(self.seconds, 6)}
+
+    def __repr__(self) -> str:
+        return f"<PhaseMemory(name={self.name!r}, net={self.net}, peak={self.peak})>"
+
+
+class MemoryReport:
+    """内存分析报告
+
+    Attributes:
+        phases: 按发生顺序排列的阶段统计
+    """
+
+    def __init__(self):
+        self.phases: List[PhaseMemory] = []
+
+    @property
+    def peak(self) -> int:
+        """各阶段峰值中的最大值（字节）"""
+        return max((phase.peak for phase in self.phases), default=0)
+
+    @property
+    def net(self) -> int:
+        """各阶段净分配之和（字节）"""
+        return sum(phase.net for phase in self.phases)
+
+    def worst(self, count: int = 5) -> List[PhaseMemory]:
+        """峰值最大的若干阶段"""
+        return sorted(self.phases, key=lambda phase: phase.peak, reverse=True)[:count]
+
+    def clear(self) -> None:
+        """清空已记录的阶段"""
+        self.phases = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可 JSON 序列化的字典"""
+        return {"peak": self.peak, "net": self.net,
+                "phases": [phase.to_dict() for phase in self.phases]}
+
+    def format(self) -> str:
+        """格式化为文本表格（单位 KiB）"""
+        lines = [f"{'phase':<40} {'net KiB':>12} {'peak KiB':>12} {'seconds':>10}"]
+        for phase in self.phases:
+            lines.append(f"{phase.name[:40]:<40} {phase.net / 1024:>12.1f} "
+                         f"{phase.peak / 1024:>12.1f} {phase.seconds:>10.4f}")
+        lines.append(f"{'total':<40} {self.net / 1024:>12.1f} {self.peak / 1024:>12.1f}")
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return f"<MemoryReport(phases={len(self.phases)}, peak={self.peak}, net={self.net})>"
+
+
+class MemoryProfiler:
+    """按阶段记录内存分配
+
+    未启用时 session()/phase() 不做任何事，调用方无需区分。
+
+    Attributes:
+        enabled: 是否启用
+        report: 内存分析报告
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.report = MemoryReport()
+        self._depth = 0
+        self._started = False
+
+    @contextmanager
+    def session(self) -> Iterator[None]:
+        """追踪会话：最外层会话开始时启动 tracemalloc，结束时停止
+
+        tracemalloc 已由调用方启动时不会停止它。同一会话内的各阶段共享追踪
+        状态，后续阶段释放之前阶段分配的内存时净分配量为负。
+        """
+        if not self.enabled:
+            yield
+            return
+        if self._depth == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0 and self._started:
+                tracemalloc.stop()
+                self._started = False
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """记录一个阶段（阶段之间不能嵌套）
+
+        Python 3.9 以下没有 tracemalloc.reset_peak()，峰值为会话开始以来的
+        峰值相对阶段开始时的增量。
+
+        Args:
+            name: 阶段名称
+        """
+        if not self.enabled:
+            yield
+            return
+        with self.session():
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                current, peak = tracemalloc.get_traced_memory()
+                self.report.phases.append(PhaseMemory(
+                    name, current - before, max(0, peak - before), time.perf_counter() - start))
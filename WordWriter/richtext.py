@@ -0,0 +1,252 @@
+# coding=utf-8
+"""WordWriter 富文本模块
+
+文本标签的值默认是纯字符串，替换后沿用标签所在 run 的格式。RichText
+值会展开为多个 run：每个片段复制标签 run 的 rPr（字体、字号、样式等），
+再叠加片段自身的加粗、斜体、下划线、颜色和字号。
+
+RichText 可以由简单标记构造：
+
+    [b]加粗[/b] [i]斜体[/i] [u]下划线[/u] [color=FF0000]红色[/color]
+    [size=9]小字[/size] [br] 或换行符表示换行
+
+也可以由 (text, style) 片段列表构造，style 为 None、以逗号或空格分隔的
+标志（"bold, italic"、"b u"）或属性字典（{"bold": True, "color": "FF0000"}）。
+
+同一段标记（免责声明、状态标记等）往往在成千上万次渲染中重复出现，
+标记的解析结果按标记字符串缓存（parse_markup），片段对象只读、在线程
+间共享。
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from docx.shared import Pt, RGBColor
+
+
+# 标记解析结果的缓存容量（按标记字符串）
+MARKUP_CACHE_SIZE = 4096
+
+_MARKUP_TOKEN = re.compile(r"\[(/?)(b|i|u|color|size|br)(?:=([^\]]+))?\]")
+
+# 标志名称 -> 属性
+_FLAGS = {
+    "b": "bold", "bold": "bold",
+    "i": "italic", "italic": "italic",
+    "u": "underline", "underline": "underline",
+}
+
+
+class Span:
+    """富文本片段（只读，可在多次渲染间共享）
+
+    格式属性为 None 时沿用标签 run 的格式。
+
+    Attributes:
+        text: 文本，换行符在 Word 中为换行
+        bold: 是否加粗
+        italic: 是否斜体
+        underline: 是否下划线
+        color: 十六进制颜色，如 "FF0000"
+        size: 字号（磅）
+    """
+
+    __slots__ = ("text", "bold", "italic", "underline", "color", "size")
+
+    def __init__(self, text: str, bold: Optional[bool] = None, italic: Optional[bool] = None,
+                 underline: Optional[bool] = None, color: Optional[str] = None,
+                 size: Optional[float] = None):
+        self.text = text
+        self.bold = bold
+        self.italic = italic
+        self.underline = underline
+        self.color = color
+        self.size = size
+
+    def apply(self, run: Any) -> None:
+        """在 run 上设置片段的文本和格式
+
+        Args:
+            run: python-docx 的 Run 对象（已复制标签 run 的 rPr）
+        """
+        run.text = self.text
+        if self.bold is not None:
+            run.bold = self.bold
+        if self.italic is not None:
+            run.italic = self.italic
+        if self.underline is not None:
+            run.underline = self.underline
+        if self.color is not None:
+            run.font.color.rgb = RGBColor.from_string(self.color)
+        if self.size is not None:
+            run.font.size = Pt(self.size)
+
+    def _key(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Span) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__
+                           if getattr(self, name) is not None)
+        return f"<Span({fields})>"
+
+
+def _color(value: str) -> str:
+    """规范化十六进制颜色"""
+    value = value.strip().lstrip("#").upper()
+    RGBColor.from_string(value)
+    return value
+
+
+def _span(text: str, style: Any) -> Span:
+    """由 (text, style) 片段创建 Span
+
+    Raises:
+        ValueError: 无法识别的样式
+    """
+    if style is None:
+        return Span(text)
+    if isinstance(style, str):
+        properties: Dict[str, Any] = {}
+        for flag in re.split(r"[\s,]+", style.strip()):
+            if not flag:
+                continue
+            if flag.lower() not in _FLAGS:
+                raise ValueError(f"无法识别的富文本样式: {flag}")
+            properties[_FLAGS[flag.lower()]] = True
+        return Span(text, **properties)
+    if isinstance(style, dict):
+        properties = dict(style)
+        if properties.get("color") is not None:
+            properties["color"] = _color(properties["color"])
+        try:
+            return Span(text, **properties)
+        except TypeError:
+            raise ValueError(f"无法识别的富文本样式: {style}") from None
+    raise ValueError(f"无法识别的富文本样式: {style!r}")
+
+
+@lru_cache(maxsize=MARKUP_CACHE_SIZE)
+def parse_markup(markup: str) -> Tuple[Span, ...]:
+    """解析富文本标记（结果按标记字符串缓存）
+
+    未配对的结束标记和无法识别的方括号内容按原文保留；未闭合的开始标记
+    作用到文本末尾。缓存命中情况见 parse_markup.cache_info()。
+
+    Args:
+        markup: 标记字符串
+
+    Returns:
+        片段元组，相邻的同格式文本已合并
+    """
+    spans = []
+    # 打开的标记 [(名称, 属性, 值), ...]
+    stack = []
+    pos = 0
+
+    def emit(text: str) -> None:
+        if not text:
+            return
+        properties: Dict[str, Any] = {}
+        for _, name, value in stack:
+            properties[name] = value
+        span = Span(text, **properties)
+        if spans and spans[-1]._key()[1:] == span._key()[1:]:
+            spans[-1] = Span(spans[-1].text + text, **properties)
+        else:
+            spans.append(span)
+
+    for match in _MARKUP_TOKEN.finditer(markup):
+        closing, name, argument = match.groups()
+        token_text = markup[pos:match.start()]
+        if name == "br":
+            emit(token_text + ("\n" if not closing else match.group(0)))
+            pos = match.end()
+            continue
+        if closing:
+            opened = [i for i, (tag, _, _) in enumerate(stack) if tag == name]
+            if not opened:
+                emit(token_text + match.group(0))
+            else:
+                emit(token_text)
+                del stack[opened[-1]]
+            pos = match.end()
+            continue
+        try:
+            if name == "color":
+                value: Any = _color(argument or "")
+            elif name == "size":
+                value = float(argument or "")
+            else:
+                value = True if argument is None else None
+        except ValueError:
+            value = None
+        if value is None:
+            # 参数无效，按原文保留
+            emit(token_text + match.group(0))
+        else:
+            emit(token_text)
+            stack.append((name, _FLAGS.get(name, name), value))
+        pos = match.end()
+    emit(markup[pos:])
+    return tuple(spans)
+
+
+class RichText:
+    """富文本值
+
+    Attributes:
+        source: 构造时的标记字符串或片段元组
+        spans: 解析后的片段
+
+    Example:
+        >>> writer.replace({
+        ...     "#[status]#": RichText("[b]通过[/b] [color=808080]（复核中）[/color]"),
+        ...     "#[note]#": RichText([("注意：", "bold"), ("以实际为准", {"italic": True})]),
+        ... })
+    """
+
+    __slots__ = ("source", "spans")
+
+    def __init__(self, value: Union[str, Iterable[Tuple[str, Any]]]):
+        """初始化
+
+        Args:
+            value: 标记字符串，或 (text, style) 片段序列
+
+        Raises:
+            ValueError: 片段样式无法识别
+        """
+        if isinstance(value, str):
+            self.source: Any = value
+            self.spans = parse_markup(value)
+        else:
+            self.source = tuple(value)
+            self.spans = tuple(_span(str(text), style) for text, style in self.source)
+
+    @property
+    def text(self) -> str:
+        """不含格式的纯文本"""
+        return "".join(span.text for span in self.spans)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, RichText) and self.spans == other.spans
+
+    def __hash__(self) -> int:
+        return hash(self.spans)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        # 渲染缓存以 repr 计算缓存键，需包含完整内容
+        return f"RichText({self.source!r})"
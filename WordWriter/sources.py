@@ -0,0 +1,426 @@
+# coding=utf-8
+"""WordWriter 表格数据源模块
+
+TABLE 标签的值统一转换为 TableSource，fill_table 通过 shape 获取行列数，
+通过 iter_rows() 逐行取得字符串单元格：
+
+- DataFrameSource: pandas DataFrame，以及 tab 分隔的文本文件（原有格式）
+- ArrowSource: pyarrow Table/RecordBatch、Parquet 文件和 Arrow IPC（Feather）
+  文件。文件通过内存映射读取，按批次转换为字符串，任一时刻只有一个
+  批次的单元格以 Python 对象存在。需要安装可选依赖 pyarrow。
+
+两种数据源的单元格按同一规则（_series_strings）转换为字符串：Arrow 批次
+先转换为 DataFrame，因此同一份数据无论以 DataFrame 还是 Arrow 形式提供，
+填充结果相同（空值默认按 str() 显示为 "nan"/"NaT"，整数列含空值时为
+"3.0"）。字符串转换、"\\x0a" 换行转义、空值替换以及按列的数字/日期格式
+均按列整体完成，逐行生成时只需组合各列已转换好的字符串。
+
+Author: pzweuj
+Since: v4.2.0
+"""
+
+import datetime
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+
+# Parquet 与 Arrow IPC 文件扩展名
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+
+# 每次转换为字符串的行数
+BATCH_ROWS = 4096
+
+# 单元格中表示换行的转义序列（原有 tab 分隔文件格式）
+NEWLINE_ESCAPE = "\\x0a"
+
+# 列格式：数字格式说明（如 ".2f"、",.0f"）、日期格式（含 "%"，如 "%Y-%m-%d"）
+# 或接收单元格原值、返回字符串的函数
+ColumnFormat = Union[str, Callable[[Any], str]]
+
+
+def _import_pyarrow() -> Any:
+    """导入可选依赖 pyarrow"""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("读取 Parquet/Arrow 表格需要安装 pyarrow: pip install WordWriter[arrow]")
+    return pyarrow
+
+
+# ============================================================================
+# 列格式
+# ============================================================================
+
+def _is_date_format(spec: ColumnFormat) -> bool:
+    """格式说明是否为日期格式（strftime）"""
+    return isinstance(spec, str) and "%" in spec
+
+
+def _format_value(value: Any, spec: ColumnFormat) -> Any:
+    """按格式说明转换单个值，无法按该格式转换时原样返回
+
+    字符串值（如 tab 分隔文件读入的列）会先尝试解析为数字或日期。
+    """
+    if callable(spec):
+        return spec(value)
+    try:
+        if _is_date_format(spec):
+            if isinstance(value, str):
+                value = datetime.datetime.fromisoformat(value)
+            return value.strftime(spec)
+        if isinstance(value, str):
+            value = float(value)
+        return format(value, spec)
+    except (TypeError, ValueError, AttributeError):
+        return value
+
+
+def _format_series(series: pd.Series, spec: ColumnFormat) -> pd.Series:
+    """按格式说明转换一列，空值保持为空，无法转换的值保持原样"""
+    notna = series.notna()
+    result = series.astype(object)
+    if callable(spec):
+        result[notna] = series[notna].map(spec)
+    elif _is_date_format(spec) and pd.api.types.is_datetime64_any_dtype(series):
+        result[notna] = series[notna].dt.strftime(spec)
+    elif _is_date_format(spec):
+        # 字符串日期逐个按 ISO 8601 解析
+        result[notna] = series[notna].map(lambda value: _format_value(value, spec))
+    else:
+        numbers = pd.to_numeric(series, errors="coerce")
+        parsed = notna & numbers.notna()
+        result[parsed] = numbers[parsed].map(lambda value: _format_value(value, spec))
+    return result
+
+
+def _series_strings(series: pd.Series, spec: Optional[ColumnFormat], na_rep: Optional[str]) -> List[str]:
+    """将一列整体转换为字符串列表
+
+    先应用列格式，再按 str() 转换、解码换行转义，na_rep 不为 None 时替换空值。
+    """
+    if spec is not None:
+        series = _format_series(series, spec)
+    strings = series.map(str).str.replace(NEWLINE_ESCAPE, "\n", regex=False)
+    if na_rep is not None:
+        strings = strings.where(series.notna(), na_rep)
+    return strings.tolist()
+
+
+def _resolve_formats(columns: Sequence[Any], formats: Optional[Dict[Any, ColumnFormat]]) -> Dict[int, ColumnFormat]:
+    """将 {列名或列序号: 格式} 转换为 {列序号: 格式}
+
+    Raises:
+        KeyError: 列不存在
+    """
+    resolved = {}
+    for key, spec in (formats or {}).items():
+        if key in columns:
+            resolved[list(columns).index(key)] = spec
+        elif isinstance(key, int) and 0 <= key < len(columns):
+            resolved[key] = spec
+        else:
+            raise KeyError(f"表格中不存在列: {key!r}")
+    return resolved
+
+
+def _formats_digest(formats: Optional[Dict[Any, ColumnFormat]], na_rep: Optional[str]) -> str:
+    """格式设置的摘要文本，参与缓存键计算"""
+    return repr((sorted((repr(key), repr(spec)) for key, spec in (formats or {}).items()), na_rep))
+
+
+# ============================================================================
+# 表格数据源
+# ============================================================================
+
+class TableSource:
+    """表格数据源基类
+
+    子类实现 shape、iter_rows() 与 digest()。
+    """
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """(行数, 列数)"""
+        raise NotImplementedError
+
+    def iter_rows(self) -> Iterator[Sequence[str]]:
+        """逐行生成单元格字符串序列（换行转义已解码）"""
+        raise NotImplementedError
+
+    def digest(self) -> str:
+        """数据内容的 SHA-256，用于渲染缓存键"""
+        raise NotImplementedError
+
+
+class DataFrameSource(TableSource):
+    """pandas DataFrame 数据源
+
+    单元格默认按 str() 转换，与原有 tab 分隔文件的填充结果一致
+    （空单元格为 "nan"）。转换按列进行：先应用列格式，再整列转换为
+    字符串、解码换行转义并替换空值，iter_rows() 只需按行组合各列。
+
+    Attributes:
+        frame: DataFrame 对象
+        formats: {列名或列序号: 格式}，见 ColumnFormat
+        na_rep: 空值（NaN/None）填充的字符串，None 表示沿用 str() 结果
+    """
+
+    def __init__(self, frame: pd.DataFrame, formats: Optional[Dict[Any, ColumnFormat]] = None,
+                 na_rep: Optional[str] = None):
+        self.frame = frame
+        self.formats = formats
+        self.na_rep = na_rep
+        self._formats = _resolve_formats(frame.columns, formats)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.frame.shape
+
+    def iter_rows(self) -> Iterator[Sequence[str]]:
+        return zip(*(_series_strings(self.frame.iloc[:, idx], self._formats.get(idx), self.na_rep)
+                     for idx in range(self.frame.shape[1])))
+
+    def digest(self) -> str:
+        sha = hashlib.sha256()
+        sha.update(repr(list(self.frame.columns)).encode("utf-8"))
+        sha.update(_formats_digest(self.formats, self.na_rep).encode("utf-8"))
+        sha.update(pd.util.hash_pandas_object(self.frame, index=False).values.tobytes())
+        return sha.hexdigest()
+
+
+class ArrowSource(TableSource):
+    """Arrow 列式数据源
+
+    文件数据源只在打开时读取元数据，行数据在 iter_rows() 中按批次读取：
+    Parquet 通过内存映射逐批解码，Arrow IPC 文件直接映射记录批次（零拷贝）。
+    每个批次转换为 DataFrame 后按与 DataFrameSource 相同的规则逐列转换为
+    字符串，再逐行生成。不写入列名，表头应保留在模板中。
+
+    Attributes:
+        path: 文件路径，内存中的表为 None
+        formats: {列名或列序号: 格式}，见 ColumnFormat
+        na_rep: 空值填充的字符串，None 表示沿用 str() 结果
+    """
+
+    def __init__(self, table: Any = None, path: Optional[str] = None,
+                 formats: Optional[Dict[Any, ColumnFormat]] = None, na_rep: Optional[str] = None):
+        """初始化
+
+        Args:
+            table: pyarrow Table 或 RecordBatch
+            path: Parquet 或 Arrow IPC 文件路径，与 table 二选一
+            formats: {列名或列序号: 格式}
+            na_rep: 空值填充的字符串，默认与 DataFrameSource 相同（按 str() 转换）
+        """
+        self._pa = _import_pyarrow()
+        self.path = path
+        self.formats = formats
+        self.na_rep = na_rep
+        self._table = table
+        if table is not None:
+            self._shape = (table.num_rows, table.num_columns)
+            names = table.schema.names
+        elif path.lower().endswith(PARQUET_EXTENSIONS):
+            parquet = self._parquet_file()
+            self._shape = (parquet.metadata.num_rows, parquet.metadata.num_columns)
+            names = parquet.schema_arrow.names
+        else:
+            reader = self._ipc_reader()
+            rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+            self._shape = (rows, len(reader.schema))
+            names = reader.schema.names
+        self._formats = _resolve_formats(names, formats)
+
+    def _parquet_file(self) -> Any:
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(self.path, memory_map=True)
+
+    def _ipc_reader(self) -> Any:
+        return self._pa.ipc.open_file(self._pa.memory_map(self.path, "r"))
+
+    def _batches(self) -> Iterator[Any]:
+        """按批次生成 RecordBatch"""
+        if self._table is not None:
+            if isinstance(self._table, self._pa.RecordBatch):
+                yield self._table
+            else:
+                yield from self._table.to_batches(max_chunksize=BATCH_ROWS)
+        elif self.path.lower().endswith(PARQUET_EXTENSIONS):
+            yield from self._parquet_file().iter_batches(batch_size=BATCH_ROWS)
+        else:
+            reader = self._ipc_reader()
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self._shape
+
+    def iter_rows(self) -> Iterator[Sequence[str]]:
+        for batch in self._batches():
+            frame = batch.to_pandas()
+            yield from zip(*(_series_strings(frame.iloc[:, idx], self._formats.get(idx), self.na_rep)
+                             for idx in range(frame.shape[1])))
+
+    def digest(self) -> str:
+        sha = hashlib.sha256(_formats_digest(self.formats, self.na_rep).encode("utf-8"))
+        if self.path is not None:
+            from .cache import file_digest
+            sha.update(file_digest(self.path).encode("ascii"))
+            return sha.hexdigest()
+        sink = self._pa.BufferOutputStream()
+        with self._pa.ipc.new_stream(sink, self._table.schema) as writer:
+            writer.write(self._table)
+        sha.update(sink.getvalue())
+        return sha.hexdigest()
+
+
+def is_arrow_path(path: str) -> bool:
+    """路径是否为 Parquet 或 Arrow IPC 文件"""
+    return path.lower().endswith(PARQUET_EXTENSIONS + ARROW_EXTENSIONS)
+
+
+def load_table_source(value: Any, formats: Optional[Dict[Any, ColumnFormat]] = None,
+                      na_rep: Optional[str] = None) -> TableSource:
+    """将 TABLE 标签的值转换为表格数据源
+
+    也可直接调用以指定列格式，并将返回的数据源作为标签的值。
+
+    Args:
+        value: 文件路径（tab 分隔文本、Parquet、Arrow IPC）、pandas DataFrame、
+            pyarrow Table/RecordBatch 或 TableSource
+        formats: {列名或列序号: 格式}，数字格式如 ".2f"，日期格式如 "%Y-%m-%d"，
+            也可为函数；tab 分隔文件没有列名，使用列序号
+        na_rep: 空值填充的字符串，默认按 str() 转换（"nan"、"NaT" 等），各数据源相同
+
+    Returns:
+        表格数据源
+
+    Raises:
+        TypeError: 不支持的值类型
+        KeyError: formats 中的列不存在
+
+    Example:
+        >>> source = load_table_source("sales.txt", formats={1: ",.2f", 2: "%Y-%m-%d"}, na_rep="-")
+        >>> writer.replace({"#[TABLE-sales]#": source})
+    """
+    if isinstance(value, TableSource):
+        return value
+    options = {"formats": formats}
+    if na_rep is not None:
+        options["na_rep"] = na_rep
+    if isinstance(value, pd.DataFrame):
+        return DataFrameSource(value, **options)
+    if isinstance(value, (str, os.PathLike)):
+        path = os.fspath(value)
+        shared = _shared_tables.get(os.path.abspath(path)) if _shared_tables else None
+        if shared is not None:
+            if na_rep is None and not is_arrow_path(path):
+                # 共享的 tab 分隔文件保留了空值，按 DataFrameSource 的规则显示为 "nan"
+                options["na_rep"] = "nan"
+            return ArrowSource(path=shared, **options)
+        if is_arrow_path(path):
+            return ArrowSource(path=path, **options)
+        from .WordWriter import load_table_from_file
+        return DataFrameSource(load_table_from_file(path), **options)
+    if type(value).__module__.startswith("pyarrow"):
+        return ArrowSource(table=value, **options)
+    raise TypeError(f"不支持的表格数据类型: {type(value).__name__}")
+
+
+# ============================================================================
+# 批量渲染共享表格
+# ============================================================================
+
+# 当前进程中已发布的共享表格 {原始文件绝对路径: Arrow IPC 文件路径}
+_shared_tables: Dict[str, str] = {}
+
+
+def install_shared_tables(tables: Dict[str, str]) -> None:
+    """在当前进程中启用共享表格（也用作工作进程的 initializer）
+
+    Args:
+        tables: {原始文件绝对路径: Arrow IPC 文件路径}
+    """
+    _shared_tables.update(tables)
+
+
+class SharedTables:
+    """批量渲染中多条记录共用的表格
+
+    父进程将每个表格解析一次，写为未压缩的 Arrow IPC 文件（Linux 上位于
+    /dev/shm），工作进程中 load_table_source 遇到原始路径时改为内存映射该
+    文件：所有进程读取同一份页缓存，不再逐文档解析 TSV。tab 分隔文件的
+    空单元格仍按原有规则填充为 "nan"，填充结果不变。本身已是
+    Arrow IPC 的文件无需发布。需要安装 pyarrow。
+
+    Attributes:
+        tables: {原始文件绝对路径: Arrow IPC 文件路径}
+
+    Example:
+        >>> with SharedTables(["catalogue.txt"]) as shared:
+        ...     executor = ProcessPoolExecutor(4, initializer=install_shared_tables,
+        ...                                    initargs=(shared.tables,))
+    """
+
+    def __init__(self, paths: Iterable[str]):
+        """解析并发布表格
+
+        Args:
+            paths: 表格文件路径
+        """
+        self._pa = _import_pyarrow()
+        shm = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        self.directory = tempfile.mkdtemp(prefix="wordwriter-tables-", dir=shm)
+        self.tables: Dict[str, str] = {}
+        try:
+            for path in paths:
+                if is_arrow_path(path) and not path.lower().endswith(PARQUET_EXTENSIONS):
+                    continue
+                target = os.path.join(self.directory, f"{len(self.tables)}.arrow")
+                self._write(self._read(path), target)
+                self.tables[os.path.abspath(path)] = target
+        except BaseException:
+            self.close()
+            raise
+
+    def _read(self, path: str) -> Any:
+        """读取表格为 pyarrow Table"""
+        if path.lower().endswith(PARQUET_EXTENSIONS):
+            import pyarrow.parquet as pq
+            return pq.read_table(path, memory_map=True)
+        from .WordWriter import load_table_from_file
+        frame = load_table_from_file(path)
+        # 文件按字符串读入，空单元格保留为空值，由 load_table_source 按原有规则填充
+        frame.columns = [str(column) for column in frame.columns]
+        return self._pa.Table.from_pandas(frame, preserve_index=False)
+
+    def _write(self, table: Any, target: str) -> None:
+        """以 BATCH_ROWS 行为一批写入 Arrow IPC 文件"""
+        with self._pa.OSFile(target, "wb") as sink:
+            with self._pa.ipc.new_file(sink, table.schema) as writer:
+                for batch in table.to_batches(max_chunksize=BATCH_ROWS):
+                    writer.write_batch(batch)
+
+    def install(self) -> None:
+        """在当前进程中启用（fork 出的子进程随之继承）"""
+        install_shared_tables(self.tables)
+
+    def close(self) -> None:
+        """停用并删除共享文件"""
+        for path in self.tables:
+            _shared_tables.pop(path, None)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> 'SharedTables':
+        self.install()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
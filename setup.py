@@ -32,10 +32,18 @@ setup(
         "python-docx>=0.8.10",
         "pandas>=1.0.0"
     ],
+    extras_require={
+        'arrow': ['pyarrow>=10.0.0'],
+    },
     python_requires='>=3.6',
     license='MIT',
     packages=find_packages(),
     include_package_data=True,
+    entry_points={
+        'console_scripts': [
+            'wordwriter=WordWriter.cli:main',
+        ],
+    },
     platforms=["all"],
     keywords=['docx', 'word', 'template', 'document', 'office'],
     classifiers=[
@@ -0,0 +1,102 @@
+# coding=utf-8
+# pzw
+# WordWriter 表格标签搜索基准测试
+#
+# 用法（在 test 目录下运行）:
+#     python BenchmarkNestedTables.py [表格数] [行数] [列数] [重复次数]
+#     python BenchmarkNestedTables.py 100 30 6 5
+#
+# 生成含大量普通表格（少数单元格含标签）和一个三层嵌套表格的模板，
+# 比较 TagSearcher 的表格搜索与逐单元格创建 python-docx 代理对象的
+# 搜索方式（row.cells + cell.text，原有实现）的耗时，并检查嵌套表格中
+# 的标签全部被找到。
+
+import sys
+import time
+
+sys.path.insert(0, '..')  # 添加父目录到路径
+
+from docx import Document
+
+from WordWriter import TagSearcher
+from WordWriter.WordWriter import search_tag
+
+
+def make_document(tables, rows, cols):
+    document = Document()
+    tags = 0
+    for index in range(tables):
+        table = document.add_table(rows=rows, cols=cols)
+        for row_idx, row in enumerate(table.rows):
+            for col_idx, cell in enumerate(row.cells):
+                cell.text = f"{index}-{row_idx}-{col_idx}"
+        table.cell(index % rows, index % cols).text = f"#[cell{index}]#"
+        tags += 1
+        if index % 10 == 0:
+            table.cell(rows - 1, cols - 1).text = f"合计 #[total{index}]#"
+            tags += 1
+
+    # 三层嵌套表格，每层一个标签
+    outer = document.add_table(rows=2, cols=2)
+    outer.cell(0, 0).text = "#[nested0]#"
+    cell = outer.cell(1, 1)
+    for level in range(1, 4):
+        inner = cell.add_table(rows=2, cols=2)
+        inner.cell(0, 0).text = f"#[nested{level}]#"
+        cell = inner.cell(1, 1)
+    return document, tags + 4
+
+
+def proxy_scan(document):
+    # 原有实现：每个单元格都创建 _Cell 代理并拼接文本，只搜索顶层表格
+    tag_dict = {}
+    for table in document.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                text = cell.text
+                if "#[" in text and "]#" in text:
+                    search_tag(tag_dict, cell.paragraphs)
+    return tag_dict
+
+
+def stack_scan(document):
+    tag_dict = {}
+    TagSearcher(document)._search_tables(tag_dict)
+    return tag_dict
+
+
+def best_of(repeat, func, document):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(document)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    tables = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    cols = int(sys.argv[3]) if len(sys.argv) > 3 else 6
+    repeat = int(sys.argv[4]) if len(sys.argv) > 4 else 5
+
+    document, expected = make_document(tables, rows, cols)
+    print("=" * 60)
+    print(f"{tables} 个 {rows}x{cols} 表格 + 三层嵌套表格，共 {expected} 个标签")
+    print("=" * 60)
+
+    proxy_time, proxy_tags = best_of(repeat, proxy_scan, document)
+    stack_time, stack_tags = best_of(repeat, stack_scan, document)
+    print(f"python-docx 代理逐单元格: {proxy_time:.3f}s, 找到 {len(proxy_tags)} 个标签")
+    print(f"TagSearcher 表格搜索:     {stack_time:.3f}s, 找到 {len(stack_tags)} 个标签")
+    print(f"加速: {proxy_time / stack_time:.1f}x")
+
+    missing = [f"#[nested{level}]#" for level in range(4) if f"#[nested{level}]#" not in stack_tags]
+    if len(stack_tags) != expected or missing:
+        print(f"缺少标签: {missing or expected - len(stack_tags)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
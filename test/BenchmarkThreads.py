@@ -0,0 +1,73 @@
+# coding=utf-8
+# pzw
+# WordWriter SharedTemplate 多线程压力测试
+#
+# 用法（在 test 目录下运行）:
+#     python BenchmarkThreads.py [记录数] [线程数列表]
+#     python BenchmarkThreads.py 400 1,2,4,8
+#
+# 同一个 SharedTemplate 在不同线程数下并发渲染，输出每秒文档数，并检查
+# 每份输出只包含本条记录的内容。普通 CPython 受 GIL 限制，主要受益于
+# zlib 压缩等释放 GIL 的部分；自由线程构建（python3.13t 等）可随核心数扩展。
+
+import io
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, '..')  # 添加父目录到路径
+
+from WordWriter import SharedTemplate
+
+
+def make_record(index):
+    return {
+        "#[testheader1]#": f"页眉{index}",
+        "#[testString]#": f"RECORD-{index:06d}",
+        "#[TX-testString2]#": f"文本框{index}",
+        "#[testTableString1]#": f"单元格{index}",
+        "#[IMAGE-test1-(30,30)]#": "testPicture.png",
+        "#[TABLE-test1]#": "testTable.txt",
+    }
+
+
+def check_output(index, data):
+    # 正文中应只出现本条记录的标记
+    document_xml = zipfile.ZipFile(io.BytesIO(data)).read("word/document.xml").decode("utf-8")
+    return set(re.findall(r"RECORD-\d{6}", document_xml)) == {f"RECORD-{index:06d}"}
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    thread_counts = [int(n) for n in sys.argv[2].split(",")] if len(sys.argv) > 2 else [1, 2, 4, 8]
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print("=" * 60)
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}, CPU {os.cpu_count()}")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    template = SharedTemplate("test.docx")
+    print(f"加载模板: {time.perf_counter() - start:.3f}s, {template}")
+
+    baseline = None
+    for threads in thread_counts:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            outputs = list(executor.map(lambda i: template.render(make_record(i)), range(total)))
+        elapsed = time.perf_counter() - start
+
+        failed = sum(not check_output(i, data) for i, data in enumerate(outputs))
+        rate = total / elapsed
+        baseline = baseline or rate
+        print(f"threads {threads:>3}: {rate:8.1f} docs/sec, speedup {rate / baseline:5.2f}x, "
+              f"errors {failed}")
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
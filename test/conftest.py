@@ -0,0 +1,40 @@
+# coding=utf-8
+"""pytest 公共配置：将仓库根目录加入导入路径，提供构造测试模板的辅助函数"""
+
+import io
+import os
+import sys
+
+import pytest
+from docx import Document
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+PICTURE = os.path.join(TEST_DIR, "testPicture.png")
+TABLE_FILE = os.path.join(TEST_DIR, "testTable.txt")
+
+
+def paragraph_runs(document, texts, style=None):
+    """添加一个段落，texts 中的每一项为一个 run"""
+    paragraph = document.add_paragraph(style=style)
+    for text in texts:
+        paragraph.add_run(text)
+    return paragraph
+
+
+def texts(data):
+    """输出文档（字节）中正文段落的文本"""
+    return [paragraph.text for paragraph in Document(io.BytesIO(data)).paragraphs]
+
+
+@pytest.fixture
+def save_docx(tmp_path):
+    """将 Document 保存到临时目录并返回路径"""
+    def _save(document, name="template.docx"):
+        path = str(tmp_path / name)
+        document.save(path)
+        return path
+    return _save
@@ -0,0 +1,70 @@
+# coding=utf-8
+"""归档输出测试"""
+
+import json
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from WordWriter import ArchiveWriter, read_member
+
+
+def _documents(count):
+    # 大小不同的成员，偏移不会碰巧对齐
+    return [(f"docs/{index}.docx", os.urandom(100 + index * 37)) for index in range(count)]
+
+
+def _manifest(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("ext", [".zip", ".tar"])
+@pytest.mark.parametrize("shard_size", [0, 3])
+def test_manifest_offsets(tmp_path, ext, shard_size):
+    path = str(tmp_path / f"out{ext}")
+    documents = _documents(7)
+    with ArchiveWriter(path, shard_size=shard_size) as archive:
+        for index, (name, data) in enumerate(documents):
+            archive.add(name, data, record_id=f"r{index}")
+
+    manifest = _manifest(archive.manifest_path)
+    assert manifest == archive.manifest
+    assert [entry["id"] for entry in manifest] == [f"r{index}" for index in range(7)]
+    assert len(archive.paths) == (3 if shard_size else 1)
+    assert {entry["archive"] for entry in manifest} == {os.path.basename(p) for p in archive.paths}
+
+    for entry, (name, data) in zip(manifest, documents):
+        assert entry["member"] == name
+        assert read_member(entry, str(tmp_path)) == data
+
+    # 归档本身可由标准库读取
+    for shard in archive.paths:
+        members = [entry for entry in manifest if entry["archive"] == os.path.basename(shard)]
+        if ext == ".zip":
+            with zipfile.ZipFile(shard) as zf:
+                assert zf.testzip() is None
+                read = {name: zf.read(name) for name in zf.namelist()}
+        else:
+            with tarfile.open(shard) as tf:
+                read = {member.name: tf.extractfile(member).read() for member in tf.getmembers()}
+        assert read == {entry["member"]: read_member(entry, str(tmp_path)) for entry in members}
+
+
+def test_duplicate_member(tmp_path):
+    with ArchiveWriter(str(tmp_path / "out.zip")) as archive:
+        archive.add("a.docx", b"1")
+        with pytest.raises(ValueError):
+            archive.add("a.docx", b"2")
+
+
+def test_failure_discards_manifest(tmp_path):
+    path = str(tmp_path / "out.tar")
+    with pytest.raises(RuntimeError):
+        with ArchiveWriter(path) as archive:
+            archive.add("a.docx", b"1")
+            raise RuntimeError
+    assert not os.path.exists(archive.manifest_path)
+    assert not os.path.exists(archive.manifest_path + ".part")
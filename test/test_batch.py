@@ -0,0 +1,60 @@
+# coding=utf-8
+"""批量渲染测试"""
+
+import io
+import os
+import zipfile
+
+import pytest
+
+from WordWriter import PrewarmedPool
+from WordWriter.batch import fork_available, run_batch
+from conftest import TEST_DIR, PICTURE, TABLE_FILE
+
+TEMPLATE = os.path.join(TEST_DIR, "test.docx")
+
+
+def make_record(index):
+    return {
+        "#[testheader1]#": f"页眉{index}",
+        "#[testString]#": f"记录{index}",
+        "#[TX-testString2]#": f"文本框{index}",
+        "#[IMAGE-test1-(30,30)]#": PICTURE,
+        "#[TABLE-test1]#": TABLE_FILE,
+    }
+
+
+def _outputs(directory, count):
+    """各输出文档中成员的内容（zip 时间戳不参与比较）"""
+    outputs = []
+    for index in range(count):
+        with zipfile.ZipFile(io.BytesIO((directory / f"{index}.docx").read_bytes())) as archive:
+            outputs.append({name: archive.read(name) for name in archive.namelist()})
+    return outputs
+
+
+@pytest.mark.skipif(not fork_available(), reason="需要 fork")
+def test_prewarmed_pool_matches_serial(tmp_path):
+    count = 6
+    records = [make_record(index) for index in range(count)]
+    serial = run_batch(TEMPLATE, iter(records), str(tmp_path / "serial" / "{index}.docx"))
+    assert serial.succeeded == count
+
+    with PrewarmedPool([TEMPLATE], jobs=2) as pool:
+        result = pool.run(TEMPLATE, iter(records), str(tmp_path / "pool" / "{index}.docx"))
+    assert (result.succeeded, result.failed) == (count, 0)
+    assert _outputs(tmp_path / "pool", count) == _outputs(tmp_path / "serial", count)
+
+    prewarmed = run_batch(TEMPLATE, iter(records), str(tmp_path / "prewarm" / "{index}.docx"),
+                          jobs=2, prewarm=True)
+    assert prewarmed.succeeded == count
+    assert _outputs(tmp_path / "prewarm", count) == _outputs(tmp_path / "serial", count)
+
+
+@pytest.mark.skipif(not fork_available(), reason="需要 fork")
+def test_prewarmed_pool_reports_failures(tmp_path):
+    records = [make_record(0), {"#[TABLE-test1]#": str(tmp_path / "missing.txt")}, make_record(2)]
+    with PrewarmedPool([TEMPLATE], jobs=2) as pool:
+        result = pool.run(TEMPLATE, iter(records), str(tmp_path / "{index}.docx"))
+    assert result.succeeded == 2
+    assert [failure["index"] for failure in result.failures] == [1]
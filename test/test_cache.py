@@ -0,0 +1,76 @@
+# coding=utf-8
+"""渲染缓存键测试"""
+
+import os
+import shutil
+
+import pytest
+from docx import Document
+
+from WordWriter import WordWriterClass as WordWriter, MemoryCache, DiskCache
+from WordWriter import cache as cache_module
+from WordWriter.batch import run_batch
+from WordWriter.cache import render_key
+from conftest import PICTURE
+
+
+def _template(save_docx):
+    document = Document()
+    document.add_paragraph("Hello #[name]#")
+    return save_docx(document)
+
+
+def test_key_covers_options(save_docx):
+    path = _template(save_docx)
+    record = {"#[name]#": "Bob"}
+    assert render_key(path, record) == render_key(path, record, {})
+    assert render_key(path, record, {"normalize": True}) != render_key(path, record, {"normalize": False})
+    assert render_key(path, record, {"normalize": True}) == render_key(path, record, {"normalize": True})
+
+
+def test_key_covers_version_salt(save_docx, monkeypatch):
+    path = _template(save_docx)
+    record = {"#[name]#": "Bob"}
+    before = render_key(path, record)
+    monkeypatch.setattr(cache_module, "CACHE_SALT", cache_module.CACHE_SALT + ":upgraded")
+    assert render_key(path, record) != before
+
+
+def test_process_does_not_share_entries_across_options(save_docx, tmp_path):
+    path = _template(save_docx)
+    cache = MemoryCache()
+    record = {"#[name]#": "Bob"}
+    WordWriter.process(path, str(tmp_path / "a.docx"), record, logs=False, cache=cache)
+    WordWriter.process(path, str(tmp_path / "b.docx"), record, logs=False, cache=cache, normalize=True)
+    assert (cache.hits, cache.misses) == (0, 2)
+    WordWriter.process(path, str(tmp_path / "c.docx"), record, logs=False, cache=cache, normalize=True)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_run_batch_rejects_memory_cache_with_processes(save_docx, tmp_path):
+    path = _template(save_docx)
+    records = [{"#[name]#": "Ann"}, {"#[name]#": "Bob"}]
+    pattern = str(tmp_path / "out" / "{index}.docx")
+    with pytest.raises(ValueError, match="DiskCache"):
+        run_batch(path, iter(records), pattern, jobs=2, cache=MemoryCache())
+    assert not (tmp_path / "out").exists()
+
+    cache = DiskCache(str(tmp_path / "cache"))
+    result = run_batch(path, iter(records), pattern, jobs=2, cache=cache)
+    assert (result.succeeded, result.failed) == (2, 0)
+    assert run_batch(path, iter(records), pattern, jobs=1, cache=MemoryCache()).succeeded == 2
+
+
+def test_key_covers_files_in_list_items(save_docx, tmp_path):
+    path = _template(save_docx)
+    picture = str(tmp_path / "pic.png")
+    shutil.copy(PICTURE, picture)
+    record = {"#[LIST-items]#": [{"#[IMAGE-pic]#": picture, "#[LIST-items]#": "a"}, "b"]}
+    before = render_key(path, record)
+    assert render_key(path, record) == before
+
+    with open(picture, "ab") as f:
+        f.write(b"changed")
+    stat = os.stat(picture)
+    os.utime(picture, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    assert render_key(path, record) != before
@@ -0,0 +1,61 @@
+# coding=utf-8
+"""条件区间（IF）测试"""
+
+import io
+
+import pytest
+from docx import Document
+
+from WordWriter import WordWriterClass as WordWriter
+from conftest import texts
+
+
+def _template(save_docx):
+    document = Document()
+    document.add_paragraph("Start #[name]#")
+    document.add_paragraph("#[IF-extra]#")
+    document.add_paragraph("Extra for #[name]#")
+    table = document.add_table(rows=1, cols=1)
+    table.cell(0, 0).text = "#[cell]#"
+    document.add_paragraph("#[IF-inner]#")
+    document.add_paragraph("Inner")
+    document.add_paragraph("#[/IF-inner]#")
+    document.add_paragraph("#[/IF-extra]#")
+    document.add_paragraph("End")
+    return save_docx(document)
+
+
+def _render(path, extra, inner=True):
+    return WordWriter(path).render({"#[IF-extra]#": extra, "#[IF-inner]#": inner,
+                                    "#[name]#": "Ann", "#[cell]#": "C"})
+
+
+def _tables(data):
+    return len(Document(io.BytesIO(data)).tables)
+
+
+def test_false_removes_range(save_docx):
+    output = _render(_template(save_docx), False)
+    assert texts(output) == ["Start Ann", "End"]
+    assert _tables(output) == 0
+
+
+def test_true_keeps_content(save_docx):
+    output = _render(_template(save_docx), True)
+    assert texts(output) == ["Start Ann", "Extra for Ann", "Inner", "End"]
+    assert _tables(output) == 1
+
+
+def test_nested_false(save_docx):
+    output = _render(_template(save_docx), True, inner=False)
+    assert texts(output) == ["Start Ann", "Extra for Ann", "End"]
+
+
+@pytest.mark.parametrize("value", ["", "0", "false", "No", " OFF ", "none"])
+def test_false_strings(save_docx, value):
+    assert texts(_render(_template(save_docx), value)) == ["Start Ann", "End"]
+
+
+@pytest.mark.parametrize("value", ["1", "yes", "true", "x"])
+def test_true_strings(save_docx, value):
+    assert "Inner" in texts(_render(_template(save_docx), value))
@@ -0,0 +1,57 @@
+# coding=utf-8
+"""确定性输出测试"""
+
+import io
+import subprocess
+import sys
+
+from docx import Document
+
+from WordWriter import WordWriterClass as WordWriter, MemoryCache, SharedTemplate
+from conftest import PICTURE, ROOT, paragraph_runs
+
+
+def _template(save_docx):
+    document = Document()
+    document.add_paragraph("Title #[title]#")
+    paragraph_runs(document, ["#[IMAGE-logo-(2,2)]#"])
+    return save_docx(document)
+
+
+RECORD = {"#[title]#": "Report", "#[IMAGE-logo-(2,2)]#": PICTURE}
+
+
+def test_repeated_renders_are_identical(save_docx):
+    path = _template(save_docx)
+    writer = WordWriter(path, deterministic=True)
+    first = writer.render(RECORD)
+    assert writer.render(RECORD) == first
+
+    stream = io.BytesIO()
+    WordWriter(path).replace(RECORD, logs=False).save(stream, deterministic=True)
+    assert stream.getvalue() == first
+    assert SharedTemplate(path, lazy_parts=False, deterministic=True).render(RECORD) == first
+    assert len(Document(io.BytesIO(first)).inline_shapes) == 1
+
+
+def test_identical_across_processes(save_docx):
+    path = _template(save_docx)
+    script = (
+        "import sys, hashlib; sys.path.insert(0, %r)\n"
+        "from WordWriter import WordWriterClass as W\n"
+        "data = W(%r, deterministic=True).render(%r)\n"
+        "print(hashlib.sha256(data).hexdigest())\n" % (ROOT, path, RECORD)
+    )
+    digests = {subprocess.check_output([sys.executable, "-c", script]).strip() for _ in range(2)}
+    assert len(digests) == 1
+
+
+def test_cache_key_covers_deterministic(save_docx, tmp_path):
+    path = _template(save_docx)
+    cache = MemoryCache()
+    WordWriter.process(path, str(tmp_path / "a.docx"), RECORD, logs=False, cache=cache)
+    WordWriter.process(path, str(tmp_path / "b.docx"), RECORD, logs=False, cache=cache, deterministic=True)
+    assert cache.misses == 2
+    reference = WordWriter(path, deterministic=True).render(RECORD)
+    with open(str(tmp_path / "b.docx"), "rb") as f:
+        assert f.read() == reference
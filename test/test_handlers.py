@@ -0,0 +1,60 @@
+# coding=utf-8
+"""标签处理器分派测试"""
+
+import os
+
+import pytest
+from docx import Document
+from docx.oxml.ns import qn
+
+from WordWriter import WordWriterClass as WordWriter, registry
+from WordWriter.handlers import ImageHandler, TextHandler, TextboxHandler, ReplaceContext
+from WordWriter.locations import TextboxLocation
+from conftest import TEST_DIR, PICTURE
+
+
+def test_resolve_matches_prefix_anywhere():
+    assert isinstance(registry.resolve("#[TX-note]#"), TextboxHandler)
+    assert isinstance(registry.resolve("Note: #[TX-note]#"), TextboxHandler)
+    assert isinstance(registry.resolve("Logo: #[IMAGE-logo]#"), ImageHandler)
+    assert isinstance(registry.resolve("#[TBIMG-logo]#"), ImageHandler)
+    assert isinstance(registry.resolve("Name: #[name]#"), TextHandler)
+
+
+def _textbox_template(save_docx):
+    """test.docx 的文本框标签前加上说明文字"""
+    document = Document(os.path.join(TEST_DIR, "test.docx"))
+    for text in document.element.body.iter(qn("w:t")):
+        if text.text and "#[TX-testString2]#" in text.text:
+            text.text = "Note: " + text.text.strip()
+    return save_docx(document)
+
+
+def test_prefixed_textbox_tag(save_docx):
+    tag = "Note: #[TX-testString2]#"
+    writer = WordWriter(_textbox_template(save_docx)).load()
+    assert isinstance(writer.tag_dict[tag][0], TextboxLocation)
+    writer.replace({tag: "replaced"})
+    body = writer.document.element.body
+    textbox_texts = [t.text for t in body.iter(qn("w:t")) if t.text]
+    assert "replaced" in textbox_texts
+    assert not any("#[TX-" in text for text in textbox_texts)
+
+
+def test_prefixed_image_tag(save_docx):
+    document = Document()
+    document.add_paragraph().add_run("Logo: #[IMAGE-logo]#")
+    writer = WordWriter(save_docx(document)).load()
+    writer.replace({"#[IMAGE-logo]#": PICTURE})
+    paragraph = writer.document.paragraphs[0]
+    assert "#[IMAGE-" not in paragraph.text
+    assert paragraph._p.findall(".//" + qn("w:drawing"))
+
+
+def test_text_handler_rejects_textbox_location():
+    document = Document()
+    run = document.add_paragraph().add_run("#[TX-note]#")
+    location = TextboxLocation(run._r, document.part)
+    context = ReplaceContext(document, {})
+    with pytest.raises(TypeError):
+        TextHandler().replace("#[TX-note]#", location, "x", context)
@@ -0,0 +1,76 @@
+# coding=utf-8
+"""部件延迟解析测试"""
+
+import io
+import os
+import zipfile
+
+from docx.opc.part import XmlPart
+
+from WordWriter import WordWriterClass as WordWriter, load_document
+from WordWriter.lazy import LazyXmlPart, is_unparsed
+from conftest import TEST_DIR, PICTURE, TABLE_FILE, texts
+
+TEMPLATE = os.path.join(TEST_DIR, "test.docx")
+
+RECORD = {
+    "#[testheader1]#": "页眉",
+    "#[testString]#": "正文",
+    "#[TX-testString2]#": "文本框",
+    "#[IMAGE-test1-(30,30)]#": PICTURE,
+    "#[TABLE-test1]#": TABLE_FILE,
+}
+
+
+def _members(data):
+    archive = zipfile.ZipFile(io.BytesIO(data) if isinstance(data, bytes) else data)
+    return {name: archive.read(name) for name in archive.namelist()}
+
+
+def test_tag_free_parts_are_not_parsed():
+    document = load_document(TEMPLATE)
+    parts = {str(part.partname): part for part in document.part.package.iter_parts()}
+    lazy = [name for name, part in parts.items() if is_unparsed(part)]
+    assert lazy and "/word/document.xml" not in lazy
+    for name in lazy:
+        assert b"#[" not in parts[name].blob
+
+
+def _unparsed(document):
+    return {str(part.partname).lstrip("/") for part in document.part.package.iter_parts()
+            if is_unparsed(part)}
+
+
+def test_untouched_parts_round_trip():
+    original = _members(TEMPLATE)
+    writer = WordWriter(TEMPLATE, lazy_parts=True).load()
+    stream = io.BytesIO()
+    writer.replace(RECORD, logs=False).save(stream)
+    output = _members(stream.getvalue())
+
+    # 替换后仍未被访问的部件原样写出
+    unparsed = _unparsed(writer.document)
+    assert unparsed
+    for name in unparsed:
+        assert output[name] == original[name], name
+    assert set(output) == set(original) | {name for name in output if name.startswith("word/media/")}
+
+
+def test_parts_are_parsed_on_access():
+    document = load_document(TEMPLATE)
+    styles = document.part.part_related_by(
+        "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles")
+    assert isinstance(styles, LazyXmlPart)
+    assert document.styles["Normal"].name == "Normal"
+    parsed = document.part.part_related_by(
+        "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles")
+    assert isinstance(parsed, XmlPart) and not is_unparsed(parsed)
+    assert "word/styles.xml" not in _unparsed(document)
+
+
+def test_lazy_output_matches_eager():
+    outputs = [WordWriter(TEMPLATE, lazy_parts=lazy).render(RECORD) for lazy in (True, False)]
+    assert texts(outputs[0]) == texts(outputs[1])
+    lazy, eager = (_members(output) for output in outputs)
+    assert set(lazy) == set(eager)
+    assert lazy["word/document.xml"] == eager["word/document.xml"]
@@ -0,0 +1,38 @@
+# coding=utf-8
+"""LIST 标签测试"""
+
+from docx import Document
+
+from WordWriter import WordWriterClass as WordWriter
+from conftest import paragraph_runs, texts
+
+
+def _template(save_docx):
+    document = Document()
+    paragraph_runs(document, ["Report for ", "#[who]#"])
+    paragraph_runs(document, ["#[who]#", ": ", "#[LIST-items]#", " (", "#[unit]#", ")"])
+    paragraph_runs(document, ["End"])
+    return save_docx(document)
+
+
+def test_string_items_take_outer_tags(save_docx):
+    output = WordWriter(_template(save_docx)).render({
+        "#[who]#": "Ann",
+        "#[unit]#": "kg",
+        "#[LIST-items]#": ["one", "two"],
+    })
+    assert texts(output) == ["Report for Ann", "Ann: one (kg)", "Ann: two (kg)", "End"]
+
+
+def test_dict_items_override_outer_tags(save_docx):
+    output = WordWriter(_template(save_docx)).render({
+        "#[who]#": "Ann",
+        "#[LIST-items]#": [{"#[LIST-items]#": "one", "#[unit]#": "g"},
+                           {"#[LIST-items]#": "two", "#[who]#": "Bob"}],
+    })
+    assert texts(output) == ["Report for Ann", "Ann: one (g)", "Bob: two (#[unit]#)", "End"]
+
+
+def test_empty_list_removes_paragraph(save_docx):
+    output = WordWriter(_template(save_docx)).render({"#[who]#": "Ann", "#[LIST-items]#": []})
+    assert texts(output) == ["Report for Ann", "End"]
@@ -0,0 +1,67 @@
+# coding=utf-8
+"""run 规范化测试"""
+
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+import WordWriter.core as core
+from WordWriter import WordWriterClass as WordWriter, normalize_document
+from WordWriter.batch import run_batch
+from conftest import paragraph_runs, texts
+
+
+RECORD = {"#[a]#": "A", "#[b]#": "B", "#[c]#": "C"}
+
+
+def _several_tags(save_docx):
+    document = Document()
+    paragraph_runs(document, ["Name: ", "#[a]#", ", Date: ", "#[b]#", "."])
+    paragraph_runs(document, ["x ", "#[", "c", "]#", " y"])
+    paragraph_runs(document, ["#[a]#", "#[b]#", "#[c]#"])
+    return save_docx(document)
+
+
+def test_several_tags_in_a_paragraph(save_docx):
+    path = _several_tags(save_docx)
+    expected = texts(WordWriter(path).render(RECORD))
+    assert expected == ["Name: A, Date: B.", "x C y", "ABC"]
+    assert texts(WordWriter(path, normalize=True).render(RECORD)) == expected
+
+
+def test_merges_split_tag_into_one_run(save_docx):
+    document = Document()
+    paragraph = document.add_paragraph()
+    for xml in ('<w:r %s w:rsidR="00A1"><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">Hi #[</w:t></w:r>',
+                '<w:proofErr %s w:type="spellStart"/>',
+                '<w:r %s w:rsidRPr="00B2"><w:rPr><w:b/></w:rPr><w:lastRenderedPageBreak/><w:t>name</w:t></w:r>',
+                '<w:proofErr %s w:type="spellEnd"/>',
+                '<w:r %s><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">]# there</w:t></w:r>'):
+        paragraph._p.append(parse_xml(xml % nsdecls("w")))
+    path = save_docx(document)
+
+    writer = WordWriter(path, normalize=True).load()
+    assert len(writer.document.paragraphs[0].runs) == 1
+    xml = writer.document.element.xml
+    assert "proofErr" not in xml and "rsid" not in xml and "lastRenderedPageBreak" not in xml
+    assert texts(writer.render({"#[name]#": "Bob"})) == ["Hi Bob there"]
+
+
+def test_does_not_merge_across_tags():
+    document = Document()
+    paragraph = paragraph_runs(document, ["Name: ", "#[a]#", ", Date: ", "#[b]#", "."])
+    normalize_document(document)
+    assert [run.text for run in paragraph.runs] == ["Name: #[a]#, Date: ", "#[b]#."]
+
+
+def test_batch_validation_uses_normalize(save_docx, tmp_path, monkeypatch):
+    calls = []
+    original = core.normalize_document
+    monkeypatch.setattr(core, "normalize_document", lambda document: calls.append(1) or original(document))
+    path = _several_tags(save_docx)
+    pattern = str(tmp_path / "{index}.docx")
+    result = run_batch(path, iter([RECORD]), pattern, validate=True, normalize=True)
+    assert result.succeeded == 1
+    # 校验和渲染各加载一次模板，都经过规范化
+    assert len(calls) == 2
+    assert texts((tmp_path / "0.docx").read_bytes())[0] == "Name: A, Date: B."
@@ -0,0 +1,88 @@
+# coding=utf-8
+"""其他 XML 部件（脚注、批注、图表）中的标签测试"""
+
+import io
+import zipfile
+
+from docx import Document
+
+from WordWriter import WordWriterClass as WordWriter
+from WordWriter.locations import XmlTextLocation
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+RELS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+FOOTNOTES = (
+    f'<w:footnotes xmlns:w="{W}">'
+    '<w:footnote w:id="1"><w:p><w:r><w:t xml:space="preserve">Source: </w:t></w:r>'
+    '<w:r><w:t>#[</w:t></w:r><w:r><w:t>source]#</w:t></w:r></w:p></w:footnote>'
+    '</w:footnotes>'
+)
+COMMENTS = (
+    f'<w:comments xmlns:w="{W}">'
+    '<w:comment w:id="0" w:author="pzw"><w:p><w:r><w:t xml:space="preserve">Check #[title]#</w:t></w:r>'
+    '</w:p></w:comment></w:comments>'
+)
+CHART = (
+    '<c:chartSpace xmlns:c="http://schemas.openxmlformats.org/drawingml/2006/chart">'
+    '<c:chart><c:title><c:tx><c:v>#[title]#</c:v></c:tx></c:title>'
+    '<c:v>#[IMAGE-ignored]#</c:v></c:chart></c:chartSpace>'
+)
+PARTS = [
+    ("word/footnotes.xml", FOOTNOTES, f"{RELS}/footnotes",
+     "application/vnd.openxmlformats-officedocument.wordprocessingml.footnotes+xml"),
+    ("word/comments.xml", COMMENTS, f"{RELS}/comments",
+     "application/vnd.openxmlformats-officedocument.wordprocessingml.comments+xml"),
+    ("word/charts/chart1.xml", CHART, f"{RELS}/chart",
+     "application/vnd.openxmlformats-officedocument.drawingml.chart+xml"),
+]
+
+
+def _template(save_docx, tmp_path):
+    document = Document()
+    document.add_paragraph("Body #[title]#")
+    plain = save_docx(document, "plain.docx")
+
+    # python-docx 不能直接创建脚注、批注和图表部件，直接写入包中
+    path = str(tmp_path / "template.docx")
+    with zipfile.ZipFile(plain) as source, zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            data = source.read(item.filename)
+            if item.filename == "[Content_Types].xml":
+                overrides = "".join(f'<Override PartName="/{name}" ContentType="{content_type}"/>'
+                                    for name, _, _, content_type in PARTS)
+                data = data.replace(b"</Types>", overrides.encode() + b"</Types>")
+            elif item.filename == "word/_rels/document.xml.rels":
+                rels = "".join(f'<Relationship Id="rIdTest{index}" Type="{rel_type}" '
+                               f'Target="{name[len("word/"):]}"/>'
+                               for index, (name, _, rel_type, _) in enumerate(PARTS))
+                data = data.replace(b"</Relationships>", rels.encode() + b"</Relationships>")
+            target.writestr(item, data)
+        for name, xml, _, _ in PARTS:
+            target.writestr(name, xml)
+    return path
+
+
+def _part_xml(data, name):
+    return zipfile.ZipFile(io.BytesIO(data)).read(name).decode("utf-8")
+
+
+def test_tags_in_other_parts(save_docx, tmp_path):
+    writer = WordWriter(_template(save_docx, tmp_path)).load()
+    parts = {tag: sorted(str(location.part.partname) for location in locations)
+             for tag, locations in writer.tag_dict.items()}
+    assert parts == {
+        "#[title]#": ["/word/charts/chart1.xml", "/word/comments.xml", "/word/document.xml"],
+        "#[source]#": ["/word/footnotes.xml"],
+    }
+    assert any(isinstance(location, XmlTextLocation) for location in writer.tag_dict["#[title]#"])
+
+    for index in range(2):
+        # 第二次渲染从快照恢复，其他部件同样恢复到模板状态
+        output = writer.render({"#[title]#": f"Sales{index}", "#[source]#": f"survey{index}"})
+        footnotes = _part_xml(output, "word/footnotes.xml")
+        assert "#[" not in footnotes and f"survey{index}" in footnotes
+        assert f"Check Sales{index}" in _part_xml(output, "word/comments.xml")
+        chart = _part_xml(output, "word/charts/chart1.xml")
+        # 图表中只替换文本标签
+        assert f"<c:v>Sales{index}</c:v>" in chart and "#[IMAGE-ignored]#" in chart
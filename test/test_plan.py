@@ -0,0 +1,86 @@
+# coding=utf-8
+"""渲染计划（plan）测试"""
+
+import os
+
+import pytest
+from docx import Document
+
+from WordWriter import WordWriterClass as WordWriter, PlanValidationError, InputValidator
+from WordWriter.batch import run_batch
+from conftest import PICTURE, TABLE_FILE, paragraph_runs
+
+
+def _template(save_docx):
+    document = Document()
+    paragraph_runs(document, ["Name: ", "#[name]#"])
+    document.add_paragraph("#[IMAGE-logo]#")
+    table = document.add_table(rows=2, cols=3)
+    table.cell(0, 0).text = "A"
+    table.cell(1, 0).text = "#[TABLE-rows]#"
+    table.cell(1, 1).text = "x"
+    table.cell(1, 2).text = "y"
+    document.add_paragraph("#[TABLE-loose]#")
+    return save_docx(document)
+
+
+def test_plan_steps_and_missing(save_docx):
+    plan = WordWriter(_template(save_docx)).plan({
+        "#[name]#": "Ann", "#[IMAGE-logo]#": PICTURE, "#[TABLE-rows]#": TABLE_FILE, "#[absent]#": "x",
+    })
+    assert plan.ok
+    assert [(step.tag, step.handler, step.count) for step in plan.steps] == [
+        ("#[name]#", "text", 1), ("#[IMAGE-logo]#", "image", 1), ("#[TABLE-rows]#", "table", 1)]
+    assert plan.missing == ["#[absent]#"]
+
+
+def test_missing_image_is_fatal_only_when_strict(save_docx, tmp_path):
+    writer = WordWriter(_template(save_docx))
+    record = {"#[IMAGE-logo]#": str(tmp_path / "missing.png")}
+    plan = writer.plan(record)
+    assert plan.ok and len(plan.issues) == 1 and not plan.issues[0].fatal
+    assert not writer.plan(record, strict=True).ok
+
+
+def test_table_issues(save_docx, tmp_path):
+    wide = tmp_path / "wide.txt"
+    wide.write_text("1\t2\t3\t4\n", encoding="utf-8")
+    writer = WordWriter(_template(save_docx))
+    plan = writer.plan({"#[TABLE-rows]#": str(wide), "#[TABLE-loose]#": TABLE_FILE})
+    assert {issue.tag: issue.fatal for issue in plan.issues} == {
+        "#[TABLE-rows]#": True, "#[TABLE-loose]#": True}
+    assert any("不在表格中" in issue.message for issue in plan.errors)
+
+
+def test_failed_plan_leaves_document_untouched(save_docx):
+    writer = WordWriter(_template(save_docx)).load()
+    before = writer.document.element.xml
+    plan = writer.plan({"#[name]#": "Ann", "#[TABLE-loose]#": TABLE_FILE})
+    with pytest.raises(PlanValidationError) as info:
+        writer.replace(plan)
+    assert [issue.tag for issue in info.value.issues] == ["#[TABLE-loose]#"]
+    assert writer.document.element.xml == before
+
+
+def test_validator_cache_is_shared(save_docx):
+    writer = WordWriter(_template(save_docx))
+    validator = InputValidator()
+    first = writer.plan({"#[TABLE-rows]#": TABLE_FILE}, validator=validator)
+    second = writer.plan({"#[TABLE-rows]#": TABLE_FILE}, validator=validator)
+    assert first.ok and second.ok
+    # 命中缓存时不保留数据，执行时重新读取路径
+    assert second.replace_dict["#[TABLE-rows]#"] == TABLE_FILE
+
+
+def test_run_batch_validate_fails_only_bad_records(save_docx, tmp_path):
+    records = [
+        {"#[name]#": "Ann"},
+        {"#[name]#": "Bob", "#[TABLE-loose]#": TABLE_FILE},
+        {"#[name]#": "Cy", "#[IMAGE-logo]#": str(tmp_path / "missing.png")},
+        {"#[name]#": "Di", "#[TABLE-rows]#": TABLE_FILE},
+    ]
+    pattern = str(tmp_path / "out" / "{index}.docx")
+    result = run_batch(_template(save_docx), iter(records), pattern, validate=True)
+    assert result.succeeded == 2
+    assert sorted(failure["index"] for failure in result.failures) == [1, 2]
+    assert sorted(os.listdir(tmp_path / "out")) == ["0.docx", "3.docx"]
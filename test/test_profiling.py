@@ -0,0 +1,63 @@
+# coding=utf-8
+"""内存分析测试"""
+
+import tracemalloc
+
+from docx import Document
+
+from WordWriter import WordWriterClass as WordWriter
+from conftest import TABLE_FILE
+
+
+def _template(save_docx):
+    document = Document()
+    document.add_paragraph("Hello #[name]#")
+    table = document.add_table(rows=2, cols=3)
+    table.cell(1, 0).text = "#[TABLE-rows]#"
+    table.cell(1, 1).text = "x"
+    table.cell(1, 2).text = "y"
+    return save_docx(document)
+
+
+def _names(writer):
+    return [phase.name for phase in writer.memory_report.phases]
+
+
+def test_disabled_by_default(save_docx, tmp_path):
+    writer = WordWriter(_template(save_docx))
+    writer.replace({"#[name]#": "Ann"}, logs=False).save(str(tmp_path / "out.docx"))
+    assert writer.memory_report is None
+    assert not tracemalloc.is_tracing()
+
+
+def test_phase_names(save_docx, tmp_path):
+    writer = WordWriter(_template(save_docx), profile_memory=True).load()
+    writer.replace({"#[name]#": "Ann", "#[TABLE-rows]#": TABLE_FILE}, logs=False)
+    writer.save(str(tmp_path / "out.docx"))
+    assert _names(writer) == ["load", "search", "#[name]#", "#[TABLE-rows]#", "save"]
+    report = writer.memory_report
+    assert report.peak == max(phase.peak for phase in report.phases) >= 0
+    assert [phase["name"] for phase in report.to_dict()["phases"]] == _names(writer)
+    assert "#[TABLE-rows]#" in report.format()
+    assert not tracemalloc.is_tracing()
+
+
+def test_render_clears_report(save_docx):
+    writer = WordWriter(_template(save_docx), profile_memory=True)
+    writer.render({"#[name]#": "Ann"})
+    assert _names(writer) == ["load", "search", "snapshot", "#[name]#", "save"]
+    writer.render({"#[name]#": "Bob"})
+    # 第二次渲染从快照恢复，报告只包含本条记录的阶段
+    assert _names(writer) == ["reset", "#[name]#", "save"]
+    assert not tracemalloc.is_tracing()
+
+
+def test_caller_tracing_is_kept(save_docx):
+    tracemalloc.start()
+    try:
+        writer = WordWriter(_template(save_docx), profile_memory=True)
+        writer.render({"#[name]#": "Ann"})
+        assert writer.memory_report.phases
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,55 @@
+# coding=utf-8
+"""render()/reset() 测试"""
+
+import io
+import os
+
+import pytest
+
+from WordWriter import WordWriterClass as WordWriter
+from conftest import TEST_DIR, PICTURE, TABLE_FILE, texts
+
+TEMPLATE = os.path.join(TEST_DIR, "test.docx")
+
+
+def make_record(index):
+    return {
+        "#[testheader1]#": f"页眉{index}",
+        "#[testString]#": f"记录{index}",
+        "#[TX-testString2]#": f"文本框{index}",
+        "#[testTableString1]#": f"单元格{index}",
+        "#[IMAGE-test1-(30,30)]#": PICTURE,
+        "#[TABLE-test1]#": TABLE_FILE,
+    }
+
+
+def fresh_bytes(record, lazy_parts):
+    stream = io.BytesIO()
+    WordWriter(TEMPLATE, deterministic=True, lazy_parts=lazy_parts).replace(record, logs=False).save(stream)
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("lazy_parts", [True, False])
+def test_render_matches_fresh_replace(lazy_parts):
+    writer = WordWriter(TEMPLATE, deterministic=True, lazy_parts=lazy_parts)
+    outputs = [writer.render(make_record(index)) for index in range(3)]
+    for index, output in enumerate(outputs):
+        assert output == fresh_bytes(make_record(index), lazy_parts)
+    assert "记录1" in "".join(texts(outputs[1]))
+    assert "记录0" not in "".join(texts(outputs[1]))
+
+
+def test_reset_restores_template():
+    writer = WordWriter(TEMPLATE).load()
+    template_xml = writer.document.element.xml
+    tags = writer.get_tags()
+
+    writer.render(make_record(0))
+    assert writer.document.element.xml != template_xml
+    writer.reset()
+    assert writer.document.element.xml == template_xml
+    assert writer.get_tags() == tags
+
+    # 恢复后的索引仍然有效
+    writer.replace(make_record(1), logs=False)
+    assert "记录1" in writer.document.element.xml
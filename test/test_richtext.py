@@ -0,0 +1,49 @@
+# coding=utf-8
+"""富文本值测试"""
+
+from docx import Document
+from docx.oxml.ns import qn
+
+from WordWriter import WordWriterClass as WordWriter, RichText
+from conftest import paragraph_runs
+
+
+def _render(save_docx, runs, values):
+    document = Document()
+    paragraph_runs(document, runs)
+    writer = WordWriter(save_docx(document)).load()
+    writer.replace(values, logs=False)
+    return writer.document.paragraphs[0]
+
+
+def _runs(paragraph):
+    return [(run.text, bool(run.bold)) for run in paragraph.runs]
+
+
+def test_tag_run_is_replaced_by_spans(save_docx):
+    paragraph = _render(save_docx, ["#[status]#"], {"#[status]#": RichText("[b]ok[/b] now")})
+    assert _runs(paragraph) == [("ok", True), (" now", False)]
+    assert all(r.find(qn("w:t")) is not None for r in paragraph._p.iter(qn("w:r")))
+
+
+def test_text_around_tag_is_kept(save_docx):
+    paragraph = _render(save_docx, ["a #[x]# b"], {"#[x]#": RichText("[i]X[/i]")})
+    assert [run.text for run in paragraph.runs] == ["a ", "X", " b"]
+
+
+def test_later_tags_in_paragraph(save_docx):
+    paragraph = _render(save_docx, ["#[a]#", " and ", "#[b]#", "!"], {
+        "#[a]#": RichText("[b]A[/b][i]a[/i]"),
+        "#[b]#": RichText("[u]B[/u]"),
+    })
+    assert paragraph.text == "Aa and B!"
+    assert [run.text for run in paragraph.runs] == ["A", "a", " and ", "B", "!"]
+
+
+def test_empty_value_leaves_no_empty_run(save_docx):
+    paragraph = _render(save_docx, ["#[a]#", "#[b]#", "-", "#[c]#"], {
+        "#[a]#": RichText(""),
+        "#[b]#": RichText("[b]B[/b]"),
+        "#[c]#": RichText("C"),
+    })
+    assert [run.text for run in paragraph.runs] == ["B", "-", "C"]
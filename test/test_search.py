@@ -0,0 +1,96 @@
+# coding=utf-8
+"""标签搜索测试"""
+
+import io
+import os
+
+import pytest
+from docx import Document
+
+from WordWriter import WordWriterClass as WordWriter, TagSearcher
+from conftest import TEST_DIR, PICTURE, TABLE_FILE, paragraph_runs
+
+TEMPLATE = os.path.join(TEST_DIR, "test.docx")
+
+
+def signature(tag_dict):
+    """标签索引的可比较形式 {tag: [(位置类型, 元素地址, 其他属性), ...]}"""
+    return {tag: [(type(location).__name__, location.address(),
+                   tuple(getattr(location, name) for name in location._state_slots()))
+                  for location in locations]
+            for tag, locations in tag_dict.items()}
+
+
+def _conditional_template(save_docx):
+    document = Document(TEMPLATE)
+    document.add_paragraph("#[IF-extra]#")
+    paragraph_runs(document, ["Extra ", "#[", "testString", "]#"])
+    document.add_paragraph("#[/IF-extra]#")
+    return save_docx(document)
+
+
+@pytest.mark.parametrize("keys", [
+    ["#[testString]#"],
+    ["#[testheader1]#", "#[testTableString1]#", "#[TABLE-test1]#"],
+    ["#[TX-testString2]#", "#[IMAGE-test1-(30,30)]#", "#[absent]#"],
+    ["#[IF-extra]#", "#[testString]#"],
+])
+def test_targeted_search_matches_full_index(save_docx, keys):
+    document = Document(_conditional_template(save_docx))
+    full = signature(TagSearcher(document).search_all())
+    targeted = signature(TagSearcher(document).search(keys))
+    wanted = set(keys) | {key.replace("#[IF-", "#[/IF-") for key in keys}
+    assert targeted == {tag: locations for tag, locations in full.items() if tag in wanted}
+
+
+def test_targeted_replace_matches_full_replace(save_docx):
+    path = _conditional_template(save_docx)
+    record = {"#[testString]#": "S", "#[IF-extra]#": True, "#[TX-testString2]#": "T",
+              "#[IMAGE-test1-(30,30)]#": PICTURE, "#[TABLE-test1]#": TABLE_FILE}
+    outputs = []
+    for writer in (WordWriter(path, deterministic=True), WordWriter(path, deterministic=True).load()):
+        stream = io.BytesIO()
+        writer.replace(record, logs=False).save(stream)
+        outputs.append(stream.getvalue())
+    assert outputs[0] == outputs[1]
+
+
+def _header_parts(document):
+    return [part for part in document.part.package.iter_parts() if "header" in str(part.partname)]
+
+
+def test_linked_headers_are_searched_once(save_docx):
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = "Head #[head]#"
+    document.add_paragraph("one")
+    document.add_section()
+    document.add_paragraph("two")
+    third = document.add_section()
+    third.header.is_linked_to_previous = False
+    third.header.paragraphs[0].text = "Other #[other]#"
+    path = save_docx(document)
+
+    document = Document(path)
+    parts = _header_parts(document)
+    tag_dict = TagSearcher(document).search_all()
+    assert [len(tag_dict[tag]) for tag in ("#[head]#", "#[other]#")] == [1, 1]
+    # 链接到前一节的页眉不会被创建为新的部件
+    assert _header_parts(document) == parts
+
+    writer = WordWriter(path).load()
+    writer.replace({"#[head]#": "H", "#[other]#": "O"}, logs=False)
+    headers = [section.header.paragraphs[0].text for section in writer.document.sections]
+    assert headers == ["Head H", "Head H", "Other O"]
+
+
+def test_merged_cells_are_searched_once(save_docx):
+    document = Document()
+    table = document.add_table(rows=3, cols=3)
+    table.cell(0, 0).merge(table.cell(1, 0)).text = "#[down]#"
+    table.cell(0, 1).merge(table.cell(0, 2)).text = "#[across]#"
+    table.cell(2, 0).merge(table.cell(2, 2)).text = "#[TABLE-rows]#"
+    document = Document(save_docx(document))
+    tag_dict = TagSearcher(document).search_all()
+    assert {tag: len(locations) for tag, locations in tag_dict.items()} == {
+        "#[down]#": 1, "#[across]#": 1, "#[TABLE-rows]#": 1}
+    assert (tag_dict["#[TABLE-rows]#"][0].row, tag_dict["#[TABLE-rows]#"][0].col) == (2, 0)
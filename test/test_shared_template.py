@@ -0,0 +1,44 @@
+# coding=utf-8
+"""SharedTemplate 多线程渲染测试"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from WordWriter import WordWriterClass as WordWriter, SharedTemplate
+from conftest import TEST_DIR, PICTURE, TABLE_FILE, texts
+
+TEMPLATE = os.path.join(TEST_DIR, "test.docx")
+
+
+def make_record(index):
+    return {
+        "#[testheader1]#": f"页眉{index}",
+        "#[testString]#": f"RECORD-{index:04d}",
+        "#[TX-testString2]#": f"文本框{index}",
+        "#[testTableString1]#": f"单元格{index}",
+        "#[IMAGE-test1-(30,30)]#": PICTURE,
+        "#[TABLE-test1]#": TABLE_FILE,
+    }
+
+
+@pytest.mark.parametrize("lazy_parts", [True, False])
+def test_threaded_renders_match_serial(lazy_parts):
+    total = 24
+    template = SharedTemplate(TEMPLATE, lazy_parts=lazy_parts, deterministic=True)
+    with ThreadPoolExecutor(6) as executor:
+        outputs = list(executor.map(lambda index: template.render(make_record(index)), range(total)))
+
+    serial = WordWriter(TEMPLATE, lazy_parts, deterministic=True)
+    for index, output in enumerate(outputs):
+        assert output == serial.render(make_record(index)), index
+        assert f"RECORD-{index:04d}" in "".join(texts(output))
+
+
+def test_writer_keeps_template_options():
+    template = SharedTemplate(TEMPLATE, lazy_parts=False, deterministic=True, normalize=True)
+    writer = template.writer()
+    assert writer.render_options == {"lazy_parts": False, "normalize": True, "deterministic": True}
+    assert writer.render_options == WordWriter(TEMPLATE, False, deterministic=True,
+                                               normalize=True).render_options
@@ -0,0 +1,97 @@
+# coding=utf-8
+"""表格数据源测试"""
+
+import datetime
+import os
+
+import pandas as pd
+import pytest
+from docx import Document
+
+from WordWriter import SharedTables, load_table_source
+from WordWriter.batch import run_batch
+
+pa = pytest.importorskip("pyarrow")
+feather = pytest.importorskip("pyarrow.feather")
+parquet = pytest.importorskip("pyarrow.parquet")
+
+
+FRAME = pd.DataFrame({
+    "name": ["a", None, "line\\x0abreak"],
+    "count": pd.array([3, None, 5], dtype="Int64").astype("float64"),
+    "price": [1.5, float("nan"), 2.0],
+    "when": pd.to_datetime(["2024-01-02 00:00:00", None, "2024-03-04 05:06:07"]),
+    "day": [datetime.date(2024, 1, 2), None, datetime.date(2024, 3, 4)],
+})
+
+
+def _rows(value, **options):
+    return [list(row) for row in load_table_source(value, **options).iter_rows()]
+
+
+def _arrow_values(tmp_path):
+    table = pa.Table.from_pandas(FRAME, preserve_index=False)
+    parquet_path = str(tmp_path / "table.parquet")
+    feather_path = str(tmp_path / "table.feather")
+    parquet.write_table(table, parquet_path)
+    feather.write_feather(table, feather_path, compression="uncompressed")
+    return [table, table.to_batches()[0], parquet_path, feather_path]
+
+
+def test_arrow_matches_dataframe(tmp_path):
+    expected = _rows(FRAME)
+    assert expected[1][1:4] == ["nan", "nan", "NaT"]
+    assert expected[0][1] == "3.0"
+    assert expected[2][0] == "line\nbreak"
+    for value in _arrow_values(tmp_path):
+        assert _rows(value) == expected, value
+
+
+def test_na_rep_and_formats_match(tmp_path):
+    options = {"formats": {"price": ".2f", "when": "%Y-%m-%d", 1: ",.0f"}, "na_rep": "-"}
+    expected = _rows(FRAME, **options)
+    assert expected[1] == ["-"] * 5
+    assert expected[0][1:4] == ["3", "1.50", "2024-01-02"]
+    for value in _arrow_values(tmp_path):
+        assert _rows(value, **options) == expected, value
+
+
+def _tsv(tmp_path):
+    path = tmp_path / "shared.txt"
+    path.write_text("a\t1\t\nb\t\tline\\x0atwo\n\t3\t4.5\n", encoding="utf-8")
+    return str(path)
+
+
+def test_shared_tables_match_direct_loading(tmp_path):
+    tsv = _tsv(tmp_path)
+    parquet_path = str(tmp_path / "shared.parquet")
+    parquet.write_table(pa.Table.from_pandas(FRAME, preserve_index=False), parquet_path)
+    direct = {path: (_rows(path), _rows(path, na_rep="-")) for path in (tsv, parquet_path)}
+    assert direct[tsv][0][0] == ["a", "1", "nan"] and direct[tsv][0][1][2] == "line\ntwo"
+
+    with SharedTables([tsv, parquet_path]) as shared:
+        assert set(shared.tables) == {os.path.abspath(tsv), os.path.abspath(parquet_path)}
+        for path, (rows, filled) in direct.items():
+            assert _rows(path) == rows
+            assert _rows(path, na_rep="-") == filled
+    assert not any(os.path.exists(target) for target in shared.tables.values())
+
+
+def test_run_batch_share_tables(save_docx, tmp_path):
+    document = Document()
+    table = document.add_table(rows=2, cols=3)
+    table.cell(1, 0).text = "#[TABLE-rows]#"
+    table.cell(1, 1).text = "x"
+    table.cell(1, 2).text = "y"
+    document.add_paragraph("#[name]#")
+    path = save_docx(document)
+    tsv = _tsv(tmp_path)
+    records = [{"#[TABLE-rows]#": tsv, "#[name]#": str(index)} for index in range(3)]
+
+    outputs = {}
+    for share in (True, False):
+        pattern = str(tmp_path / str(share) / "{index}.docx")
+        result = run_batch(path, iter(records), pattern, share_tables=share, deterministic=True)
+        assert result.succeeded == 3
+        outputs[share] = [(tmp_path / str(share) / f"{index}.docx").read_bytes() for index in range(3)]
+    assert outputs[True] == outputs[False]
@@ -0,0 +1,55 @@
+# coding=utf-8
+"""表格标签（TABLE）填充测试"""
+
+import pandas as pd
+import pytest
+from docx import Document
+
+from WordWriter import WordWriterClass as WordWriter
+
+LEFT = pd.DataFrame([["a1", "b1"], ["a2", "b2"], ["a3", "b3"]])
+RIGHT = pd.DataFrame([["c1"], ["c2"]])
+
+
+def _template(save_docx):
+    document = Document()
+    for _ in range(2):
+        table = document.add_table(rows=4, cols=3)
+        for col, header in enumerate("ABC"):
+            table.cell(0, col).text = header
+        table.cell(1, 0).paragraphs[0].add_run("#[TABLE-left]#").bold = True
+        table.cell(1, 1).text = "x"
+        table.cell(1, 2).paragraphs[0].add_run("#[TABLE-right]#").italic = True
+        table.cell(3, 0).text = "foot"
+    return save_docx(document)
+
+
+def _cells(table):
+    return [[cell.text for cell in row.cells] for row in table.rows]
+
+
+@pytest.mark.parametrize("order", [("left", "right"), ("right", "left")])
+def test_several_tags_in_one_table(save_docx, order):
+    values = {"#[TABLE-left]#": LEFT, "#[TABLE-right]#": RIGHT}
+    writer = WordWriter(_template(save_docx)).load()
+    assert len(writer.tag_dict["#[TABLE-left]#"]) == 2
+    writer.replace({f"#[TABLE-{name}]#": values[f"#[TABLE-{name}]#"] for name in order}, logs=False)
+
+    for table in writer.document.tables:
+        assert _cells(table) == [["A", "B", "C"],
+                                 ["a1", "b1", "c1"],
+                                 ["a2", "b2", "c2"],
+                                 ["a3", "b3", ""]]
+        # 各列沿用标签单元格的格式
+        rows = table.rows[1:]
+        assert all(row.cells[0].paragraphs[0].runs[0].bold for row in rows)
+        assert all(row.cells[2].paragraphs[0].runs[0].italic for row in rows[:2])
+
+
+def test_longer_data_adds_rows(save_docx):
+    data = pd.DataFrame([[f"r{index}", "v"] for index in range(6)])
+    writer = WordWriter(_template(save_docx)).load()
+    writer.replace({"#[TABLE-left]#": data, "#[TABLE-right]#": RIGHT}, logs=False)
+    cells = _cells(writer.document.tables[0])
+    assert [row[0] for row in cells] == ["A"] + [f"r{index}" for index in range(6)]
+    assert [row[2] for row in cells[1:4]] == ["c1", "c2", ""]
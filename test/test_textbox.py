@@ -0,0 +1,65 @@
+# coding=utf-8
+"""文本框标签测试"""
+
+import copy
+import os
+import pickle
+
+from docx import Document
+from docx.oxml.ns import qn
+
+from WordWriter import WordWriterClass as WordWriter, TagSearcher
+from conftest import TEST_DIR
+
+TEMPLATE = os.path.join(TEST_DIR, "test.docx")
+TAG = "#[TX-testString2]#"
+
+
+def _texts(element):
+    return [t.text for t in element.iter(qn("w:t")) if t.text]
+
+
+def _header_template(save_docx):
+    """把正文中的文本框（含 mc:Fallback 副本）复制一份到页眉"""
+    document = Document(TEMPLATE)
+    textbox = next(document.element.body.iter(qn("w:txbxContent")))
+    run = next(ancestor for ancestor in textbox.iterancestors(qn("w:r"))
+               if ancestor.getparent().tag == qn("w:p"))
+    header = document.sections[0].header
+    header.is_linked_to_previous = False
+    clone = copy.deepcopy(run)
+    for text in clone.iter(qn("w:t")):
+        if text.text and TAG in text.text:
+            text.text = "#[TX-head]#"
+    header.paragraphs[0]._p.append(clone)
+    return save_docx(document)
+
+
+def test_choice_and_fallback_are_paired():
+    tag_dict = TagSearcher(Document(TEMPLATE)).search_all()
+    locations = tag_dict[TAG]
+    assert len(locations) == 1
+    assert locations[0].fallback >= 0
+    first, fallback = locations[0].elements()
+    assert first is not fallback
+    assert TAG in first.text and TAG in fallback.text
+    # 位置只保存 Fallback 下标，可序列化
+    state = pickle.loads(pickle.dumps(locations[0]))
+    assert state.fallback == locations[0].fallback
+
+
+def test_both_copies_are_replaced():
+    writer = WordWriter(TEMPLATE).load()
+    writer.replace({TAG: "replaced"}, logs=False)
+    texts = _texts(writer.document.element.body)
+    assert texts.count("replaced") == 2
+    assert not any(TAG in text for text in texts)
+
+
+def test_header_textbox(save_docx):
+    writer = WordWriter(_header_template(save_docx)).load()
+    assert [len(writer.tag_dict[tag]) for tag in (TAG, "#[TX-head]#")] == [1, 1]
+    writer.replace({TAG: "body", "#[TX-head]#": "head"}, logs=False)
+    header = writer.document.sections[0].header._element
+    assert _texts(header).count("head") == 2
+    assert _texts(writer.document.element.body).count("body") == 2